@@ -0,0 +1,2 @@
+# Pacote regular (não namespace): o wheel do pyarrow 17 instala um "benchmarks"
+# top-level no site-packages que, sem este arquivo, teria precedência.
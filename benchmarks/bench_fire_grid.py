@@ -0,0 +1,131 @@
+# benchmarks/bench_fire_grid.py
+"""
+Grade de focos (etl/gold/fire_grid.py) sobre N focos sintéticos agrupados em
+frentes de fogo dentro do retângulo do Brasil (fixtures.LAT_RANGE/LON_RANGE),
+espalhados por D dias:
+
+- bin:    fire_grid.bin_points por nível (focos/s);
+- tiles:  fire_grid.tiles numa janela de 30 dias (p50/p99 e bytes das
+          partições abertas), o que o visual de mapa passa a ler; tiles-bbox
+          recorta um viewport de --bbox-deg graus (zoom nos níveis finos);
+- points: status quo, ler os pontos da janela (parquet com ts/lat/lon/confiança,
+          no lugar do find em raw_fires) e binar no pandas a cada consulta.
+          Ler parquet local é bem mais barato que o find no Mongo (rede + BSON),
+          então esse caso é um piso para o status quo.
+
+As contagens por tile são conferidas entre tiles e points antes de medir.
+Grava em benchmarks/results/results.jsonl.
+
+Uso:
+    python -m benchmarks.bench_fire_grid
+    python -m benchmarks.bench_fire_grid --points 5000000 --days 180 --repeat 50
+"""
+import argparse, tempfile, time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import fixtures
+from benchmarks.common import peak_rss_mb, percentile, record
+from etl.gold import fire_grid
+
+def make_points(n: int, days: int, end: date, seed: int, clusters: int = 400) -> dict[str, np.ndarray]:
+    """Focos agrupados em `clusters` frentes de fogo (gaussianas de ~0,3°), como no arco do desmatamento."""
+    rng = np.random.default_rng(seed)
+    day0 = np.datetime64(end - timedelta(days=days - 1), "D")
+    c_lat = rng.uniform(*fixtures.LAT_RANGE, clusters)
+    c_lon = rng.uniform(*fixtures.LON_RANGE, clusters)
+    c = rng.integers(0, clusters, n)
+    return {
+        "days": day0 + rng.integers(0, days, n).astype("timedelta64[D]"),
+        "lat": np.clip(c_lat[c] + rng.normal(0, 0.3, n), *fixtures.LAT_RANGE),
+        "lon": np.clip(c_lon[c] + rng.normal(0, 0.3, n), *fixtures.LON_RANGE),
+        "conf": np.where(rng.random(n) < 0.2, np.nan, rng.uniform(0, 100, n)),
+    }
+
+def points_tiles(points_file: Path, start: date, end: date, cell: float, bbox=None) -> pd.Series:
+    """Status quo: pontos da janela -> contagem por tile no pandas."""
+    df = pd.read_parquet(points_file, filters=[("date", ">=", start), ("date", "<=", end)])
+    if bbox is not None:
+        df = df[df["lat"].between(bbox[0], bbox[2]) & df["lon"].between(bbox[1], bbox[3])]
+    tile = (np.floor((df["lat"] + 90) / cell).astype("int64") * fire_grid.n_cols(cell)
+            + np.floor((df["lon"] + 180) / cell).astype("int64"))
+    return tile.value_counts()
+
+def _lat_ms(fn, n) -> list[float]:
+    out = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Grade de focos: binning, consulta por tiles x pontos crus.")
+    ap.add_argument("--points", type=int, default=2_000_000)
+    ap.add_argument("--days", type=int, default=180)
+    ap.add_argument("--window", type=int, default=30)
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--bbox-deg", type=float, default=5.0)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--label", default="")
+    args = ap.parse_args(argv)
+
+    end = date(2025, 10, 14)
+    pts = make_points(args.points, args.days, end, args.seed)
+    params = {"points": args.points, "days": args.days, "window": args.window, "levels": list(fire_grid.LEVELS)}
+
+    with tempfile.TemporaryDirectory(prefix="bench-grid-") as tmp:
+        root = Path(tmp) / "fire_grid"
+        binned = {}
+        for level, cell in enumerate(fire_grid.LEVELS):
+            t0 = time.perf_counter()
+            binned[level] = fire_grid.bin_points(pts["days"], pts["lat"], pts["lon"], pts["conf"], cell)
+            el = time.perf_counter() - t0
+            record("fire_grid", f"bin-l{level}", params, {"seconds": round(el, 3), "rows": len(binned[level]),
+                   "points_per_s": round(args.points / el), "peak_rss_mb": round(peak_rss_mb(), 1)},
+                   label=args.label)
+            print(f"[bench] fire_grid bin nível {level} ({cell}°): {el:.2f}s "
+                  f"({args.points / el:,.0f} focos/s) -> {len(binned[level])} linhas")
+
+        # grava as partições por mês como o update faria
+        for level, df in binned.items():
+            for (y, m), sub in df.groupby([df["date"].dt.year, df["date"].dt.month]):
+                fire_grid._replace_days(root, level, y, m, set(sub["date"].dt.date), sub)
+        points_file = Path(tmp) / "points.parquet"
+        pd.DataFrame({"date": pts["days"].astype("datetime64[D]"), "lat": pts["lat"], "lon": pts["lon"],
+                      "confianca": pts["conf"]}).assign(date=lambda d: d["date"].dt.date) \
+            .sort_values("date").to_parquet(points_file, index=False, row_group_size=100_000)
+
+        start = end - timedelta(days=args.window - 1)
+        for level, cell in enumerate(fire_grid.LEVELS):
+            got = fire_grid.tiles(level, start, end, root=root).set_index("tile")["focos"].sort_index()
+            ref = points_tiles(points_file, start, end, cell).sort_index()
+            assert got.index.equals(ref.index) and (got.to_numpy() == ref.to_numpy()).all(), level
+            y, m, read = start.year, start.month, 0
+            while (y, m) <= (end.year, end.month):
+                f = fire_grid._part_file(root, level, y, m)
+                read += f.stat().st_size if f.exists() else 0
+                y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+            lat0, lon0 = -10.0, -55.0
+            bbox = (lat0, lon0, lat0 + args.bbox_deg, lon0 + args.bbox_deg)
+            cases = (
+                ("tiles", lambda: fire_grid.tiles(level, start, end, root=root), read),
+                ("tiles-bbox", lambda: fire_grid.tiles(level, start, end, bbox=bbox, root=root), read),
+                ("points", lambda: points_tiles(points_file, start, end, cell), points_file.stat().st_size),
+                ("points-bbox", lambda: points_tiles(points_file, start, end, cell, bbox),
+                 points_file.stat().st_size),
+            )
+            for impl, fn, size in cases:
+                lat = _lat_ms(fn, args.repeat)
+                p50, p99 = percentile(lat, 0.5), percentile(lat, 0.99)
+                record("fire_grid", f"{impl}-l{level}", params,
+                       {"p50_ms": round(p50, 3), "p99_ms": round(p99, 3), "bytes": size, "tiles": len(got),
+                        "peak_rss_mb": round(peak_rss_mb(), 1)}, label=args.label)
+                print(f"[bench] fire_grid {impl:<11} nível {level}: p50={p50:8.2f}ms p99={p99:8.2f}ms "
+                      f"arquivos={size / 1024:10.1f} KiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# benchmarks/bench_gold_streaming.py
+"""
+Pico de memória do gold monolítico (write_gold) x streaming em janelas
+(etl/gold/streaming.py) para lookbacks crescentes.
+
+Um mongod descartável recebe N municípios sintéticos (ref_municipios), focos
+pontuais em raw_fires e clima em weather_buckets (um doc por município-dia,
+WEATHER_STORAGE=bucket, para a carga caber no benchmark) cobrindo o maior
+lookback. Cada (modo, lookback) roda num processo filho novo (spawn), então
+o ru_maxrss medido é só daquela execução. Esperado: o monolítico cresce com
+o lookback; o streaming fica ~constante (uma janela + carry).
+
+Grava em benchmarks/results/results.jsonl.
+
+Uso:
+    python -m benchmarks.bench_gold_streaming
+    python -m benchmarks.bench_gold_streaming --municipios 1000 --lookbacks 90,365,730,1095 --fires-per-day 3000
+"""
+import argparse, multiprocessing as mp, os, random, sys, tempfile, time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from benchmarks import fixtures
+from benchmarks.common import REPO_ROOT, mongo_for_bench, peak_rss_mb, prepare_db, record
+from etl.weather.buckets import COLLECTION as BUCKETS
+from etl.weather.fetch_weather import DEFAULT_HOURLY
+
+MODES = ("monolithic", "streaming")
+
+def load_fixtures(db, muns, days: int, fires_per_day: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    db.ref_municipios.insert_many([{"codigo_ibge": m.codigo_ibge, "municipio": m.nome, "uf": m.uf,
+                                    "populacao": m.populacao, "lat": m.lat, "lon": m.lon} for m in muns])
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    fires = weather = 0
+    for d in range(days + 1):
+        day = today - timedelta(days=d)
+        docs = []
+        for _ in range(fires_per_day):
+            m = rng.choice(muns)
+            docs.append({"ts": day + timedelta(seconds=rng.randrange(86400)),
+                         "lat": m.lat + rng.uniform(-0.05, 0.05), "lon": m.lon + rng.uniform(-0.05, 0.05),
+                         "meta": {"uf": m.uf, "municipio_ibge": m.codigo_ibge, "municipio": m.nome},
+                         "confianca": rng.choice([None, 30.0, 50.0, 70.0, 90.0])})
+        db.raw_fires.insert_many(docs, ordered=False)
+        fires += len(docs)
+        db[BUCKETS].insert_many([
+            {"municipio_ibge": m.codigo_ibge, "date": day, "uf": m.uf, "lat": m.lat, "lon": m.lon,
+             "source": "bench",
+             "hourly": {v: [round(rng.uniform(0, 60), 1) for _ in range(24)] for v in DEFAULT_HOURLY}}
+            for m in muns], ordered=False)
+        weather += len(muns)
+    return {"fires_docs": fires, "bucket_docs": weather}
+
+def _child(mode: str, lookback: int, uri: str, workdir: str, q):
+    try:
+        sys.path.insert(0, str(REPO_ROOT))
+        os.environ.update({"MONGO_URI": uri, "WEATHER_STORAGE": "bucket", "FIRE_GRID": "0"})
+        os.chdir(workdir)
+        from etl.gold import export_parquet as ex
+        t0 = time.perf_counter()
+        if mode == "streaming":
+            from etl.gold.streaming import run_streaming
+            out = run_streaming(uri, lookback_days=lookback)
+        else:
+            fires_df = ex.build_fact_fires_daily(uri, lookback_days=lookback)
+            weather_df = ex.build_weather_daily(uri, lookback_days=lookback)
+            ex.write_gold(fires_df, weather_df, ex.load_dim_municipio(uri))
+            out = {"fires_rows": len(fires_df), "risk_rows": len(weather_df)}
+        q.put({"ok": True, "elapsed_s": round(time.perf_counter() - t0, 3),
+               "peak_rss_mb": round(peak_rss_mb(), 1), **out})
+    except BaseException as e:
+        q.put({"ok": False, "error": repr(e), "peak_rss_mb": round(peak_rss_mb(), 1)})
+
+def run_child(mode: str, lookback: int, uri: str, workdir: str, timeout: float = 3600) -> dict:
+    ctx = mp.get_context("spawn")
+    q = ctx.Queue()
+    p = ctx.Process(target=_child, args=(mode, lookback, uri, workdir, q), name=f"bench-gold-{mode}")
+    p.start()
+    try:
+        return q.get(timeout=timeout)
+    finally:
+        p.join(timeout=30)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Pico de RSS do gold: monolítico x streaming por lookback.")
+    ap.add_argument("--municipios", type=int, default=300)
+    ap.add_argument("--lookbacks", default="90,180,365,730")
+    ap.add_argument("--fires-per-day", type=int, default=1000)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--mongo-uri", default=None)
+    ap.add_argument("--mongod", default=None)
+    ap.add_argument("--label", default="")
+    args = ap.parse_args(argv)
+    lookbacks = sorted(int(x) for x in args.lookbacks.split(",") if x.strip())
+
+    with tempfile.TemporaryDirectory(prefix="bench-gold-") as tmp, \
+         mongo_for_bench(args.mongo_uri, args.mongod) as uri:
+        from pymongo import MongoClient
+        cli = MongoClient(uri)
+        prepare_db(cli.get_database())
+        t0 = time.perf_counter()
+        loaded = load_fixtures(cli.get_database(), fixtures.make_municipios(args.municipios, seed=args.seed),
+                               lookbacks[-1], args.fires_per_day, args.seed)
+        cli.close()
+        print(f"[bench] gold_streaming: {loaded} ({time.perf_counter() - t0:.1f}s)")
+
+        for lookback in lookbacks:
+            params = {"municipios": args.municipios, "lookback_days": lookback,
+                      "fires_per_day": args.fires_per_day, **loaded}
+            for mode in MODES:
+                workdir = Path(tmp) / f"{mode}-{lookback}"
+                workdir.mkdir()
+                res = run_child(mode, lookback, uri, str(workdir))
+                record("gold_streaming", mode, params, res, label=args.label)
+                if not res.get("ok"):
+                    print(f"[bench] gold {mode} lookback={lookback}: FALHOU {res.get('error')}")
+                    continue
+                print(f"[bench] gold {mode:<10} lookback={lookback:5d}d: {res['elapsed_s']:8.2f}s "
+                      f"pico RSS={res['peak_rss_mb']:8.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# benchmarks/bench_hot_index.py
+"""
+Microbenchmarks do índice quente (etl/gold/hot_index.py) sobre municípios
+sintéticos (fixtures.make_municipios) com N dias de risco:
+
+- publish: última linha por município + grade + gravação dos .npy;
+- load:    abrir a versão ativa com mmap (cache do processo limpo);
+- nearest / within / above: consultas por ponto/limiar sorteados (seed fixa),
+  comparadas com a força bruta NumPy (haversine em todos os municípios) e com
+  o status quo (ler fact_risk_daily.parquet + dim_municipio no pandas).
+
+Os resultados do índice são conferidos contra a força bruta antes de medir.
+Grava p50/p99 (µs) em benchmarks/results/results.jsonl.
+
+Uso:
+    python -m benchmarks.bench_hot_index
+    python -m benchmarks.bench_hot_index --municipios 5570 --days 180 --repeat 2000 --cell-deg 0.5
+"""
+import argparse, random, tempfile, time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import fixtures
+from benchmarks.common import peak_rss_mb, percentile, record
+from etl.gold import hot_index
+
+def build_frames(muns, days: int, end: date, seed: int) -> tuple[pd.DataFrame, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end - timedelta(days=days - 1), end).date
+    n, d = len(muns), len(dates)
+    rows = n * d
+    risk = pd.DataFrame({
+        "date": np.repeat(dates, n), "municipio_ibge": np.tile([m.codigo_ibge for m in muns], d),
+        "uf": np.tile([m.uf for m in muns], d), "risk_score": rng.random(rows),
+        "focos": rng.poisson(0.5, rows).astype(float), "focos_3d_100k": rng.gamma(1, 3, rows),
+        "precip_sum": rng.exponential(2, rows), "hum_min": rng.uniform(10, 90, rows), "wind_max": rng.gamma(2, 4, rows),
+    })
+    dim = pd.DataFrame({"municipio_ibge": [m.codigo_ibge for m in muns],
+                        "lat": [m.lat for m in muns], "lon": [m.lon for m in muns]})
+    return risk, dim
+
+# ---------- referências ----------
+def brute_nearest(latest, lat, lon, k):
+    d = hot_index.haversine_km(lat, lon, latest["lat"], latest["lon"])
+    o = np.argsort(d, kind="stable")[:k]
+    return latest["municipio_ibge"][o], d[o]
+
+def brute_within(latest, lat, lon, km):
+    d = hot_index.haversine_km(lat, lon, latest["lat"], latest["lon"])
+    ok = np.flatnonzero(d <= km)
+    return latest["municipio_ibge"][ok[np.argsort(d[ok], kind="stable")]]
+
+def brute_above(latest, t):
+    return latest[latest["risk_score"] >= t]
+
+def pandas_above(risk_file: Path, dim_file: Path, t: float) -> pd.DataFrame:
+    """Status quo do polling: relê o parquet, pega o último dia por município e junta a dim."""
+    df = pd.read_parquet(risk_file)
+    df = df.sort_values(["municipio_ibge", "date"]).drop_duplicates("municipio_ibge", keep="last")
+    df = df.merge(pd.read_parquet(dim_file), on="municipio_ibge", how="left")
+    return df[df["risk_score"] >= t]
+
+def _lat_us(fn, args_list) -> list[float]:
+    out = []
+    for a in args_list:
+        t0 = time.perf_counter()
+        fn(*a)
+        out.append((time.perf_counter() - t0) * 1e6)
+    return out
+
+def _record(case, params, lat, label):
+    p50, p99 = percentile(lat, 0.5), percentile(lat, 0.99)
+    record("hot_index", case, params, {"p50_us": round(p50, 2), "p99_us": round(p99, 2), "units": len(lat),
+                                       "peak_rss_mb": round(peak_rss_mb(), 1)}, label=label)
+    print(f"[bench] hot_index {case:<22} p50={p50:10.1f}µs p99={p99:10.1f}µs")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Índice quente: publish/load/nearest/within/above.")
+    ap.add_argument("--municipios", type=int, default=5570)
+    ap.add_argument("--days", type=int, default=30)
+    ap.add_argument("--repeat", type=int, default=1000)
+    ap.add_argument("--cell-deg", type=float, default=hot_index.CELL_DEG)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--label", default="")
+    args = ap.parse_args(argv)
+    hot_index.CELL_DEG = args.cell_deg
+
+    with tempfile.TemporaryDirectory(prefix="bench-hot-") as tmp:
+        tmp = Path(tmp)
+        muns = fixtures.make_municipios(args.municipios, seed=args.seed)
+        risk, dim = build_frames(muns, args.days, date(2025, 10, 14), args.seed)
+        params = {"municipios": args.municipios, "days": args.days, "repeat": args.repeat,
+                  "cell_deg": args.cell_deg, "risk_rows": len(risk)}
+
+        t0 = time.perf_counter()
+        hot_index.publish(risk, dim, root=tmp / "hot")
+        print(f"[bench] hot_index publish: {time.perf_counter() - t0:.3f}s ({len(risk)} linhas de risco)")
+
+        loads = []
+        for _ in range(20):
+            hot_index._loaded.clear()
+            t0 = time.perf_counter()
+            idx = hot_index.load(tmp / "hot")
+            loads.append((time.perf_counter() - t0) * 1e6)
+        _record("load-mmap", params, loads, args.label)
+
+        rng = random.Random(args.seed)
+        pts = [(rng.uniform(*fixtures.LAT_RANGE), rng.uniform(*fixtures.LON_RANGE)) for _ in range(args.repeat)]
+        latest = np.asarray(idx.latest)
+
+        # conferência contra a força bruta
+        for lat, lon in pts[:200]:
+            codes, d = brute_nearest(latest, lat, lon, 10)
+            rows, km = idx.nearest(lat, lon, k=10)
+            assert np.allclose(km, d), (lat, lon, km, d)
+            assert set(brute_within(latest, lat, lon, 150)) == set(idx.within(lat, lon, 150)[0]["municipio_ibge"])
+        for t in (0.5, 0.9, 0.99):
+            assert set(brute_above(latest, t)["municipio_ibge"]) == set(idx.above(t)["municipio_ibge"])
+
+        cases = [
+            ("nearest-k1", lambda la, lo: idx.nearest(la, lo, k=1), lambda la, lo: brute_nearest(latest, la, lo, 1)),
+            ("nearest-k10", lambda la, lo: idx.nearest(la, lo, k=10), lambda la, lo: brute_nearest(latest, la, lo, 10)),
+            ("within-50km", lambda la, lo: idx.within(la, lo, 50), lambda la, lo: brute_within(latest, la, lo, 50)),
+            ("within-200km", lambda la, lo: idx.within(la, lo, 200), lambda la, lo: brute_within(latest, la, lo, 200)),
+        ]
+        for name, fn, brute in cases:
+            _record(f"{name}-grid", params, _lat_us(fn, pts), args.label)
+            _record(f"{name}-brute", params, _lat_us(brute, pts), args.label)
+
+        thr = [(rng.uniform(0.8, 1.0),) for _ in range(args.repeat)]
+        _record("above-index", params, _lat_us(lambda t: idx.above(t), thr), args.label)
+        _record("above-index-uf", params, _lat_us(lambda t: idx.above(t, uf="MT"), thr), args.label)
+        _record("above-brute", params, _lat_us(lambda t: brute_above(latest, t), thr), args.label)
+
+        # status quo: relê parquet + dim a cada polling (poucas repetições)
+        risk_file, dim_file = tmp / "fact_risk_daily.parquet", tmp / "dim_municipio.parquet"
+        risk.to_parquet(risk_file, index=False)
+        dim.to_parquet(dim_file, index=False)
+        _record("above-pandas-parquet", params, _lat_us(lambda t: pandas_above(risk_file, dim_file, t), thr[:10]),
+                args.label)
+
+if __name__ == "__main__":
+    main()
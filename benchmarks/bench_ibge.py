@@ -0,0 +1,177 @@
+# benchmarks/bench_ibge.py
+"""
+Normalização dos CSVs do IBGE: versão linha a linha (apply/map, engine python
+com sep=None) x vetorizada (etl/common/ibge.py). O CSV de municípios é
+replicado N vezes para simular tabelas distritais/históricas, e as saídas das
+duas versões são comparadas antes de medir.
+
+Uso:
+    python -m benchmarks.bench_ibge                         # fixtures sintéticas, 100x
+    python -m benchmarks.bench_ibge --replicate 100 --raw data/ref/municipios_raw.csv \\
+        --coords data/ref/coords_municipios.csv --repeat 3
+"""
+import argparse, re, tempfile, time
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks import fixtures
+from benchmarks.common import peak_rss_mb, record
+from etl.common import ibge
+from etl.common.import_municipios import build_municipios
+from etl.ibge.load_coords_csv import _parse_coords
+from etl.ibge.load_ref_municipios import _parse_csv
+
+# ---------- versões linha a linha (referência) ----------
+def _legacy_read_csv_any(path):
+    for enc in ("utf-8-sig", "utf-8", "latin1"):
+        try:
+            return pd.read_csv(path, sep=None, engine="python", encoding=enc, dtype=str)
+        except Exception:
+            pass
+    return pd.read_csv(path, dtype=str)
+
+def _legacy_to_int_safe(x):
+    if pd.isna(x): return None
+    s = re.sub(r"\D", "", str(x))
+    return int(s) if s else None
+
+def _legacy_to_pop_int(x):
+    if pd.isna(x): return 0
+    s = str(x).strip().replace(".", "").replace(",", ".")
+    try: return int(float(s))
+    except Exception: return 0
+
+def legacy_parse_ref(path):
+    from etl.ibge import load_ref_municipios as m
+    df = _legacy_read_csv_any(path)
+    df = df.rename(columns={c: ibge.norm_col(c) for c in df.columns})
+    col_id, col_name = ibge.pick_col(df, m.CAND_MUN_ID), ibge.pick_col(df, m.CAND_MUN_NAME)
+    col_uf, col_uf_code = ibge.pick_col(df, m.CAND_UF), ibge.pick_col(df, m.CAND_UF_CODE)
+    col_pop = ibge.pick_col(df, m.CAND_POP)
+    col_lat, col_lon = ibge.pick_col(df, m.CAND_LAT), ibge.pick_col(df, m.CAND_LON)
+    col_area = ibge.pick_col(df, m.CAND_AREA)
+    ids = df[col_id].apply(_legacy_to_int_safe)
+    if col_uf_code is not None:
+        lengths = ids.dropna().astype(int).astype(str).str.len()
+        if not lengths.empty and (lengths.median() <= 5 or lengths.max() <= 6):
+            uf_code = df[col_uf_code].apply(_legacy_to_int_safe).fillna(0).astype(int)
+            ids = (uf_code * 100000 + ids.fillna(0).astype(int)).astype(int)
+    n = len(df)
+    out = pd.DataFrame({
+        "codigo_ibge": ids.astype("Int64"),
+        "municipio": df[col_name].astype(str).str.strip(),
+        "uf_sigla": df[col_uf].astype(str).str.upper().str.strip() if col_uf else pd.Series([None] * n),
+        "populacao": df[col_pop].apply(_legacy_to_pop_int).astype(int) if col_pop else pd.Series([0] * n, dtype=int),
+        "lat": pd.to_numeric(df[col_lat], errors="coerce") if col_lat else pd.Series([None] * n),
+        "lon": pd.to_numeric(df[col_lon], errors="coerce") if col_lon else pd.Series([None] * n),
+        "area_km2": pd.to_numeric(df[col_area], errors="coerce") if col_area else pd.Series([None] * n),
+    })
+    out = out.dropna(subset=["codigo_ibge"])
+    out["codigo_ibge"] = out["codigo_ibge"].astype(int)
+    return out.drop_duplicates(subset=["codigo_ibge"], keep="last")
+
+def legacy_parse_coords(path):
+    from etl.ibge import load_coords_csv as m
+    df = _legacy_read_csv_any(path)
+    df = df.rename(columns={c: ibge.norm_col(c) for c in df.columns})
+    id_col, lat_col, lon_col = (ibge.pick_col(df, m.CAND_ID), ibge.pick_col(df, m.CAND_LAT),
+                                ibge.pick_col(df, m.CAND_LON))
+    out = pd.DataFrame({
+        "codigo_ibge": df[id_col].map(_legacy_to_int_safe),
+        "lat": pd.to_numeric(df[lat_col], errors="coerce"),
+        "lon": pd.to_numeric(df[lon_col], errors="coerce"),
+    })
+    out = out.dropna(subset=["codigo_ibge", "lat", "lon"])
+    out["codigo_ibge"] = out["codigo_ibge"].astype(int)
+    out = out[(out["lat"].between(-90, 90)) & (out["lon"].between(-180, 180))]
+    return out.drop_duplicates(subset=["codigo_ibge"], keep="last")
+
+def legacy_build_municipios(path):
+    df = pd.read_csv(path, sep=",", dtype=str)
+    df = df.rename(columns={c: ibge.norm_col(c) for c in df.columns})
+    def to_int(s):
+        s = re.sub(r"\D", "", (s or "").strip())
+        return int(s) if s else 0
+    df["cod_uf_int"] = df["cod_uf"].apply(to_int)
+    df["mun5_int"] = df["codigo_ibge"].apply(to_int)
+    full = df.apply(lambda r: int(f"{r['cod_uf_int']:02d}{r['mun5_int']:05d}"), axis=1)
+    return pd.DataFrame({
+        "codigo_ibge": full.astype(int),
+        "municipio": df["nome_municipio"].astype(str).str.strip(),
+        "uf_sigla": df["uf_sigla"].astype(str).str.upper().str.strip(),
+        "populacao": df["populacao_estimada"].apply(_legacy_to_pop_int).astype(int),
+    })
+
+# ---------- medição ----------
+def _replicate(src: Path, dst: Path, times: int):
+    """Repete as linhas de dados `times` vezes (cabeçalho uma vez)."""
+    lines = src.read_bytes().splitlines(keepends=True)
+    header, body = lines[0], lines[1:]
+    if body and not body[-1].endswith(b"\n"):
+        body[-1] += b"\n"
+    dst.write_bytes(header + b"".join(body) * times)
+
+def _best(fn, path, repeat: int):
+    best, out = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(str(path))
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best, out
+
+CASES = {
+    "ref":     ("raw", legacy_parse_ref, _parse_csv),
+    "coords":  ("coords", legacy_parse_coords, _parse_coords),
+    "import":  ("raw", legacy_build_municipios, build_municipios),
+}
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="IBGE: normalização linha a linha x vetorizada.")
+    ap.add_argument("--raw", default=None, help="CSV bruto de municípios (default: fixture sintética)")
+    ap.add_argument("--coords", default=None, help="CSV de coordenadas (default: fixture sintética)")
+    ap.add_argument("--municipios", type=int, default=5570)
+    ap.add_argument("--replicate", type=int, default=100)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--cases", default=",".join(CASES))
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--label", default="")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="bench-ibge-") as tmp:
+        tmp = Path(tmp)
+        muns = fixtures.make_municipios(args.municipios, seed=args.seed)
+        src = {
+            "raw": Path(args.raw) if args.raw else tmp / "municipios_raw.src.csv",
+            "coords": Path(args.coords) if args.coords else tmp / "coords.src.csv",
+        }
+        if not args.raw:
+            src["raw"].write_bytes(fixtures.municipios_raw_csv(muns))
+        if not args.coords:
+            src["coords"].write_bytes(fixtures.coords_csv(muns))
+        files = {}
+        for k, p in src.items():
+            files[k] = tmp / f"{k}_x{args.replicate}.csv"
+            _replicate(p, files[k], args.replicate)
+
+        for case in [c.strip() for c in args.cases.split(",") if c.strip()]:
+            kind, old_fn, new_fn = CASES[case]
+            path = files[kind]
+            t_old, out_old = _best(old_fn, path, args.repeat)
+            t_new, out_new = _best(new_fn, path, args.repeat)
+            pd.testing.assert_frame_equal(out_old.reset_index(drop=True), out_new.reset_index(drop=True),
+                                          check_dtype=False)
+            rows = sum(1 for _ in open(path, "rb")) - 1
+            params = {"replicate": args.replicate, "rows": rows, "repeat": args.repeat,
+                      "source": str(src[kind])}
+            for impl, t in (("rowwise", t_old), ("vectorized", t_new)):
+                record("ibge_normalize", f"{case}-{impl}", params,
+                       {"elapsed_s": round(t, 4), "units": rows,
+                        "throughput_per_s": round(rows / t, 2) if t > 0 else None,
+                        "peak_rss_mb": round(peak_rss_mb(), 1)}, label=args.label)
+            print(f"[bench] ibge {case}: {rows} linhas | linha a linha {t_old:.3f}s | "
+                  f"vetorizado {t_new:.3f}s | {t_old / t_new:.1f}x | saídas idênticas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# benchmarks/bench_journal.py
+"""
+Custo do diário de progresso (etl/common/journal.py) nos laços que ele
+instrumenta, sem Mongo nem rede:
+
+- complete: N unidades concluídas por T threads (como as cidades do clima),
+            unidades/s e µs por unidade — a comparar com o HTTP de uma cidade;
+- resume:   reabrir a execução inacabada com N unidades (open_run com resume)
+            e checar done() para todas, como o laço da retomada faz.
+
+Grava em benchmarks/results/results.jsonl.
+
+Uso:
+    python -m benchmarks.bench_journal
+    python -m benchmarks.bench_journal --units 20000 --threads 12
+"""
+import argparse, tempfile, time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from benchmarks.common import peak_rss_mb, record
+from etl.common import journal
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Diário de progresso: custo por unidade e da retomada.")
+    ap.add_argument("--units", type=int, default=5000)
+    ap.add_argument("--threads", type=int, default=6)
+    ap.add_argument("--label", default="")
+    args = ap.parse_args(argv)
+
+    end = datetime(2025, 10, 14, tzinfo=timezone.utc)
+    params = {"start": end - timedelta(days=7), "end": end}
+    units = [f"city:{1100000 + i}:2025100700-2025101400" for i in range(args.units)]
+    bparams = {"units": args.units, "threads": args.threads}
+
+    with tempfile.TemporaryDirectory(prefix="bench-journal-") as tmp:
+        path = Path(tmp) / "journal.sqlite"
+        jr = journal.open_run("weather", params, path=path)
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            list(pool.map(lambda u: jr.complete(u, hours=168), units))
+        el = time.perf_counter() - t0
+        jr.close()
+        record("journal", "complete", bparams, {"seconds": round(el, 3), "units_per_s": round(args.units / el),
+               "us_per_unit": round(el / args.units * 1e6, 1), "db_kb": round(path.stat().st_size / 1024, 1),
+               "peak_rss_mb": round(peak_rss_mb(), 1)}, label=args.label)
+        print(f"[bench] journal complete: {args.units} unidades em {el:.2f}s "
+              f"({args.units / el:,.0f}/s, {el / args.units * 1e6:.0f} µs/unidade)")
+
+        t0 = time.perf_counter()
+        jr = journal.open_run("weather", params, resume=True, path=path)
+        t_open = time.perf_counter() - t0
+        skipped = sum(jr.done(u) for u in units)
+        el = time.perf_counter() - t0
+        assert skipped == args.units and jr.resumed, skipped
+        jr.finish()
+        record("journal", "resume", bparams, {"open_s": round(t_open, 4), "seconds": round(el, 4),
+               "peak_rss_mb": round(peak_rss_mb(), 1)}, label=args.label)
+        print(f"[bench] journal resume: open={t_open * 1000:.1f}ms, {skipped} unidades puladas em {el * 1000:.1f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# benchmarks/bench_query.py
+"""
+Latência das consultas do drilldown (etl/gold/query.py) sobre um gold
+sintético (fixtures.make_municipios x N dias, partições uf/year/month):
+
+- full:  status quo, lê o arquivo único data/gold/fact_*.parquet inteiro e
+         filtra no pandas;
+- cold:  etl.gold.query sem cache (poda de partições + projeção + filtro);
+- warm:  mesma consulta repetida (cache LRU).
+
+Cada consulta roda `--repeat` vezes com municípios/UFs sorteados (seed fixa);
+grava p50/p99 em benchmarks/results/results.jsonl.
+
+Uso:
+    python -m benchmarks.bench_query                       # 5570 municípios x 180 dias
+    python -m benchmarks.bench_query --days 365 --repeat 50 --queries risk_series,drilldown
+"""
+import argparse, random, tempfile, time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import fixtures
+from benchmarks.common import peak_rss_mb, percentile, record
+from etl.gold import export_parquet as ex
+from etl.gold import query
+
+# ---------- gold sintético ----------
+def build_gold(root: Path, muns, days: int, end: date, seed: int):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end - timedelta(days=days - 1), end).date
+    codes = np.array([m.codigo_ibge for m in muns], dtype="int64")
+    ufs = np.array([m.uf for m in muns], dtype=object)
+    n, d = len(muns), len(dates)
+    base = pd.DataFrame({
+        "date": np.repeat(dates, n), "municipio_ibge": np.tile(codes, d), "uf": np.tile(ufs, d),
+    })
+    base["year"] = pd.to_datetime(base["date"]).dt.year
+    base["month"] = pd.to_datetime(base["date"]).dt.month
+    rows = len(base)
+    focos = rng.poisson(0.6, rows) * (rng.random(rows) < 0.3)
+    fires = base.assign(focos=focos, p95_conf=rng.uniform(0, 100, rows))
+    fires = fires[fires["focos"] > 0][["date", "municipio_ibge", "uf", "focos", "p95_conf", "year", "month"]]
+    risk = base.assign(
+        temp_mean=rng.normal(25, 4, rows), hum_min=rng.uniform(10, 90, rows), wind_max=rng.gamma(2, 4, rows),
+        gust_max=rng.gamma(2, 6, rows), cloud_mean=rng.uniform(0, 100, rows), precip_sum=rng.exponential(2, rows),
+        focos=focos.astype(float), focos_3d=focos * 2.0, focos_3d_100k=focos * 3.5, risk_score=rng.random(rows),
+    )[ex.RISK_COLUMNS]
+
+    ex.PARQUET_ROOT = str(root)
+    ex._write_partitioned(fires, root / "fact_fires_daily", ["uf", "year", "month"])
+    ex._write_partitioned(risk, root / "fact_risk_daily", ["uf", "year", "month"])
+    ex._write_single(fires.sort_values(["uf", "date", "municipio_ibge"]), root / "fact_fires_daily.parquet")
+    ex._write_single(risk.sort_values(["uf", "date", "municipio_ibge"]), root / "fact_risk_daily.parquet")
+    dim = pd.DataFrame({
+        "municipio_ibge": codes, "municipio": [m.nome for m in muns], "uf": ufs,
+        "populacao": [m.populacao for m in muns], "lat": [m.lat for m in muns], "lon": [m.lon for m in muns],
+        "area_km2": np.nan,
+    })
+    ex.write_dim(dim)
+    return len(fires), len(risk)
+
+# ---------- status quo: arquivo único inteiro + pandas ----------
+def _full(root: Path, dataset: str) -> pd.DataFrame:
+    return pd.read_parquet(root / f"{dataset}.parquet")
+
+def _names(root: Path) -> pd.Series:
+    return pd.read_parquet(root / "dim_municipio.parquet").set_index("municipio_ibge")["municipio"]
+
+def full_risk_series(root, a):
+    df = _full(root, "fact_risk_daily")
+    df = df[(df["municipio_ibge"] == a["mun"]) & (df["date"] >= a["start"]) & (df["date"] <= a["end"])]
+    return df.sort_values("date")
+
+def full_top_municipios(root, a):
+    df = _full(root, "fact_risk_daily")
+    df = df[(df["uf"] == a["uf"]) & (df["date"] == a["end"])]
+    return df.sort_values("focos_3d_100k", ascending=False).head(50)
+
+def full_top_fires(root, a):
+    df = _full(root, "fact_fires_daily")
+    df = df[(df["uf"] == a["uf"]) & (df["date"] >= a["start"]) & (df["date"] <= a["end"])]
+    df = df.groupby("municipio_ibge", as_index=False)["focos"].sum().nlargest(10, "focos")
+    return df.assign(municipio=df["municipio_ibge"].map(_names(root)))
+
+def full_fires_map(root, a):
+    df = _full(root, "fact_fires_daily")
+    df = df[(df["uf"] == a["uf"]) & (df["date"] >= a["start"]) & (df["date"] <= a["end"])]
+    return df.groupby("municipio_ibge", as_index=False)["focos"].sum()
+
+def full_drilldown(root, a):
+    df = _full(root, "fact_risk_daily")
+    df = df[(df["uf"] == a["uf"]) & (df["date"] >= a["dd_start"]) & (df["date"] <= a["end"])]
+    return df.assign(municipio=df["municipio_ibge"].map(_names(root)))
+
+QUERIES = {
+    "risk_series":    (lambda a: query.risk_series(a["mun"], days=30, end=a["end"]), full_risk_series),
+    "top_municipios": (lambda a: query.top_municipios(a["uf"], day=a["end"], n=50), full_top_municipios),
+    "top_fires":      (lambda a: query.top_fires(a["uf"], days=30, end=a["end"]), full_top_fires),
+    "fires_map":      (lambda a: query.fires_map(a["uf"], start=a["start"], end=a["end"]), full_fires_map),
+    "drilldown":      (lambda a: query.drilldown(a["uf"], start=a["dd_start"], end=a["end"]),
+                       full_drilldown),
+}
+
+def _timed(fn, args_list) -> tuple[list[float], list]:
+    lat, outs = [], []
+    for a in args_list:
+        t0 = time.perf_counter()
+        outs.append(fn(a))
+        lat.append(time.perf_counter() - t0)
+    return lat, outs
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Latência das consultas do gold: arquivo único x query.py (frio/cache).")
+    ap.add_argument("--municipios", type=int, default=5570)
+    ap.add_argument("--days", type=int, default=180)
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--queries", default=",".join(QUERIES))
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--label", default="")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="bench-query-") as tmp:
+        root = Path(tmp)
+        muns = fixtures.make_municipios(args.municipios, seed=args.seed)
+        end = date(2025, 10, 14)
+        t0 = time.perf_counter()
+        fires_rows, risk_rows = build_gold(root, muns, args.days, end, args.seed)
+        print(f"[bench] gold sintético: focos={fires_rows} risco={risk_rows} linhas ({time.perf_counter() - t0:.1f}s)")
+        query.GOLD_ROOT = root
+
+        rng = random.Random(args.seed)
+        # janelas do relatório: 30 dias (top/mapa/série) e 12 dias (tabela do drilldown)
+        args_list = [{"mun": m.codigo_ibge, "uf": m.uf, "end": end, "start": end - timedelta(days=29),
+                      "dd_start": end - timedelta(days=11)}
+                     for m in (rng.choice(muns) for _ in range(args.repeat))]
+        params = {"municipios": args.municipios, "days": args.days, "repeat": args.repeat,
+                  "fires_rows": fires_rows, "risk_rows": risk_rows}
+
+        for name in [q.strip() for q in args.queries.split(",") if q.strip()]:
+            lib_fn, full_fn = QUERIES[name]
+            lat_full, out_full = _timed(lambda a: full_fn(root, a), args_list)
+            lat_cold = []
+            for a in args_list:
+                query.clear_cache()
+                lat, out_cold = _timed(lib_fn, [a])
+                lat_cold += lat
+            _timed(lib_fn, args_list)                      # preenche o cache com todos os argumentos
+            lat_warm, out_warm = _timed(lib_fn, args_list)
+            # sanidade: mesmo número de linhas que o caminho antigo
+            for o_full, o_warm in zip(out_full, out_warm):
+                assert len(o_full) == len(o_warm), (name, len(o_full), len(o_warm))
+
+            summary = []
+            for impl, lat in (("full", lat_full), ("cold", lat_cold), ("warm", lat_warm)):
+                p50, p99 = percentile(lat, 0.5), percentile(lat, 0.99)
+                record("gold_query", f"{name}-{impl}", params,
+                       {"p50_ms": round(p50 * 1000, 3), "p99_ms": round(p99 * 1000, 3), "units": len(lat),
+                        "peak_rss_mb": round(peak_rss_mb(), 1)}, label=args.label)
+                summary.append(f"{impl} p50={p50 * 1000:.2f}ms p99={p99 * 1000:.2f}ms")
+            print(f"[bench] query {name}: " + " | ".join(summary))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/bench_weather_buckets.py
+"""
+Clima horário (raw_weather + dedup_weather_mun_ts) x buckets por município-dia
+(weather_buckets, WEATHER_STORAGE=bucket) sobre payloads Open-Meteo sintéticos
+(fixtures.open_meteo_payload) de N municípios x D dias:
+
+- insert:  fetch_weather.store_hourly nos dois modos (horas/s); uma 2ª passada
+           na mesma janela mede a regravação (dedup x upsert idempotente);
+- storage: collStats (storageSize + totalIndexSize) de cada modo;
+- gold:    build_weather_daily na janela inteira nos dois modos, com
+           conferência de que as estatísticas diárias são iguais.
+
+Precisa de mongod (como o harness). Grava em benchmarks/results/results.jsonl.
+
+Uso:
+    python -m benchmarks.bench_weather_buckets --municipios 1000 --days 30
+    python -m benchmarks.bench_weather_buckets --mongo-uri mongodb://localhost:27017/fires_bench
+"""
+import argparse, os, time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from benchmarks import fixtures
+from benchmarks.common import mongo_for_bench, peak_rss_mb, prepare_db, record
+from etl.gold import export_parquet as ex
+from etl.weather import buckets
+from etl.weather.fetch_weather import DEFAULT_HOURLY, store_hourly
+
+STATS = ["temp_mean", "hum_min", "wind_max", "gust_max", "cloud_mean", "precip_sum", "dew_mean"]
+MODE_COLLECTIONS = {"hourly": ("raw_weather", "dedup_weather_mun_ts"), "bucket": (buckets.COLLECTION,)}
+
+def _storage_mb(db, mode: str) -> dict:
+    out = {"storage_mb": 0.0, "index_mb": 0.0}
+    for name in MODE_COLLECTIONS[mode]:
+        st = db.command("collStats", name)
+        out["storage_mb"] += st.get("storageSize", 0) / 2**20
+        out["index_mb"] += st.get("totalIndexSize", 0) / 2**20
+    return {k: round(v, 2) for k, v in out.items()}
+
+def _insert(db, muns, payloads, mode: str) -> tuple[float, int]:
+    t0 = time.perf_counter()
+    hours = sum(store_hourly(db, m.codigo_ibge, m.uf, m.lat, m.lon, p["hourly"], storage=mode)
+                for m, p in zip(muns, payloads))
+    return time.perf_counter() - t0, hours
+
+def _gold(db, mode: str, start, end):
+    os.environ["WEATHER_STORAGE"] = mode
+    t0 = time.perf_counter()
+    df = ex.build_weather_daily(None, db=db, start=start, end=end)
+    return time.perf_counter() - t0, df.sort_values(["date", "municipio_ibge"]).reset_index(drop=True)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Clima: doc por hora x bucket por município-dia.")
+    ap.add_argument("--municipios", type=int, default=1000)
+    ap.add_argument("--days", type=int, default=30)
+    ap.add_argument("--seed", type=int, default=11)
+    ap.add_argument("--mongo-uri", default=None)
+    ap.add_argument("--mongod", default=None)
+    ap.add_argument("--label", default="")
+    args = ap.parse_args(argv)
+
+    end = datetime(2025, 10, 14, tzinfo=timezone.utc)
+    start = end - timedelta(days=args.days)
+    muns = fixtures.make_municipios(args.municipios, seed=args.seed)
+    # open_meteo_payload gera dias inteiros até o dia de `end`, inclusive: corta em end - 1h
+    payloads = [fixtures.open_meteo_payload(m.lat, m.lon, start, end - timedelta(hours=1), DEFAULT_HOURLY,
+                                            seed=args.seed) for m in muns]
+    params = {"municipios": args.municipios, "days": args.days,
+              "hours": sum(len(p["hourly"]["time"]) for p in payloads)}
+
+    from pymongo import MongoClient
+    prev = os.environ.get("WEATHER_STORAGE")
+    with mongo_for_bench(args.mongo_uri, args.mongod) as uri:
+        cli = MongoClient(uri)
+        db = cli.get_database()
+        prepare_db(db)
+        try:
+            frames = {}
+            for mode in buckets.MODES:
+                first, hours = _insert(db, muns, payloads, mode)
+                again, _ = _insert(db, muns, payloads, mode)
+                db.command("fsync")
+                size = _storage_mb(db, mode)
+                gold_s, frames[mode] = _gold(db, mode, start, end)
+                record("weather_storage", mode, params,
+                       {"insert_s": round(first, 3), "hours_per_s": round(hours / first, 1),
+                        "rewrite_s": round(again, 3), "gold_s": round(gold_s, 3), "gold_rows": len(frames[mode]),
+                        **size, "peak_rss_mb": round(peak_rss_mb(), 1)}, label=args.label)
+                print(f"[bench] weather {mode:<6} insert={first:7.2f}s ({hours / first:9.0f} h/s) "
+                      f"regravação={again:7.2f}s storage={size['storage_mb']:8.2f}MB "
+                      f"índices={size['index_mb']:7.2f}MB gold={gold_s:6.2f}s ({len(frames[mode])} linhas)")
+        finally:
+            cli.close()
+            if prev is None:
+                os.environ.pop("WEATHER_STORAGE", None)
+            else:
+                os.environ["WEATHER_STORAGE"] = prev
+
+    a, b = frames["hourly"], frames["bucket"]
+    assert a[["date", "municipio_ibge"]].equals(b[["date", "municipio_ibge"]]), (len(a), len(b))
+    for c in STATS:
+        assert np.allclose(a[c].astype(float), b[c].astype(float), atol=1e-9, equal_nan=True), c
+    print("[bench] weather: gold diário idêntico nos dois modos")
+
+if __name__ == "__main__":
+    main()
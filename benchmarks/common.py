@@ -0,0 +1,130 @@
+# benchmarks/common.py
+"""
+Utilitários compartilhados pelos benchmarks: mongod local descartável,
+preparo das coleções (espelha docker/mongo/mongo-init.js), pico de RSS,
+percentis e gravação de resultados em benchmarks/results/results.jsonl.
+"""
+import json, os, resource, shutil, socket, subprocess, tempfile, time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_FILE = REPO_ROOT / "benchmarks" / "results" / "results.jsonl"
+
+# ---------- git / ambiente ----------
+def git_rev() -> dict:
+    def _git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=REPO_ROOT, capture_output=True, text=True,
+                                  timeout=30).stdout.strip()
+        except Exception:
+            return ""
+    return {"commit": _git("rev-parse", "--short", "HEAD") or "unknown",
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no"))}
+
+def peak_rss_mb() -> float:
+    """Pico de RSS do processo atual (ru_maxrss é KiB no Linux, bytes no macOS)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if os.uname().sysname == "Darwin" else rss / 1024
+
+def percentile(values, q: float):
+    if not values:
+        return None
+    vals = sorted(values)
+    idx = min(len(vals) - 1, max(0, int(round(q * (len(vals) - 1)))))
+    return vals[idx]
+
+def record(bench: str, case: str, params: dict, result: dict, label: str = "",
+           path: Path = RESULTS_FILE) -> dict:
+    """Acrescenta um resultado (uma linha JSON) ao histórico comparável entre commits."""
+    rec = {"ts": datetime.now(timezone.utc).isoformat(), **git_rev(), "label": label,
+           "bench": bench, "case": case, "params": params, **result}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(rec, ensure_ascii=False, default=str) + "\n")
+    return rec
+
+def load_results(path: Path = RESULTS_FILE) -> list[dict]:
+    if not path.exists():
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+# ---------- Mongo ----------
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+@contextmanager
+def local_mongod(mongod: str | None = None, db_name: str = "fires_bench"):
+    """
+    Sobe um mongod descartável (dbpath temporário, porta livre) e entrega a URI.
+    Requer o binário `mongod` no PATH (ou caminho explícito).
+    """
+    binary = mongod or shutil.which("mongod")
+    if not binary:
+        raise RuntimeError("mongod não encontrado; use --mongo-uri ou --mongod PATH")
+    dbpath = tempfile.mkdtemp(prefix="bench-mongod-")
+    port = _free_port()
+    proc = subprocess.Popen(
+        [binary, "--dbpath", dbpath, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    uri = f"mongodb://127.0.0.1:{port}/{db_name}"
+    try:
+        from pymongo import MongoClient
+        deadline = time.time() + 30
+        while True:
+            try:
+                MongoClient(uri, serverSelectionTimeoutMS=500).admin.command("ping")
+                break
+            except Exception:
+                if time.time() > deadline or proc.poll() is not None:
+                    raise RuntimeError("mongod não subiu")
+                time.sleep(0.2)
+        yield uri
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        shutil.rmtree(dbpath, ignore_errors=True)
+
+@contextmanager
+def mongo_for_bench(mongo_uri: str | None = None, mongod: str | None = None):
+    """URI explícita (DB deve começar com 'bench' ou terminar em '_bench') ou mongod local."""
+    if mongo_uri:
+        from pymongo.uri_parser import parse_uri
+        name = parse_uri(mongo_uri).get("database") or ""
+        if not (name.startswith("bench") or name.endswith("_bench")):
+            raise SystemExit(f"Recusando usar o DB '{name}': os benchmarks apagam coleções. "
+                             "Use um DB de nome bench* / *_bench.")
+        yield mongo_uri
+    else:
+        with local_mongod(mongod) as uri:
+            yield uri
+
+def prepare_db(db, drop: bool = True):
+    """Recria as coleções como em docker/mongo/mongo-init.js + índices únicos de dedup."""
+    from etl.weather import buckets
+    names = ["raw_fires", "raw_weather", "ref_municipios", "dedup_fires_extid", "dedup_weather_mun_ts",
+             buckets.COLLECTION]
+    if drop:
+        for n in names:
+            db.drop_collection(n)
+    existing = set(db.list_collection_names())
+    for n in ("raw_fires", "raw_weather"):
+        if n not in existing:
+            db.create_collection(n, timeseries={"timeField": "ts", "metaField": "meta", "granularity": "hours"})
+    db.raw_fires.create_index([("meta.uf", 1), ("ts", -1)])
+    db.raw_fires.create_index([("ts", -1)])
+    db.raw_weather.create_index([("meta.municipio_ibge", 1), ("ts", -1)])
+    db.raw_weather.create_index([("meta.uf", 1), ("ts", -1)])
+    db.raw_weather.create_index([("ts", -1)])
+    db.ref_municipios.create_index([("codigo_ibge", 1)], unique=True)
+    db.dedup_fires_extid.create_index([("ext_id", 1)], unique=True)
+    db.dedup_weather_mun_ts.create_index([("municipio_ibge", 1), ("ts", 1)], unique=True)
+    buckets.ensure_indexes(db)
@@ -0,0 +1,163 @@
+# benchmarks/fixtures.py
+"""
+Geradores determinísticos (seed fixa) de dados no formato das fontes reais:
+- IBGE: municipios_raw.csv (layout bruto) e coords_municipios.csv
+- INPE: CSV de focos com variações de cabeçalho tiradas de COL_MAP e encodings
+- Open-Meteo: JSON de /v1/forecast (bloco "hourly")
+
+Nada aqui acessa rede ou Mongo; o mesmo (seed, parâmetros) gera os mesmos bytes.
+"""
+import csv, io, random
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from etl.inpe.fetch_fires import COL_MAP, UF_ID2SIGLA, UF_NOME2SIGLA
+
+# bounding box aproximada do Brasil
+LAT_RANGE = (-33.7, 5.2)
+LON_RANGE = (-73.9, -34.8)
+
+BIOMAS = ["Amazônia", "Cerrado", "Caatinga", "Mata Atlântica", "Pampa", "Pantanal"]
+SATELITES = ["AQUA_M-T", "NPP-375", "NOAA-20", "GOES-16", "TERRA_M-T"]
+NAME_PARTS = ["São", "Santa", "Nova", "Água", "Jardim", "Conceição", "Boa Vista", "Itá", "Paraná", "Goiás"]
+
+@dataclass
+class Municipio:
+    codigo_ibge: int
+    nome: str
+    uf_id: int
+    uf: str
+    populacao: int
+    lat: float
+    lon: float
+
+def make_municipios(n: int = 5570, seed: int = 42) -> list[Municipio]:
+    """Tabela sintética de municípios com códigos IBGE de 7 dígitos (UF + 5)."""
+    rng = random.Random(seed)
+    uf_ids = sorted(UF_ID2SIGLA)
+    out = []
+    for i in range(n):
+        uf_id = uf_ids[i % len(uf_ids)]
+        mun5 = (i // len(uf_ids) + 1) * 10 + rng.randrange(10)
+        name = f"{rng.choice(NAME_PARTS)} {rng.choice(NAME_PARTS)} {i:05d}"
+        out.append(Municipio(
+            codigo_ibge=uf_id * 100000 + mun5,
+            nome=name,
+            uf_id=uf_id,
+            uf=UF_ID2SIGLA[uf_id],
+            populacao=int(rng.lognormvariate(9.3, 1.1)) + 800,
+            lat=round(rng.uniform(*LAT_RANGE), 4),
+            lon=round(rng.uniform(*LON_RANGE), 4),
+        ))
+    return out
+
+def municipios_raw_csv(muns: list[Municipio], encoding: str = "utf-8-sig") -> bytes:
+    """Layout de data/ref/municipios_raw.csv (COD. UF + código de 5 dígitos, população '22.787')."""
+    buf = io.StringIO()
+    w = csv.writer(buf, lineterminator="\n")
+    w.writerow(["uf_sigla", "COD. UF", "codigo_ibge", "nome_municipio", "populacao_estimada "])
+    for m in muns:
+        pop = f"{m.populacao:,}".replace(",", ".")
+        w.writerow([m.uf, m.uf_id, f"{m.codigo_ibge % 100000:05d}", m.nome, pop])
+    return buf.getvalue().encode(encoding)
+
+def coords_csv(muns: list[Municipio], encoding: str = "utf-8") -> bytes:
+    """Layout de data/ref/coords_municipios.csv."""
+    buf = io.StringIO()
+    w = csv.writer(buf, lineterminator="\n")
+    w.writerow(["codigo_ibge", "nome", "latitude", "longitude", "capital", "codigo_uf"])
+    for m in muns:
+        w.writerow([m.codigo_ibge, m.nome, m.lat, m.lon, 0, m.uf_id])
+    return buf.getvalue().encode(encoding)
+
+# ---------- INPE ----------
+# ordem das colunas do CSV diário real do INPE
+INPE_FIELDS = ["ext_id", "lat", "lon", "datetime_utc", "sat", "municipio", "estado_nome",
+               "municipio_ibge", "estado_id", "bioma", "confianca"]
+
+def inpe_headers(variant: int = 0) -> list[str]:
+    """
+    Cabeçalho do CSV escolhendo, para cada campo lógico, uma das grafias aceitas
+    em COL_MAP (variant seleciona a grafia; variantes ímpares usam MAIÚSCULAS).
+    """
+    out = []
+    for field in INPE_FIELDS:
+        opts = sorted(COL_MAP[field])
+        name = opts[variant % len(opts)]
+        out.append(name.upper() if variant % 2 else name)
+    return out
+
+def inpe_csv(rows: int, muns: list[Municipio], base: datetime | None = None, days: int = 7,
+             seed: int = 7, header_variant: int = 0, encoding: str = "latin1",
+             delimiter: str = ";", dup_ratio: float = 0.0) -> bytes:
+    """
+    CSV de focos no formato INPE (`;`, o default de CSV_DELIMITER).
+    `base` é o fim da janela (default: agora, hora cheia);
+    os timestamps caem nos `days` dias anteriores. `dup_ratio` repete ids já emitidos
+    para exercitar a deduplicação.
+    """
+    rng = random.Random(seed)
+    base = base or datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    buf = io.StringIO()
+    w = csv.writer(buf, delimiter=delimiter, lineterminator="\n")
+    w.writerow(inpe_headers(header_variant))
+    emitted = []
+    uf_nome = _uf_nome_by_sigla()
+    for i in range(rows):
+        if emitted and rng.random() < dup_ratio:
+            w.writerow(rng.choice(emitted))
+            continue
+        m = muns[int(rng.paretovariate(1.2)) % len(muns)]   # concentra focos em poucos municípios
+        ts = base - timedelta(seconds=rng.randrange(days * 86400))
+        row = [
+            f"{seed:04x}{i:012x}-bench",
+            f"{m.lat + rng.uniform(-0.2, 0.2):.5f}",
+            f"{m.lon + rng.uniform(-0.2, 0.2):.5f}",
+            ts.strftime("%Y-%m-%d %H:%M:%S"),
+            rng.choice(SATELITES),
+            m.nome.upper(),
+            uf_nome[m.uf],
+            m.codigo_ibge,
+            m.uf_id,
+            rng.choice(BIOMAS),
+            f"{rng.uniform(0, 120):.1f}",
+        ]
+        if dup_ratio:
+            emitted.append(row)
+        w.writerow(row)
+    return buf.getvalue().encode(encoding, errors="replace")
+
+def _uf_nome_by_sigla() -> dict[str, str]:
+    # nome acentuado preferido (é o que o INPE publica)
+    out = {}
+    for nome, sigla in UF_NOME2SIGLA.items():
+        if sigla not in out or any(ord(c) > 127 for c in nome):
+            out[sigla] = nome
+    return out
+
+# ---------- Open-Meteo ----------
+def open_meteo_payload(lat: float, lon: float, start: datetime, end: datetime,
+                       hourly_vars: list[str], seed: int = 11) -> dict:
+    """Resposta no formato do /v1/forecast com `timezone=UTC` (dias completos 00..23h)."""
+    rng = random.Random(f"{seed}:{lat:.5f}:{lon:.5f}")
+    day0 = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    n_hours = int(((end - day0).total_seconds() // 86400 + 1) * 24)
+    times = [(day0 + timedelta(hours=h)).strftime("%Y-%m-%dT%H:%M") for h in range(n_hours)]
+    gens = {
+        "temperature_2m": lambda h: round(22 + 8 * rng.random() + 4 * ((h % 24) in range(10, 18)), 1),
+        "relative_humidity_2m": lambda h: rng.randrange(15, 100),
+        "wind_speed_10m": lambda h: round(rng.uniform(0, 35), 1),
+        "wind_gusts_10m": lambda h: round(rng.uniform(5, 60), 1),
+        "precipitation": lambda h: round(max(0.0, rng.gauss(0, 1.5)), 1),
+        "cloud_cover": lambda h: rng.randrange(0, 101),
+        "dew_point_2m": lambda h: round(rng.uniform(5, 22), 1),
+    }
+    hourly = {"time": times}
+    for v in hourly_vars:
+        g = gens.get(v, lambda h: round(rng.random(), 3))
+        hourly[v] = [g(h) for h in range(n_hours)]
+    return {
+        "latitude": lat, "longitude": lon, "timezone": "UTC", "utc_offset_seconds": 0,
+        "hourly_units": {v: "" for v in hourly_vars},
+        "hourly": hourly,
+    }
@@ -0,0 +1,211 @@
+# benchmarks/harness.py
+"""
+Roda as etapas da ETL contra fixtures sintéticas, servidores HTTP locais e um
+mongod local, registrando throughput, p50/p99 e pico de RSS por etapa.
+
+Cada etapa roda num processo filho (spawn) para que o pico de RSS e as métricas
+(etl/common/metrics.py) sejam só dela.
+
+Uso:
+    python -m benchmarks.harness run                       # tudo, defaults
+    python -m benchmarks.harness run --stages fires,gold --fires-rows 200000 --latency-ms 30 --p429 0.02
+    python -m benchmarks.harness run --mongo-uri mongodb://localhost:27017/fires_bench
+    python -m benchmarks.harness compare                   # tabela por commit
+"""
+import argparse, multiprocessing as mp, os, sys, tempfile, time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks import fixtures
+from benchmarks.common import REPO_ROOT, load_results, mongo_for_bench, peak_rss_mb, prepare_db, record
+from benchmarks.servers import StubServer
+
+STAGES = ("ref", "coords", "fires", "weather", "gold")
+
+# por etapa: (contador de unidades processadas, histograma "principal" para p50/p99)
+STAGE_METRICS = {
+    "fires":   ("fires.read", "fires.row_to_doc_seconds"),
+    "weather": ("weather.hours_received", "weather.http"),
+    "ref":     (None, None),
+    "coords":  (None, None),
+    "gold":    ("gold.rows_written", "gold.write_partition_seconds"),
+}
+
+def _stage_child(stage: str, env: dict, workdir: str, q):
+    """Executa uma etapa isolada no processo filho e devolve as medições pela fila."""
+    try:
+        sys.path.insert(0, str(REPO_ROOT))
+        os.environ.update(env)
+        os.chdir(workdir)
+        from etl.common import metrics
+
+        units = None
+        t0 = time.perf_counter()
+        if stage == "fires":
+            from etl.inpe.fetch_fires import fetch_and_ingest
+            totals = fetch_and_ingest(days=int(env["BENCH_DAYS"]))
+            if not totals["inserted"]:
+                # CSV não lido (delimitador/encoding/cabeçalho): as etapas seguintes mediriam vazio
+                raise RuntimeError(f"fires: nenhum foco inserido ({totals})")
+        elif stage == "weather":
+            from etl.weather.fetch_weather import main as weather_main
+            weather_main()
+        elif stage == "ref":
+            from etl.ibge.load_ref_municipios import load_csv_to_dataframe, mongo_upsert
+            df = load_csv_to_dataframe("data/ref/municipios_raw.csv")
+            mongo_upsert(df, env["MONGO_URI"])
+            units = len(df)
+        elif stage == "coords":
+            from etl.ibge.load_coords_csv import load_coords, upsert_coords
+            df = load_coords("data/ref/coords_municipios.csv")
+            upsert_coords(df, overwrite=True)
+            units = len(df)
+        elif stage == "gold":
+            from etl.gold.export_parquet import main as gold_main
+            gold_main()
+        else:
+            raise ValueError(f"etapa desconhecida: {stage}")
+        elapsed = time.perf_counter() - t0
+
+        snap = metrics.REGISTRY.snapshot()
+        unit_counter, headline = STAGE_METRICS[stage]
+        if units is None and unit_counter:
+            units = sum(r["value"] for r in snap if r["type"] == "counter" and r["name"] == unit_counter)
+        hist = next((r for r in snap if r["name"] == headline and r.get("count")), None) if headline else None
+        q.put({
+            "ok": True,
+            "elapsed_s": round(elapsed, 4),
+            "units": units,
+            "throughput_per_s": round(units / elapsed, 2) if units and elapsed > 0 else None,
+            "p50_s": hist["p50"] if hist else None,
+            "p99_s": hist["p99"] if hist else None,
+            "headline_metric": headline,
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "metrics": snap,
+        })
+    except BaseException as e:
+        q.put({"ok": False, "error": repr(e), "peak_rss_mb": round(peak_rss_mb(), 1)})
+
+def run_stage(stage: str, env: dict, workdir: str, timeout: float = 3600) -> dict:
+    ctx = mp.get_context("spawn")
+    q = ctx.Queue()
+    p = ctx.Process(target=_stage_child, args=(stage, env, workdir, q), name=f"bench-{stage}")
+    p.start()
+    try:
+        res = q.get(timeout=timeout)
+    finally:
+        p.join(timeout=30)
+    return res
+
+def write_fixtures(workdir: Path, args) -> list:
+    muns = fixtures.make_municipios(args.municipios, seed=args.seed)
+    ref = workdir / "data" / "ref"
+    ref.mkdir(parents=True, exist_ok=True)
+    (ref / "municipios_raw.csv").write_bytes(fixtures.municipios_raw_csv(muns))
+    (ref / "coords_municipios.csv").write_bytes(fixtures.coords_csv(muns))
+    return muns
+
+def cmd_run(args):
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        raise SystemExit(f"etapas desconhecidas: {unknown} (válidas: {STAGES})")
+
+    params = {k: getattr(args, k) for k in
+              ("municipios", "fires_rows", "days", "header_variant", "encoding", "dup_ratio",
+               "latency_ms", "jitter_ms", "p429", "workers", "seed")}
+    base = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+    with tempfile.TemporaryDirectory(prefix="bench-etl-") as tmp, \
+         mongo_for_bench(args.mongo_uri, args.mongod) as uri:
+        workdir = Path(tmp)
+        muns = write_fixtures(workdir, args)
+        csv_bytes = fixtures.inpe_csv(args.fires_rows, muns, base=base, days=args.days, seed=args.seed,
+                                      header_variant=args.header_variant, encoding=args.encoding,
+                                      dup_ratio=args.dup_ratio)
+
+        from pymongo import MongoClient
+        cli = MongoClient(uri)
+        prepare_db(cli.get_database())
+        cli.close()
+
+        with StubServer(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, p429=args.p429,
+                        seed=args.seed) as srv:
+            srv.add_static("/inpe/focos_bench.csv", csv_bytes, f"text/csv; charset={args.encoding}")
+            srv.add_open_meteo(seed=args.seed)
+            env = {
+                "MONGO_URI": uri,
+                "INPE_CSV_URLS": srv.url("/inpe/focos_bench.csv"),
+                "CSV_DELIMITER": ";",
+                "OPENMETEO_URL": srv.url("/v1/forecast"),
+                "WEATHER_LOOKBACK_DAYS": str(args.days),
+                "MAX_WORKERS": str(args.workers),
+                "BENCH_DAYS": str(args.days),
+            }
+            failed = []
+            for stage in stages:
+                print(f"[bench] {stage} ...", flush=True)
+                res = run_stage(stage, env, str(workdir))
+                if not res.get("ok"):
+                    print(f"[bench] {stage} FALHOU: {res.get('error')}")
+                    record("etl_stage", stage, params, res, label=args.label)
+                    failed.append(stage)
+                    continue
+                res["http"] = dict(srv.stats)
+                rec = record("etl_stage", stage, params, res, label=args.label)
+                print(f"[bench] {stage}: {rec['elapsed_s']:.2f}s units={rec['units']} "
+                      f"thr={rec['throughput_per_s']}/s p50={_fmt(rec['p50_s'])} p99={_fmt(rec['p99_s'])} "
+                      f"rss={rec['peak_rss_mb']}MB")
+    if failed:
+        raise SystemExit(f"[bench] etapas com falha: {', '.join(failed)}")
+
+def _fmt(v):
+    return "-" if v is None else f"{v * 1000:.2f}ms"
+
+def cmd_compare(args):
+    rows = [r for r in load_results() if not args.bench or r.get("bench") == args.bench]
+    if not rows:
+        print("Sem resultados em benchmarks/results/results.jsonl")
+        return
+    rows = rows[-args.last:] if args.last else rows
+    print(f"{'commit':<10} {'label':<12} {'bench':<14} {'case':<22} {'elapsed':>9} {'thr/s':>11} "
+          f"{'p50':>10} {'p99':>10} {'rss MB':>8}")
+    for r in rows:
+        commit = r.get("commit", "?") + ("*" if r.get("dirty") else "")
+        thr = r.get("throughput_per_s")
+        print(f"{commit:<10} {r.get('label',''):<12.12} {r.get('bench',''):<14.14} {r.get('case',''):<22.22} "
+              f"{r.get('elapsed_s') or 0:>9.3f} {thr if thr is not None else '-':>11} "
+              f"{_fmt(r.get('p50_s')):>10} {_fmt(r.get('p99_s')):>10} {r.get('peak_rss_mb') or '-':>8}")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmarks reprodutíveis das etapas da ETL.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    r = sub.add_parser("run", help="Roda etapas contra fixtures + HTTP local + mongod local")
+    r.add_argument("--stages", default=",".join(STAGES))
+    r.add_argument("--municipios", type=int, default=5570)
+    r.add_argument("--fires-rows", type=int, default=50000)
+    r.add_argument("--days", type=int, default=7)
+    r.add_argument("--header-variant", type=int, default=0, help="Grafia do cabeçalho INPE (ver COL_MAP)")
+    r.add_argument("--encoding", default="latin1")
+    r.add_argument("--dup-ratio", type=float, default=0.0)
+    r.add_argument("--latency-ms", type=float, default=0.0)
+    r.add_argument("--jitter-ms", type=float, default=0.0)
+    r.add_argument("--p429", type=float, default=0.0, help="Probabilidade de 429 por requisição")
+    r.add_argument("--workers", type=int, default=6, help="MAX_WORKERS do clima")
+    r.add_argument("--seed", type=int, default=7)
+    r.add_argument("--mongo-uri", default=None, help="DB de benchmark já existente (bench*/*_bench)")
+    r.add_argument("--mongod", default=None, help="Caminho do binário mongod (default: PATH)")
+    r.add_argument("--label", default="")
+    r.set_defaults(func=cmd_run)
+
+    c = sub.add_parser("compare", help="Mostra resultados gravados, por commit")
+    c.add_argument("--bench", default="")
+    c.add_argument("--last", type=int, default=0)
+    c.set_defaults(func=cmd_compare)
+
+    args = ap.parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# benchmarks/servers.py
+"""
+Servidores HTTP locais que imitam INPE (CSV estático) e Open-Meteo (/v1/forecast),
+com latência configurável e injeção de 429 (Too Many Requests) determinística.
+
+    with StubServer(latency_ms=20, p429=0.05) as srv:
+        srv.add_static("/inpe/focos.csv", csv_bytes, "text/csv; charset=latin1")
+        srv.add_open_meteo()
+        os.environ["INPE_CSV_URLS"] = srv.url("/inpe/focos.csv")
+        os.environ["OPENMETEO_URL"] = srv.url("/v1/forecast")
+"""
+import json, random, threading, time
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.fixtures import open_meteo_payload
+
+def _parse_ts(s: str) -> datetime:
+    return datetime.fromisoformat(s.replace("Z", "+00:00")).astimezone(timezone.utc)
+
+class StubServer:
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, p429: float = 0.0,
+                 retry_after: int = 1, seed: int = 0, host: str = "127.0.0.1", port: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.p429 = p429
+        self.retry_after = retry_after
+        self.seed = seed
+        self.routes = {}
+        self.stats = Counter()
+        self._seen = Counter()
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    # ---------- rotas ----------
+    def add_static(self, path: str, body: bytes, content_type: str = "application/octet-stream"):
+        self.routes[path] = lambda query: (200, {"Content-Type": content_type}, body)
+
+    def add_open_meteo(self, path: str = "/v1/forecast", seed: int = 11):
+        def handler(query):
+            lat = float(query["latitude"][0]); lon = float(query["longitude"][0])
+            hourly = query.get("hourly", ["temperature_2m"])[0].split(",")
+            start = _parse_ts(query["start"][0]); end = _parse_ts(query["end"][0])
+            body = json.dumps(open_meteo_payload(lat, lon, start, end, hourly, seed=seed)).encode()
+            return 200, {"Content-Type": "application/json"}, body
+        self.routes[path] = handler
+
+    # ---------- ciclo de vida ----------
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path: str) -> str:
+        return self.base_url + path
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="stub-http", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    # ---------- internos ----------
+    def _should_throttle(self, key: str) -> bool:
+        if self.p429 <= 0:
+            return False
+        with self._lock:
+            n = self._seen[key]
+            self._seen[key] += 1
+        # decisão depende só de (seed, requisição, tentativa): reprodutível entre execuções
+        return random.Random(f"{self.seed}:{key}:{n}").random() < self.p429
+
+    def _delay(self, key: str):
+        if self.latency_ms <= 0 and self.jitter_ms <= 0:
+            return
+        jitter = random.Random(f"{self.seed}:lat:{key}").uniform(0, self.jitter_ms)
+        time.sleep((self.latency_ms + jitter) / 1000.0)
+
+    def _handler_class(self):
+        srv = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                route = srv.routes.get(parts.path)
+                srv._delay(self.path)
+                with srv._lock:
+                    srv.stats["requests"] += 1
+                if route is None:
+                    return self._send(404, {"Content-Type": "text/plain"}, b"not found")
+                if srv._should_throttle(self.path):
+                    with srv._lock:
+                        srv.stats["throttled"] += 1
+                    return self._send(429, {"Content-Type": "application/json",
+                                            "Retry-After": str(srv.retry_after)},
+                                      b'{"error":true,"reason":"Too many requests"}')
+                try:
+                    status, headers, body = route(parse_qs(parts.query))
+                except Exception as e:  # parâmetros inválidos -> 400, como a API real
+                    status, headers, body = 400, {"Content-Type": "application/json"}, \
+                        json.dumps({"error": True, "reason": str(e)}).encode()
+                self._send(status, headers, body)
+
+            def _send(self, status, headers, body: bytes):
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
@@ -24,6 +24,9 @@
     timeseries: { timeField: "ts", metaField: "meta", granularity: "hours" }
   });
 
+  // clima em buckets por município-dia (WEATHER_STORAGE=bucket, etl/weather/buckets.py)
+  appdb.createCollection("weather_buckets");
+
   // referência estática/dimensional
   appdb.createCollection("ref_municipios");
 
@@ -34,8 +37,13 @@
   // appdb.raw_fires.createIndex({ geom: "2dsphere" });
 
   appdb.raw_weather.createIndex({ "meta.municipio_ibge": 1, ts: -1 });
+  appdb.raw_weather.createIndex({ "meta.uf": 1, ts: -1 });   // gold sharded por UF
   appdb.raw_weather.createIndex({ ts: -1 });
 
+  appdb.weather_buckets.createIndex({ municipio_ibge: 1, date: 1 }, { unique: true });
+  appdb.weather_buckets.createIndex({ uf: 1, date: -1 });
+  appdb.weather_buckets.createIndex({ date: -1 });
+
   appdb.ref_municipios.createIndex({ codigo_ibge: 1 }, { unique: true });
 
   print("Mongo init OK: DB fires, usuário etl_user e coleções criadas.");
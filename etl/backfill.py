@@ -0,0 +1,300 @@
+# etl/backfill.py
+"""
+Backfill histórico (temporada de queimadas, vários anos) em blocos de meses.
+
+O intervalo [--start, --end] é dividido em blocos alinhados ao mês; cada bloco
+roda num processo do pool (concorrência limitada por --workers) e faz, sozinho:
+    fires   -> baixa os CSVs do INPE do período e grava em lote em raw_fires
+    weather -> clima horário dos municípios com focos no bloco (API histórica)
+Depois que todos os blocos terminam essas etapas, o gold roda bloco a bloco,
+em ordem cronológica:
+    gold    -> agrega o bloco e grava as partições uf/year/month dele, com o
+               focos_3d continuando das partições dos blocos anteriores
+Assim a memória de cada processo fica limitada a um bloco, e um bloco nunca
+escreve partições de outro (partições são por mês).
+
+Checkpoint por bloco/etapa em logs/backfill/chunk_<início>-<fim>.json;
+`--resume` pula o que já terminou e refaz só etapas que faltaram/falharam.
+Dentro de uma etapa, fires e weather registram URLs/cidades concluídas no
+diário (etl/common/journal.py, key = bloco): a etapa refeita continua de onde
+a tentativa anterior parou.
+No fim, os arquivos únicos data/gold/fact_*.parquet são remontados a partir
+das partições (uma partição por vez).
+
+Fonte dos focos por bloco:
+- INPE_CSV_URL_TEMPLATE (ex.: .../focos_diario_br_{date:%Y%m%d}.csv ou
+  .../focos_mensal_br_{date:%Y%m}.csv): uma URL por dia do bloco (repetidas
+  são removidas, então um template mensal gera uma URL por mês);
+- senão INPE_CSV_URLS, filtrado pela janela do bloco — só num backfill de um
+  bloco: com vários, cada bloco baixaria e leria os mesmos arquivos inteiros,
+  então o template é obrigatório.
+
+Uso:
+    python -m etl.backfill --start 2023-01-01 --end 2024-12-31
+    python -m etl.backfill --start 2020-01 --end 2024-12 --workers 6 --stages fires,gold
+    python -m etl.backfill --start 2023-01-01 --end 2024-12-31 --resume
+"""
+import json, multiprocessing as mp, os, sys, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from etl.common import journal, metrics
+
+STAGES = ("fires", "weather", "gold")
+STATE_DIR = Path("logs/backfill")
+FORECAST_PAST_DAYS = 92   # além disso, clima só pela API histórica
+
+@dataclass(frozen=True)
+class Chunk:
+    start: datetime   # inclusivo (UTC)
+    end: datetime     # exclusivo (UTC)
+
+    @property
+    def key(self) -> str:
+        return f"{self.start:%Y%m%d}-{self.end:%Y%m%d}"
+
+    def months(self) -> tuple[datetime, datetime]:
+        """Bloco estendido para meses inteiros (partições do gold são por mês)."""
+        start = self.start.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        end = self.end.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        return start, (end if end == self.end else _add_months(end, 1))
+
+# ---------- blocos ----------
+def _parse_date(s: str, end: bool = False) -> datetime:
+    """AAAA-MM-DD ou AAAA-MM (como fim, AAAA-MM vale o mês inteiro)."""
+    if len(s) == 7:
+        d = datetime.strptime(s, "%Y-%m").replace(tzinfo=timezone.utc)
+        return _add_months(d, 1) if end else d
+    d = datetime.strptime(s, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    return d + timedelta(days=1) if end else d
+
+def _add_months(d: datetime, n: int) -> datetime:
+    y, m = divmod(d.month - 1 + n, 12)
+    return d.replace(year=d.year + y, month=m + 1, day=1)
+
+def month_chunks(start: datetime, end: datetime, months: int = 1) -> list[Chunk]:
+    """Blocos [início, fim) alinhados ao 1º dia do mês, recortados por start/end."""
+    out = []
+    cur = start.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    while cur < end:
+        nxt = _add_months(cur, months)
+        out.append(Chunk(max(cur, start), min(nxt, end)))
+        cur = nxt
+    return out
+
+def fire_urls(chunk: Chunk, template: str, fallback: list[str]) -> list[str]:
+    if not template:
+        return list(fallback)
+    urls, day = [], chunk.start
+    while day < chunk.end:
+        urls.append(template.format(date=day))
+        day += timedelta(days=1)
+    return list(dict.fromkeys(urls))
+
+# ---------- checkpoints ----------
+def _checkpoint_path(state_dir: Path, chunk: Chunk) -> Path:
+    return state_dir / f"chunk_{chunk.key}.json"
+
+def load_checkpoint(state_dir: Path, chunk: Chunk) -> dict:
+    p = _checkpoint_path(state_dir, chunk)
+    if not p.exists():
+        return {"chunk": chunk.key, "stages": {}}
+    return json.loads(p.read_text(encoding="utf-8"))
+
+def save_checkpoint(state_dir: Path, chunk: Chunk, state: dict):
+    p = _checkpoint_path(state_dir, chunk)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_suffix(f".tmp{os.getpid()}")
+    tmp.write_text(json.dumps(state, ensure_ascii=False, indent=1, default=str), encoding="utf-8")
+    os.replace(tmp, p)
+
+# ---------- trabalho de um bloco (processo filho) ----------
+def _use_archive(chunk: Chunk, mode: str) -> bool:
+    if mode != "auto":
+        return mode == "archive"
+    return chunk.end < datetime.now(timezone.utc) - timedelta(days=FORECAST_PAST_DAYS)
+
+def run_chunk(chunk: Chunk, stages: tuple[str, ...], opts: dict) -> dict:
+    """Roda as etapas pendentes de um bloco com clientes próprios; devolve estado + métricas."""
+    from pymongo import MongoClient
+    from etl.common import refdata
+    from etl.common.config import load_settings
+    from etl.common.httpclient import get_client
+
+    # o pool reaproveita os processos: sem o reset, o snapshot somaria os blocos anteriores do worker
+    metrics.REGISTRY.reset()
+    s = load_settings()
+    state_dir = Path(opts["state_dir"])
+    # o checkpoint acumula as etapas do bloco (o gold roda numa fase separada); só --resume pula as já feitas
+    state = load_checkpoint(state_dir, chunk)
+    tag = f"[backfill {chunk.key}]"
+
+    mongo = MongoClient(s.mongo_uri)
+    http = get_client(timeout=int(os.environ.get("HTTP_TIMEOUT", "120")))
+    db = mongo.get_database()
+    try:
+        refdata.load_snapshot(s.mongo_uri, db=db)
+        for stage in stages:
+            if opts["resume"] and stage in state["stages"]:
+                print(f"{tag} {stage}: já concluída (checkpoint)")
+                continue
+            t0 = time.perf_counter()
+            if stage == "fires":
+                from etl.inpe.fetch_fires import fetch_and_ingest
+                urls = fire_urls(chunk, os.environ.get("INPE_CSV_URL_TEMPLATE", ""), s.inpe_csv_urls)
+                res = fetch_and_ingest(batch_size=opts["batch_size"], db=db, http=http, urls=urls,
+                                       window=(chunk.start, chunk.end - timedelta(microseconds=1)),
+                                       skip_missing=True, resume=opts["resume"], journal_key=chunk.key)
+            elif stage == "weather":
+                from etl.weather.fetch_weather import DEFAULT_HOURLY, city_unit, fetch_cities, get_target_cities
+                hourly_vars = os.environ.get("OPENMETEO_HOURLY", ",".join(DEFAULT_HOURLY)).split(",")
+                cities = get_target_cities(s.mongo_uri, db=db, start=chunk.start, end=chunk.end)
+                inserted = 0
+                if not cities.empty:
+                    # cidades já gravadas por uma tentativa que morreu no meio do bloco
+                    jr = journal.open_run("weather", {"start": chunk.start, "end": chunk.end},
+                                          resume=opts["resume"], key=chunk.key)
+                    try:
+                        inserted = fetch_cities(cities, chunk.start, chunk.end, hourly_vars, db, http,
+                                                max_workers=opts["city_workers"],
+                                                archive=_use_archive(chunk, opts["weather_api"]), jr=jr)
+                    except BaseException:
+                        jr.close()
+                        raise
+                    # cidades com erro ficam pendentes no diário e a etapa não entra no checkpoint:
+                    # o --resume refaz a etapa buscando só elas
+                    units = {city_unit(row, chunk.start, chunk.end) for _, row in cities.iterrows()}
+                    pending = len(units - jr.units_done("city:"))
+                    if pending:
+                        jr.close()
+                        raise RuntimeError(f"weather: {pending} de {len(units)} cidades com erro")
+                    jr.finish()
+                res = {"cities": len(cities), "inserted": inserted}
+            elif stage == "gold":
+                from etl.gold.export_parquet import write_gold_window
+                # mês inteiro mesmo com --start/--end no meio do mês: a partição é reescrita completa
+                res = write_gold_window(s.mongo_uri, *chunk.months(), db=db, carry_since=opts.get("carry_since"))
+            else:
+                raise ValueError(f"etapa desconhecida: {stage}")
+            elapsed = time.perf_counter() - t0
+            metrics.observe("backfill.stage_seconds", elapsed, stage=stage)
+            state["stages"][stage] = {**res, "elapsed_s": round(elapsed, 2)}
+            save_checkpoint(state_dir, chunk, state)
+            print(f"{tag} {stage}: ok em {elapsed:.1f}s {res}")
+    finally:
+        http.close()
+        mongo.close()
+    return {"state": state, "metrics": metrics.REGISTRY.snapshot()}
+
+# ---------- CLI ----------
+def main(argv=None) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(description="Backfill histórico em blocos mensais paralelos (INPE, clima, gold).")
+    ap.add_argument("--start", required=True, help="Início (AAAA-MM-DD ou AAAA-MM)")
+    ap.add_argument("--end", required=True, help="Fim inclusivo (AAAA-MM-DD ou AAAA-MM)")
+    ap.add_argument("--stages", default=",".join(STAGES), help=f"Etapas por bloco; default: {','.join(STAGES)}")
+    ap.add_argument("--months-per-chunk", type=int, default=1)
+    ap.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="Blocos simultâneos (processos)")
+    ap.add_argument("--city-workers", type=int, default=int(os.environ.get("MAX_WORKERS", "6")),
+                    help="Threads de clima por bloco")
+    ap.add_argument("--batch", type=int, default=2000, help="Tamanho do lote de inserção dos focos")
+    ap.add_argument("--weather-api", choices=("auto", "archive", "forecast"), default="auto",
+                    help=f"auto: histórica para blocos com mais de {FORECAST_PAST_DAYS} dias")
+    ap.add_argument("--resume", action="store_true", help="Retoma pelos checkpoints de logs/backfill")
+    ap.add_argument("--state-dir", default=str(STATE_DIR))
+    ap.add_argument("--no-single", action="store_true", help="Não remonta os arquivos únicos do gold no fim")
+    ap.add_argument("--metrics-dir", default="logs/metrics", help="Onde gravar backfill_<stamp>.jsonl; '' desliga")
+    args = ap.parse_args(argv)
+
+    stages = tuple(x.strip() for x in args.stages.split(",") if x.strip())
+    unknown = [x for x in stages if x not in STAGES]
+    if unknown:
+        raise SystemExit(f"etapas desconhecidas: {unknown} (válidas: {STAGES})")
+    start, end = _parse_date(args.start), _parse_date(args.end, end=True)
+    if end <= start:
+        raise SystemExit("--end deve ser posterior a --start")
+
+    from etl.common.config import load_settings
+    load_settings()   # configs/.env no ambiente (o template de URL costuma estar só lá)
+    chunks = month_chunks(start, end, max(1, args.months_per_chunk))
+    if "fires" in stages and len(chunks) > 1 and not os.environ.get("INPE_CSV_URL_TEMPLATE"):
+        raise SystemExit(f"{len(chunks)} blocos com focos exigem INPE_CSV_URL_TEMPLATE (uma URL por dia/mês); "
+                         "INPE_CSV_URLS seria baixado inteiro em cada bloco")
+    state_dir = Path(args.state_dir)
+
+    def pending(c: Chunk, sts) -> list[str]:
+        done = load_checkpoint(state_dir, c)["stages"] if args.resume else {}
+        return [st for st in sts if st not in done]
+
+    # fase 1: fires/weather em paralelo; fase 2: gold em ordem, depois de todos os focos,
+    # porque o focos_3d de cada bloco continua das partições dos blocos anteriores
+    fetch_stages = tuple(st for st in stages if st != "gold")
+    todo = [c for c in chunks if pending(c, fetch_stages)]
+    gold_todo = [c for c in chunks if "gold" in stages and pending(c, ("gold",))]
+    for c in chunks:
+        if c not in todo and c not in gold_todo:
+            print(f"[backfill {c.key}] concluído (checkpoint) — pulando")
+    print(f"[backfill] {len(chunks)} blocos ({len(todo)} a buscar, {len(gold_todo)} no gold), "
+          f"etapas={','.join(stages)}, workers={args.workers}")
+
+    opts = {"state_dir": str(state_dir), "resume": args.resume, "batch_size": args.batch,
+            "city_workers": args.city_workers, "weather_api": args.weather_api,
+            "carry_since": chunks[0].months()[0]}   # focos_3d continua desde o 1º bloco
+    stamp = f"{datetime.now():%Y%m%d_%H%M%S}"
+    failed, results = [], []
+    t0 = time.perf_counter()
+    # spawn: cada processo abre seus próprios clientes Mongo/HTTP (nada herdado do pai)
+    with ProcessPoolExecutor(max_workers=max(1, args.workers), mp_context=mp.get_context("spawn")) as pool:
+        futures = {pool.submit(run_chunk, c, fetch_stages, opts): c for c in todo if fetch_stages}
+        for fut in as_completed(futures):
+            c = futures[fut]
+            try:
+                results.append((c, fut.result()))
+            except BaseException as e:
+                failed.append(c.key)
+                print(f"[ERRO] backfill {c.key}: {e!r}", file=sys.stderr)
+        print(f"[timing] backfill: {len(futures) - len(failed)}/{len(futures)} blocos buscados "
+              f"em {time.perf_counter() - t0:.1f}s")
+
+        t1 = time.perf_counter()
+        for i, c in enumerate(gold_todo):
+            if c.key in failed:
+                print(f"[backfill] gold parado em {c.key} (focos do bloco falharam); "
+                      f"{len(gold_todo) - i} blocos pendentes")
+                failed += [x.key for x in gold_todo[i + 1:] if x.key not in failed]
+                break
+            try:
+                results.append((c, pool.submit(run_chunk, c, ("gold",), opts).result()))
+            except BaseException as e:
+                print(f"[ERRO] backfill {c.key} gold: {e!r}", file=sys.stderr)
+                failed += [x.key for x in gold_todo[i:] if x.key not in failed]
+                break
+        if gold_todo:
+            print(f"[timing] backfill gold: {time.perf_counter() - t1:.1f}s")
+    print(f"[timing] backfill: total {time.perf_counter() - t0:.1f}s")
+
+    # remonta mesmo com falhas parciais (reflete as partições em disco), mas não se nada rodou
+    if gold_todo and not args.no_single and (results or not failed):
+        from etl.gold.export_parquet import rebuild_single
+        for dataset in ("fact_fires_daily", "fact_risk_daily"):
+            print(f"[gold] {dataset}.parquet remontado: {rebuild_single(dataset)} linhas")
+
+    if args.metrics_dir and results:
+        out = Path(args.metrics_dir) / f"backfill_{stamp}.jsonl"
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with open(out, "a", encoding="utf-8") as f:
+            for c, res in results:
+                for rec in res["metrics"]:
+                    f.write(json.dumps({"run_id": stamp, "chunk": c.key, **rec}, ensure_ascii=False) + "\n")
+        print(f"[metrics] {out}")
+
+    if failed:
+        print(f"[done] Backfill com falhas: {', '.join(sorted(failed))} (rode de novo com --resume)")
+        return 1
+    print("[done] Backfill concluído.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+# etl/common/ibge.py
+"""
+Normalização vetorizada dos CSVs do IBGE (municípios, coordenadas, tabelas
+distritais/históricas no mesmo formato).
+
+Substitui os `apply`/`map` linha a linha por operações de coluna (`.str`,
+`to_numeric`) com o mesmo resultado das versões escalares:
+- `digits_int`:   "11-00015" -> 1100015 ; vazio/sem dígitos -> <NA>
+- `compose_ibge`: UF(2) + município(5) -> código de 7 dígitos
+- `parse_pop`:    "22.787" -> 22787 ; inválido -> 0
+
+`read_csv_fast` lê com dialeto explícito no engine C: o delimitador é
+detectado uma vez na 1ª linha (mesmo `csv.Sniffer` que o engine python usa
+com `sep=None`) e o encoding por decodificação (utf-8-sig -> latin1).
+"""
+import csv, io, re, unicodedata
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from etl.common import metrics
+
+ENCODINGS = ("utf-8-sig", "latin1")
+
+def norm_col(s: str) -> str:
+    """Nome de coluna normalizado: sem acento, minúsculo, [a-z0-9_]."""
+    s = (s or "").strip()
+    s = unicodedata.normalize("NFD", s)
+    s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
+    s = unicodedata.normalize("NFC", s).lower()
+    s = re.sub(r"[^a-z0-9]+", "_", s)
+    s = re.sub(r"_+", "_", s).strip("_")
+    return s
+
+def pick_col(df: pd.DataFrame, cands: set[str]):
+    for c in df.columns:
+        if norm_col(c) in cands:
+            return c
+    return None
+
+# ---------- leitura ----------
+def sniff_dialect(first_line: str) -> str:
+    """Delimitador da 1ª linha; ',' se o Sniffer não decidir."""
+    try:
+        return csv.Sniffer().sniff(first_line).delimiter
+    except csv.Error:
+        return ","
+
+def read_csv_fast(path: str | Path, dtype=str) -> pd.DataFrame:
+    """
+    Lê o CSV inteiro como texto (todas as colunas str), com encoding e
+    delimitador resolvidos antes do parse e o engine C do pandas.
+    """
+    with metrics.timer("ibge.read_csv"):
+        data = Path(path).read_bytes()
+        for enc in ENCODINGS:
+            try:
+                text = data.decode(enc)
+                break
+            except UnicodeDecodeError:
+                continue
+        nl = text.find("\n")
+        first = text if nl < 0 else text[:nl]
+        sep = sniff_dialect(first)
+        return pd.read_csv(io.StringIO(text), sep=sep, engine="c", dtype=dtype)
+
+# ---------- conversões ----------
+def digits_int(series: pd.Series) -> pd.Series:
+    """Mantém só os dígitos e converte para Int64 (<NA> se vazio/ausente)."""
+    d = series.astype("string").str.replace(r"\D", "", regex=True)
+    return d.where(d != "").astype("Int64")
+
+def _float_or_nan(s) -> float:
+    try:
+        return float(s)
+    except Exception:
+        return np.nan
+
+def parse_pop(series: pd.Series) -> pd.Series:
+    """
+    População com separador de milhar ('.') e decimal (','), truncada para int64.
+    Ausente, inválido, NaN ou infinito viram 0 (mesma regra do parse escalar).
+    """
+    s = series.astype("string").str.strip().str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    f = pd.to_numeric(s, errors="coerce").astype("float64")
+    # o que o to_numeric recusou mas float() aceita (ex.: "1_000") vai pelo caminho escalar
+    retry = f.isna() & s.notna()
+    if retry.any():
+        f[retry] = s[retry].map(_float_or_nan).astype("float64")
+    f = f.where(np.isfinite(f), 0.0)
+    return pd.Series(np.trunc(f.to_numpy()).astype("int64"), index=series.index)
+
+def compose_ibge(uf_code: pd.Series, mun_code: pd.Series) -> pd.Series:
+    """
+    Código de 7 dígitos pela concatenação UF(2) + município(5), com zeros à esquerda
+    (ex.: 11 + 15 -> 1100015). Entradas já inteiras e não-negativas.
+    """
+    uf = uf_code.astype("int64").astype(str).str.zfill(2)
+    mun = mun_code.astype("int64").astype(str).str.zfill(5)
+    return (uf + mun).astype("int64")
@@ -1,67 +1,57 @@
-import pandas as pd
+# etl/common/import_municipios.py
+"""
+Gera data/ref/municipios.csv (codigo_ibge de 7 dígitos, municipio, uf_sigla,
+populacao) a partir do CSV bruto do IBGE (data/ref/municipios_raw.csv).
+"""
+import argparse
 from pathlib import Path
-import re
-
-raw = Path("data/ref/municipios_raw.csv")
-out = Path("data/ref/municipios.csv")
 
-# Lê o CSV (vírgula), mantendo os nomes originais
-df = pd.read_csv(raw, sep=",", dtype=str)
+import pandas as pd
 
-# Normaliza nomes de colunas (remove acentos, espaços extras e pontuação)
-def norm(s):
-    s = s.strip().lower()
-    s = s.replace("á","a").replace("à","a").replace("ã","a").replace("â","a")
-    s = s.replace("é","e").replace("ê","e").replace("í","i").replace("ó","o").replace("ô","o").replace("õ","o").replace("ú","u").replace("ç","c")
-    s = re.sub(r"[^a-z0-9_]+", "_", s)  # troca qualquer coisa por _
-    s = re.sub(r"_+", "_", s).strip("_")
-    return s
+from etl.common.ibge import compose_ibge, digits_int, norm_col, parse_pop
 
-cols_map = {c: norm(c) for c in df.columns}
-df.rename(columns=cols_map, inplace=True)
+RAW = Path("data/ref/municipios_raw.csv")
+OUT = Path("data/ref/municipios.csv")
 
-# Esperados a partir do seu layout:
+# Esperados a partir do layout do IBGE:
 # uf_sigla -> "uf_sigla"
 # COD. UF  -> "cod_uf"
 # codigo_ibge (5 dígitos do município) -> "codigo_ibge"
 # nome_municipio -> "nome_municipio"
 # populacao_estimada (com espaço no fim) -> vira "populacao_estimada"
-req = ["uf_sigla","cod_uf","codigo_ibge","nome_municipio","populacao_estimada"]
-missing = [c for c in req if c not in df.columns]
-if missing:
-    raise SystemExit(f"Colunas obrigatorias ausentes no CSV bruto: {missing}")
-
-# Monta o codigo_ibge completo: UF(2) + MUN(5) => 7 dígitos (ex.: 11 + 00015 => 1100015)
-def to_int(s):
-    s = (s or "").strip()
-    s = re.sub(r"\D", "", s)  # só dígitos
-    return int(s) if s else 0
-
-df["cod_uf_int"] = df["cod_uf"].apply(to_int)
-df["mun5_int"]   = df["codigo_ibge"].apply(to_int)
-
-df["codigo_ibge_full"] = df.apply(lambda r: int(f"{r['cod_uf_int']:02d}{r['mun5_int']:05d}"), axis=1)
-
-# População: remove separador de milhar e converte para int
-def parse_pop(s):
-    s = (str(s) if s is not None else "").strip()
-    s = s.replace(".", "").replace(",", ".")  # remove milhares; se viesse dec, vira ponto
-    try:
-        return int(float(s))
-    except:
-        return 0
-
-df["populacao"] = df["populacao_estimada"].apply(parse_pop)
-
-# Saída padronizada
-out_df = pd.DataFrame({
-    "codigo_ibge": df["codigo_ibge_full"].astype(int),
-    "municipio": df["nome_municipio"].astype(str).str.strip(),
-    "uf_sigla": df["uf_sigla"].astype(str).str.upper().str.strip(),
-    "populacao": df["populacao"].astype(int)
-})
-
-out.parent.mkdir(parents=True, exist_ok=True)
-out_df.to_csv(out, index=False)
-print("Gerado:", out, " | Linhas:", len(out_df))
-print(out_df.head(5))
+REQUIRED = ["uf_sigla", "cod_uf", "codigo_ibge", "nome_municipio", "populacao_estimada"]
+
+def build_municipios(raw_path: Path = RAW) -> pd.DataFrame:
+    # Lê o CSV (vírgula), mantendo os nomes originais
+    df = pd.read_csv(raw_path, sep=",", dtype=str)
+    df = df.rename(columns={c: norm_col(c) for c in df.columns})
+
+    missing = [c for c in REQUIRED if c not in df.columns]
+    if missing:
+        raise SystemExit(f"Colunas obrigatorias ausentes no CSV bruto: {missing}")
+
+    # Monta o codigo_ibge completo: UF(2) + MUN(5) => 7 dígitos (ex.: 11 + 00015 => 1100015)
+    cod_uf = digits_int(df["cod_uf"]).fillna(0)
+    mun5 = digits_int(df["codigo_ibge"]).fillna(0)
+
+    return pd.DataFrame({
+        "codigo_ibge": compose_ibge(cod_uf, mun5).astype(int),
+        "municipio": df["nome_municipio"].astype(str).str.strip(),
+        "uf_sigla": df["uf_sigla"].astype(str).str.upper().str.strip(),
+        "populacao": parse_pop(df["populacao_estimada"]).astype(int),
+    })
+
+def main(raw_path: Path = RAW, out_path: Path = OUT):
+    out_df = build_municipios(raw_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_df.to_csv(out_path, index=False)
+    print("Gerado:", out_path, " | Linhas:", len(out_df))
+    print(out_df.head(5))
+    return out_df
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Gera data/ref/municipios.csv a partir do CSV bruto do IBGE.")
+    ap.add_argument("--raw", default=str(RAW))
+    ap.add_argument("--out", default=str(OUT))
+    args = ap.parse_args()
+    main(Path(args.raw), Path(args.out))
@@ -0,0 +1,242 @@
+# etl/common/journal.py
+"""
+Diário de progresso das execuções longas (SQLite local), para retomar uma
+execução que morreu no meio sem baixar de novo o que já foi gravado.
+
+Cada execução (run) de um job grava os parâmetros dela (janela, URLs, ...) e,
+conforme avança, as unidades de trabalho concluídas:
+    fires    URL do INPE              url:<url>         (parcial: {"rows": linhas já gravadas,
+                                                          "inflight": fim do lote em gravação,
+                                                          "sha1"/"size": do arquivo lido})
+    weather  cidade x janela          city:<municipio_ibge>:<início>-<fim>  (parcial: {"started": true})
+    gold     partição mensal publicada month:<AAAA-MM>  (gold em janelas, com baseline)
+Com resume=True, open_run reabre a última execução inacabada do mesmo job/key
+com os parâmetros *dela* (a janela "últimos N dias" não anda entre as
+tentativas) e os laços pulam o que já está concluído. O dedupe do Mongo
+continua sendo a garantia contra duplicados; o diário só evita o retrabalho.
+
+Limpeza automática: finish() apaga as unidades da execução; execuções mais
+antigas que JOURNAL_KEEP_DAYS são removidas a cada open_run; uma execução nova
+(sem resume) abandona as inacabadas do mesmo job/key.
+
+Uso:
+    jr = journal.open_run("weather", {"start": start, "end": end}, resume=True)
+    start, end = jr.params["start"], jr.params["end"]
+    for unit in units:
+        if jr.done(unit):
+            continue
+        ...
+        jr.complete(unit, hours=n)
+    jr.finish()
+
+    python -m etl.common.journal list
+    python -m etl.common.journal prune --days 0
+"""
+import json, os, sqlite3, threading, time, uuid
+from datetime import date, datetime
+from pathlib import Path
+
+from etl.common import metrics
+
+JOURNAL_PATH = Path(os.environ.get("ETL_JOURNAL", "logs/journal/journal.sqlite"))
+KEEP_DAYS = float(os.environ.get("JOURNAL_KEEP_DAYS", "14"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id     TEXT PRIMARY KEY,
+    job        TEXT NOT NULL,
+    key        TEXT NOT NULL DEFAULT '',
+    params     TEXT NOT NULL,
+    status     TEXT NOT NULL,              -- running | done | abandoned
+    started_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_job ON runs (job, key, status, started_at);
+CREATE TABLE IF NOT EXISTS units (
+    run_id     TEXT NOT NULL,
+    unit       TEXT NOT NULL,
+    done       INTEGER NOT NULL,
+    progress   TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (run_id, unit)
+);
+"""
+
+# ---------- parâmetros (datas voltam como datetime/date) ----------
+def _encode(o):
+    if isinstance(o, datetime):
+        return {"$dt": o.isoformat()}
+    if isinstance(o, date):
+        return {"$date": o.isoformat()}
+    if isinstance(o, (set, tuple)):
+        return list(o)
+    raise TypeError(f"não serializável no diário: {type(o).__name__}")
+
+def _decode(d: dict):
+    if "$dt" in d and len(d) == 1:
+        return datetime.fromisoformat(d["$dt"])
+    if "$date" in d and len(d) == 1:
+        return date.fromisoformat(d["$date"])
+    return d
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, default=_encode, ensure_ascii=False, sort_keys=True)
+
+def _loads(s: str | None):
+    return json.loads(s, object_hook=_decode) if s else {}
+
+def _connect(path: Path | None = None) -> sqlite3.Connection:
+    path = Path(path or JOURNAL_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # autocommit; WAL para processos do backfill escreverem ao mesmo tempo
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+class Journal:
+    """Uma execução aberta no diário. Thread-safe (as cidades do clima concluem em threads)."""
+    def __init__(self, conn: sqlite3.Connection, run_id: str, job: str, key: str, params: dict,
+                 resumed: bool, units: dict[str, tuple[bool, dict]]):
+        self._conn, self._lock = conn, threading.Lock()
+        self.run_id, self.job, self.key, self.params, self.resumed = run_id, job, key, params, resumed
+        self._done = {u for u, (ok, _) in units.items() if ok}
+        self._progress = {u: p for u, (ok, p) in units.items() if not ok}
+
+    @property
+    def completed(self) -> int:
+        return len(self._done)
+
+    def units_done(self, prefix: str = "") -> set[str]:
+        return {u for u in self._done if u.startswith(prefix)}
+
+    def done(self, unit: str) -> bool:
+        if unit in self._done:
+            metrics.incr("journal.units_skipped", job=self.job)
+            return True
+        return False
+
+    def progress(self, unit: str) -> dict:
+        """Progresso parcial gravado por mark() (vazio se a unidade não começou)."""
+        return self._progress.get(unit, {})
+
+    def _put(self, unit: str, done: bool, progress: dict):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO units VALUES (?, ?, ?, ?, ?)",
+                               (self.run_id, unit, int(done), _dumps(progress), now))
+            self._conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (now, self.run_id))
+            if done:
+                self._done.add(unit)
+                self._progress.pop(unit, None)
+            else:
+                self._progress[unit] = progress
+
+    def mark(self, unit: str, **progress):
+        """Progresso parcial de uma unidade (ex.: linhas do CSV já gravadas)."""
+        self._put(unit, False, progress)
+
+    def complete(self, unit: str, **info):
+        self._put(unit, True, info)
+        metrics.incr("journal.units_completed", job=self.job)
+
+    def finish(self):
+        """Execução concluída: status done e unidades apagadas."""
+        with self._lock:
+            self._conn.execute("UPDATE runs SET status = 'done', updated_at = ? WHERE run_id = ?",
+                               (time.time(), self.run_id))
+            self._conn.execute("DELETE FROM units WHERE run_id = ?", (self.run_id,))
+        print(f"[journal] {self.job}: {self.run_id} concluída ({self.completed} unidades)")
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+def open_run(job: str, params: dict, resume: bool = False, key: str = "", same: tuple[str, ...] = (),
+             path: Path | None = None) -> Journal:
+    """
+    Abre uma execução de `job`. Com `resume`, reabre a última inacabada de
+    (job, key) — desde que os parâmetros listados em `same` não tenham mudado —
+    e devolve os parâmetros gravados nela em .params; senão cria uma nova.
+    """
+    conn = _connect(path)
+    prune(conn=conn)
+    row = None
+    if resume:
+        row = conn.execute("SELECT run_id, params FROM runs WHERE job = ? AND key = ? AND status = 'running' "
+                           "ORDER BY started_at DESC LIMIT 1", (job, key)).fetchone()
+        if row is not None:
+            stored = _loads(row[1])
+            changed = [p for p in same if _dumps(stored.get(p)) != _dumps(params.get(p))]
+            if changed:
+                print(f"[journal] {job}: {row[0]} tem outros {', '.join(changed)}; começando do zero")
+                row = None
+    label = f"{job}[{key}]" if key else job
+
+    if row is not None:
+        run_id = row[0]
+        units = {u: (bool(ok), _loads(p)) for u, ok, p in
+                 conn.execute("SELECT unit, done, progress FROM units WHERE run_id = ?", (run_id,))}
+        jr = Journal(conn, run_id, job, key, _loads(row[1]), True, units)
+        print(f"[journal] {label}: retomando {run_id} ({jr.completed} unidades concluídas)")
+        metrics.incr("journal.resumed", job=job)
+        return jr
+
+    if resume:
+        print(f"[journal] {label}: nada a retomar; execução nova")
+    # execução nova: as inacabadas do mesmo job/key deixam de ser retomáveis
+    stale = [r[0] for r in conn.execute("SELECT run_id FROM runs WHERE job = ? AND key = ? AND status = 'running'",
+                                        (job, key))]
+    now = time.time()
+    for rid in stale:
+        conn.execute("UPDATE runs SET status = 'abandoned', updated_at = ? WHERE run_id = ?", (now, rid))
+        conn.execute("DELETE FROM units WHERE run_id = ?", (rid,))
+    run_id = f"{job}-{datetime.now():%Y%m%d_%H%M%S}-{uuid.uuid4().hex[:6]}"
+    conn.execute("INSERT INTO runs VALUES (?, ?, ?, ?, 'running', ?, ?)", (run_id, job, key, _dumps(params), now, now))
+    return Journal(conn, run_id, job, key, _loads(_dumps(params)), False, {})
+
+def prune(days: float = KEEP_DAYS, conn: sqlite3.Connection | None = None, path: Path | None = None) -> int:
+    """Remove execuções (e unidades) sem atualização há mais de `days` dias. Retorna quantas."""
+    own = conn is None
+    conn = conn or _connect(path)
+    try:
+        cutoff = time.time() - days * 86400
+        old = [r[0] for r in conn.execute("SELECT run_id FROM runs WHERE updated_at < ?", (cutoff,))]
+        for rid in old:
+            conn.execute("DELETE FROM units WHERE run_id = ?", (rid,))
+            conn.execute("DELETE FROM runs WHERE run_id = ?", (rid,))
+        return len(old)
+    finally:
+        if own:
+            conn.close()
+
+def list_runs(path: Path | None = None) -> list[dict]:
+    conn = _connect(path)
+    try:
+        rows = conn.execute(
+            "SELECT r.run_id, r.job, r.key, r.status, r.started_at, r.updated_at, "
+            "       COALESCE(SUM(u.done), 0), COUNT(u.unit) - COALESCE(SUM(u.done), 0) "
+            "FROM runs r LEFT JOIN units u ON u.run_id = r.run_id "
+            "GROUP BY r.run_id ORDER BY r.started_at").fetchall()
+    finally:
+        conn.close()
+    cols = ("run_id", "job", "key", "status", "started_at", "updated_at", "done", "partial")
+    return [dict(zip(cols, r)) for r in rows]
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Diário de progresso das execuções (retomada com --resume).")
+    ap.add_argument("--path", default=None, help=f"Arquivo SQLite; default: env ETL_JOURNAL ou {JOURNAL_PATH}")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="Lista as execuções e as unidades concluídas/parciais")
+    p = sub.add_parser("prune", help="Remove execuções antigas")
+    p.add_argument("--days", type=float, default=KEEP_DAYS)
+    args = ap.parse_args()
+    if args.cmd == "list":
+        for r in list_runs(args.path):
+            print(f"{r['run_id']:<40} {r['job']:<8} {r['key'] or '-':<18} {r['status']:<9} "
+                  f"{datetime.fromtimestamp(r['updated_at']):%Y-%m-%d %H:%M} concluídas={r['done']} "
+                  f"parciais={r['partial']}")
+    else:
+        print(f"[journal] {prune(args.days, path=args.path)} execuções removidas")
@@ -0,0 +1,254 @@
+# etl/common/metrics.py
+"""
+Instrumentação leve das etapas: contadores, histogramas e timers em memória,
+exportados ao fim da execução como JSON lines (um arquivo por run) e,
+opcionalmente, no formato texto do Prometheus.
+
+Uso nos hot paths:
+    from etl.common import metrics
+    with metrics.timer("gold.aggregate", collection="raw_fires"):
+        rows = list(db.raw_fires.aggregate(pipe))
+    metrics.incr("fires.inserted")
+
+    h = metrics.histogram("fires.row_to_doc_seconds")   # laço apertado
+    t0 = time.perf_counter(); doc = row_to_doc(row); h.observe(time.perf_counter() - t0)
+
+Profiling opcional por etapa: `profile_stage("fires", mode="cprofile"|"sample")`.
+"""
+import bisect, cProfile, json, math, os, pstats, sys, threading, time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+# limites (segundos) log-espaçados: 1µs .. ~100s
+DEFAULT_BUCKETS = tuple(round(10 ** (e / 4), 9) for e in range(-24, 9))
+
+def _key(name: str, labels: dict) -> tuple:
+    return (name, tuple(sorted(labels.items())))
+
+class Histogram:
+    """Histograma de buckets fixos com contagem, soma, mín e máx (thread-safe)."""
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.bounds = tuple(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+            if value < self.min: self.min = value
+            if value > self.max: self.max = value
+
+    def quantile(self, q: float):
+        """Estimativa pelo limite superior do bucket que contém o quantil."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        acc = 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= rank and c:
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                return min(upper, self.max)
+        return self.max
+
+class _Timer:
+    __slots__ = ("hist", "t0")
+    def __init__(self, hist: Histogram):
+        self.hist = hist
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.t0)
+        return False
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: dict[tuple, float] = {}
+        self.histograms: dict[tuple, Histogram] = {}
+        self.timers: set[tuple] = set()
+
+    def incr(self, name: str, n: float = 1, **labels):
+        k = _key(name, labels)
+        with self._lock:
+            self.counters[k] = self.counters.get(k, 0) + n
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        k = _key(name, labels)
+        h = self.histograms.get(k)
+        if h is None:
+            with self._lock:
+                h = self.histograms.setdefault(k, Histogram())
+        return h
+
+    def observe(self, name: str, value: float, **labels):
+        self.histogram(name, **labels).observe(value)
+
+    def timer(self, name: str, **labels) -> _Timer:
+        k = _key(name, labels)
+        self.timers.add(k)
+        return _Timer(self.histogram(name, **labels))
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear(); self.histograms.clear(); self.timers.clear()
+
+    # ---------- export ----------
+    def snapshot(self) -> list[dict]:
+        out = []
+        with self._lock:
+            counters = dict(self.counters)
+            hists = dict(self.histograms)
+        for (name, labels), v in sorted(counters.items()):
+            out.append({"type": "counter", "name": name, "labels": dict(labels), "value": v})
+        for (name, labels), h in sorted(hists.items(), key=lambda kv: kv[0]):
+            out.append({
+                "type": "timer" if (name, labels) in self.timers else "histogram",
+                "name": name, "labels": dict(labels),
+                "count": h.count, "sum": h.sum,
+                "min": h.min if h.count else None, "max": h.max if h.count else None,
+                "p50": h.quantile(0.50), "p90": h.quantile(0.90), "p99": h.quantile(0.99),
+            })
+        return out
+
+    def write_jsonl(self, path, run_id: str, **extra) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        ts = datetime.now(timezone.utc).isoformat()
+        with open(path, "a", encoding="utf-8") as f:
+            for rec in self.snapshot():
+                f.write(json.dumps({"run_id": run_id, "ts": ts, **extra, **rec}, ensure_ascii=False) + "\n")
+        return path
+
+    def to_prometheus(self, prefix: str = "etl") -> str:
+        def pname(name, suffix=""):
+            return f"{prefix}_{name}".replace(".", "_").replace("-", "_") + suffix
+        def plabels(labels, extra=()):
+            items = list(labels) + list(extra)
+            if not items:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+        lines, typed = [], set()
+        with self._lock:
+            counters = dict(self.counters)
+            hists = dict(self.histograms)
+        for (name, labels), v in sorted(counters.items()):
+            n = pname(name, "_total")
+            if n not in typed:
+                lines.append(f"# TYPE {n} counter"); typed.add(n)
+            lines.append(f"{n}{plabels(labels)} {v}")
+        for (name, labels), h in sorted(hists.items(), key=lambda kv: kv[0]):
+            n = pname(name, "_seconds" if (name, labels) in self.timers and not name.endswith("_seconds") else "")
+            if n not in typed:
+                lines.append(f"# TYPE {n} histogram"); typed.add(n)
+            acc = 0
+            for bound, c in zip(h.bounds, h.counts):
+                acc += c
+                lines.append(f"{n}_bucket{plabels(labels, [('le', repr(bound))])} {acc}")
+            lines.append(f"{n}_bucket{plabels(labels, [('le', '+Inf')])} {h.count}")
+            lines.append(f"{n}_sum{plabels(labels)} {h.sum}")
+            lines.append(f"{n}_count{plabels(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.to_prometheus(), encoding="utf-8")
+        return path
+
+# registro padrão do processo
+REGISTRY = Registry()
+incr = REGISTRY.incr
+observe = REGISTRY.observe
+histogram = REGISTRY.histogram
+timer = REGISTRY.timer
+
+# ---------- profiling ----------
+class _Sampler(threading.Thread):
+    """
+    Profiler por amostragem (stdlib): a cada `interval` s captura a pilha das
+    threads da etapa (a thread que a chamou e as de nome `thread_prefix*`)
+    e acumula em formato "folded" (compatível com flamegraph.pl / speedscope).
+    """
+    def __init__(self, target_ident: int, thread_prefix: str, interval: float = 0.005):
+        super().__init__(daemon=True, name="metrics-sampler")
+        self.target_ident = target_ident
+        self.thread_prefix = thread_prefix
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_ev = threading.Event()
+
+    def _targets(self) -> set[int]:
+        ids = {self.target_ident}
+        for t in threading.enumerate():
+            if t.name.startswith(self.thread_prefix) and t.ident:
+                ids.add(t.ident)
+        return ids
+
+    def run(self):
+        while not self._stop_ev.wait(self.interval):
+            targets = self._targets()
+            for ident, frame in sys._current_frames().items():
+                if ident not in targets:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{Path(code.co_filename).name}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_ev.set()
+        self.join()
+
+@contextmanager
+def profile_stage(stage: str, mode: str | None, out_dir="logs/profiles", stamp: str | None = None):
+    """
+    Envolve a execução de uma etapa com profiling opcional.
+    mode: None (desligado) | "cprofile" (.prof + top 20 no stdout) | "sample" (.folded)
+    """
+    if not mode:
+        yield
+        return
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    stamp = stamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    if mode == "cprofile":
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            yield
+        finally:
+            prof.disable()
+            path = out / f"{stamp}_{stage}.prof"
+            prof.dump_stats(path)
+            print(f"[profile] {stage}: {path}")
+            pstats.Stats(prof, stream=sys.stdout).sort_stats("cumulative").print_stats(20)
+    elif mode == "sample":
+        interval = float(os.environ.get("PROFILE_SAMPLE_INTERVAL", "0.005"))
+        sampler = _Sampler(threading.get_ident(), thread_prefix=stage, interval=interval)
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            path = out / f"{stamp}_{stage}.folded"
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, n in sampler.stacks.most_common():
+                    f.write(f"{stack} {n}\n")
+            print(f"[profile] {stage}: {path} ({sum(sampler.stacks.values())} amostras)")
+    else:
+        raise ValueError(f"profile mode inválido: {mode!r} (use 'cprofile' ou 'sample')")
@@ -0,0 +1,91 @@
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
+
+@contextmanager
+def mongo_db(mongo_uri: str, db=None):
+    """
+    Entrega um Database do Mongo. Se `db` já vier pronto (ex.: cliente
+    compartilhado pelo orquestrador), reutiliza; senão abre e fecha um
+    cliente próprio, como os scripts sempre fizeram.
+    """
+    if db is not None:
+        yield db
+        return
+    cli = MongoClient(mongo_uri)
+    try:
+        yield cli.get_database()
+    finally:
+        cli.close()
+
+DUPLICATE_KEY = 11000
+
+def _dup_indexes(err: BulkWriteError) -> set[int]:
+    """Índices do lote recusados por chave duplicada; qualquer outro erro sobe."""
+    errs = err.details.get("writeErrors", [])
+    other = [e for e in errs if e.get("code") != DUPLICATE_KEY]
+    if other or err.details.get("writeConcernErrors"):
+        raise err
+    return {e["index"] for e in errs}
+
+def _key_id(key: dict) -> tuple:
+    """Chave comparável com o que volta do Mongo (datetime sem tz, em ms)."""
+    out = []
+    for k, v in sorted(key.items()):
+        if isinstance(v, datetime):
+            if v.tzinfo is not None:
+                v = v.astimezone(timezone.utc).replace(tzinfo=None)
+            v = v.replace(microsecond=v.microsecond // 1000 * 1000)
+        out.append((k, v))
+    return tuple(out)
+
+def _path(doc: dict, path: str):
+    for part in path.split("."):
+        doc = doc.get(part) if isinstance(doc, dict) else None
+    return doc
+
+def _missing(col_ts, docs: list[dict], keys: list[dict], idx: list[int], fields: dict[str, str]) -> set[int]:
+    """Dos índices `idx` (chave já reservada), os que não têm doc em col_ts. `fields`: campo da chave -> do doc."""
+    q: dict = {"ts": {"$gte": min(docs[i]["ts"] for i in idx), "$lte": max(docs[i]["ts"] for i in idx)}}
+    if len(fields) == 1:
+        (kf, path), = fields.items()
+        q[path] = {"$in": [keys[i][kf] for i in idx]}
+    else:
+        q["$or"] = [{fields[k]: v for k, v in keys[i].items()} for i in idx]
+    proj = {"_id": 0, **{p: 1 for p in fields.values()}}
+    found = {_key_id({k: _path(d, p) for k, p in fields.items()}) for d in col_ts.find(q, proj)}
+    return {i for i in idx if _key_id(keys[i]) not in found}
+
+def insert_dedup(col_ts, col_dedup, docs: list[dict], keys: list[dict | None],
+                 recover: dict[str, str] | None = None) -> tuple[int, int]:
+    """
+    Grava `docs` em lote no time-series, deduplicando pela coleção de chaves
+    únicas: reserva `keys[i]` em col_dedup (insert_many não ordenado) e só
+    grava os docs cuja reserva passou. Chave None => grava direto.
+    A reserva vem antes para ser atômica entre processos; se o processo morrer
+    entre ela e a gravação, as chaves ficam reservadas sem doc. Na retomada
+    desse lote, `recover` (campo da chave -> campo do doc em col_ts) faz as
+    chaves recusadas cujo doc não está em col_ts serem gravadas de novo.
+    Retorna (inseridos, duplicados).
+    """
+    with_key = [i for i, k in enumerate(keys) if k is not None]
+    dup: set[int] = set()
+    if with_key:
+        try:
+            col_dedup.insert_many([dict(keys[i]) for i in with_key], ordered=False)
+        except BulkWriteError as e:
+            dup = {with_key[j] for j in _dup_indexes(e)}
+    if dup and recover:
+        # só a 1ª ocorrência de cada chave que não foi reservada agora (repetidas no lote seguem duplicadas)
+        mine = {_key_id(keys[i]) for i in with_key if i not in dup}
+        first: dict[tuple, int] = {}
+        for i in sorted(dup):
+            first.setdefault(_key_id(keys[i]), i)
+        cand = [i for kid, i in first.items() if kid not in mine]
+        if cand:
+            dup -= _missing(col_ts, docs, keys, cand, recover)
+    batch = [d for i, d in enumerate(docs) if i not in dup]
+    if batch:
+        col_ts.insert_many(batch, ordered=False)
+    return len(batch), len(dup)
@@ -0,0 +1,261 @@
+# etl/common/refdata.py
+"""
+Snapshot de referência dos municípios (nome, UF, população, centróide),
+carregado uma vez e compartilhado em memória.
+
+- Fonte: coleção `ref_municipios` (já consolidada pelos loaders IBGE/coords).
+- Versão = hash do conteúdo da coleção (comando `dbHash`, calculado no servidor);
+  o snapshot só é reconstruído quando a coleção muda.
+- Persistência: Parquet colunar em data/ref/.cache/ref_municipios-<versão>.parquet,
+  então um processo novo carrega sem reler o Mongo.
+- Em memória: arrays NumPy por coluna + índice codigo_ibge -> linha (hash), para
+  lookups O(1) sem I/O nos hot paths.
+
+Os CSVs de data/ref/ também têm cache por hash de conteúdo (`cached_csv_frame`):
+o parse só roda de novo se os bytes do arquivo mudarem.
+"""
+import hashlib, json, os, threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from etl.common import metrics
+from etl.common.mongo import mongo_db
+
+CACHE_DIR = Path("data/ref/.cache")
+SNAPSHOT_FORMAT = 1   # muda se o layout do arquivo mudar
+COLUMNS = ["municipio_ibge", "municipio", "uf", "populacao", "lat", "lon", "area_km2"]
+
+_lock = threading.Lock()
+_snapshots: dict[str, "RefSnapshot"] = {}   # versão -> snapshot
+_current: "RefSnapshot | None" = None
+_frames: dict[str, pd.DataFrame] = {}       # chave de cache de CSV -> DataFrame
+
+@dataclass(frozen=True)
+class RefSnapshot:
+    version: str
+    codes: np.ndarray                 # int64, ordenado
+    municipio: np.ndarray             # object
+    uf: np.ndarray                    # object
+    populacao: np.ndarray             # float64 (NaN se ausente)
+    lat: np.ndarray                   # float64
+    lon: np.ndarray                   # float64
+    area_km2: np.ndarray              # float64
+    _index: pd.Index = field(repr=False, compare=False, default=None)
+    _pos: dict = field(repr=False, compare=False, default=None)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, version: str) -> "RefSnapshot":
+        df = _normalize_dim(df).sort_values("municipio_ibge", kind="stable").reset_index(drop=True)
+        codes = df["municipio_ibge"].to_numpy(dtype="int64")
+        return cls(
+            version=version,
+            codes=codes,
+            municipio=df["municipio"].to_numpy(dtype=object),
+            uf=df["uf"].to_numpy(dtype=object),
+            populacao=pd.to_numeric(df["populacao"], errors="coerce").to_numpy(dtype="float64"),
+            lat=pd.to_numeric(df["lat"], errors="coerce").to_numpy(dtype="float64"),
+            lon=pd.to_numeric(df["lon"], errors="coerce").to_numpy(dtype="float64"),
+            area_km2=pd.to_numeric(df["area_km2"], errors="coerce").to_numpy(dtype="float64"),
+            _index=pd.Index(codes),
+            _pos={int(c): i for i, c in enumerate(codes)},
+        )
+
+    def __len__(self):
+        return len(self.codes)
+
+    # ---------- lookups ----------
+    def row(self, code) -> int | None:
+        """Linha do município (O(1)) ou None."""
+        try:
+            return self._pos.get(int(code))
+        except (TypeError, ValueError):
+            return None
+
+    def rows(self, codes) -> np.ndarray:
+        """Vetorizado: array de linhas (-1 onde o código não existe)."""
+        return self._index.get_indexer(pd.to_numeric(pd.Series(codes), errors="coerce"))
+
+    def name(self, code):
+        i = self.row(code)
+        return None if i is None else self.municipio[i]
+
+    def uf_of(self, code):
+        i = self.row(code)
+        return None if i is None else self.uf[i]
+
+    def population(self, code):
+        i = self.row(code)
+        return None if i is None or np.isnan(self.populacao[i]) else int(self.populacao[i])
+
+    def centroid(self, code) -> tuple[float, float] | None:
+        i = self.row(code)
+        if i is None or np.isnan(self.lat[i]) or np.isnan(self.lon[i]):
+            return None
+        return float(self.lat[i]), float(self.lon[i])
+
+    def take(self, codes, column: str) -> np.ndarray:
+        """Vetorizado: valores de `column` para `codes` (NaN/None onde não há match)."""
+        idx = self.rows(codes)
+        src = getattr(self, column)
+        if src.dtype == object:
+            out = np.full(len(idx), None, dtype=object)
+        else:
+            out = np.full(len(idx), np.nan, dtype="float64")
+        ok = idx >= 0
+        out[ok] = src[idx[ok]]
+        return out
+
+    def to_frame(self) -> pd.DataFrame:
+        """Layout de dim_municipio (mesmas colunas de export_parquet.load_dim_municipio)."""
+        return pd.DataFrame({
+            "municipio_ibge": self.codes, "municipio": self.municipio, "uf": self.uf,
+            "populacao": pd.array(self.populacao, dtype="Int64"),
+            "lat": self.lat, "lon": self.lon, "area_km2": self.area_km2,
+        })
+
+# ---------- normalização ----------
+def _normalize_dim(df: pd.DataFrame) -> pd.DataFrame:
+    """Aplica o mesmo padrão de nomes/colunas de load_dim_municipio."""
+    if "municipio_ibge" not in df.columns and "codigo_ibge" in df.columns:
+        df = df.rename(columns={"codigo_ibge": "municipio_ibge"})
+    if "uf" not in df.columns and "uf_sigla" in df.columns:
+        df = df.rename(columns={"uf_sigla": "uf"})
+    for k in COLUMNS:
+        if k not in df.columns:
+            df[k] = np.nan if k not in ("municipio_ibge", "municipio", "uf", "populacao") else (0 if k == "populacao" else None)
+    df = df[COLUMNS].copy()
+    df["municipio_ibge"] = pd.to_numeric(df["municipio_ibge"], errors="coerce")
+    return df.dropna(subset=["municipio_ibge"])
+
+# ---------- versão / persistência ----------
+def collection_version(db, name: str = "ref_municipios") -> str:
+    """Hash do conteúdo da coleção calculado no servidor (dbHash); fallback lendo os docs."""
+    try:
+        res = db.command("dbHash", collections=[name])
+        md5 = (res.get("collections") or {}).get(name)
+        if md5:
+            return md5
+        if name not in db.list_collection_names():
+            return "empty"
+    except Exception:
+        pass
+    h = hashlib.md5()
+    for doc in db.get_collection(name).find({}, {"_id": 0}).sort("codigo_ibge", 1):
+        h.update(json.dumps(doc, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+def _snapshot_path(version: str) -> Path:
+    return CACHE_DIR / f"ref_municipios-v{SNAPSHOT_FORMAT}-{version}.parquet"
+
+def _atomic_write_table(table: pa.Table, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + f".tmp{os.getpid()}")
+    pq.write_table(table, tmp)
+    os.replace(tmp, path)
+
+def _prune(prefix: str, keep: Path):
+    for p in CACHE_DIR.glob(f"{prefix}*.parquet"):
+        if p != keep:
+            p.unlink(missing_ok=True)
+
+def _remember(snap: RefSnapshot) -> RefSnapshot:
+    global _current
+    with _lock:
+        _snapshots[snap.version] = snap
+        _current = snap
+    return snap
+
+def load_snapshot(mongo_uri: str, db=None, refresh: bool = False) -> RefSnapshot:
+    """
+    Snapshot atual de ref_municipios. Ordem: cache em memória -> arquivo Parquet
+    da mesma versão -> leitura da coleção (e grava o arquivo).
+    """
+    with mongo_db(mongo_uri, db) as db, metrics.timer("refdata.load_snapshot"):
+        version = collection_version(db)
+        if not refresh:
+            snap = _snapshots.get(version)
+            if snap is not None:
+                metrics.incr("refdata.cache_hit", level="memory")
+                return _remember(snap)
+            path = _snapshot_path(version)
+            if path.exists():
+                metrics.incr("refdata.cache_hit", level="file")
+                return _remember(RefSnapshot.from_frame(pq.read_table(path).to_pandas(), version))
+
+        metrics.incr("refdata.cache_miss")
+        rows = list(db.ref_municipios.find({}, {"_id": 0}))
+    df = _normalize_dim(pd.DataFrame(rows)) if rows else pd.DataFrame(columns=COLUMNS)
+    snap = RefSnapshot.from_frame(df, version)
+    path = _snapshot_path(version)
+    _atomic_write_table(pa.Table.from_pandas(snap.to_frame(), preserve_index=False), path)
+    _prune("ref_municipios-", keep=path)
+    return _remember(snap)
+
+def current_snapshot() -> RefSnapshot | None:
+    """Último snapshot carregado neste processo (sem I/O); None se nenhum."""
+    return _current
+
+def invalidate():
+    """Marca o snapshot corrente como velho (ex.: logo após gravar ref_municipios)."""
+    global _current
+    with _lock:
+        _current = None
+
+# ---------- detecção de mudança (upserts incrementais) ----------
+def is_missing(v) -> bool:
+    """None/NaN contam como ausentes (o Mongo guarda NaN do pandas como double NaN)."""
+    return v is None or (isinstance(v, float) and v != v)
+
+def _canon(v):
+    if isinstance(v, np.generic):
+        v = v.item()
+    return None if is_missing(v) else v
+
+def record_hash(rec: dict, fields=None) -> str:
+    """Hash canônico de um registro (ordem de chaves e tipos numpy não importam)."""
+    keys = sorted(fields if fields is not None else rec.keys())
+    payload = [[k, _canon(rec.get(k))] for k in keys]
+    return hashlib.sha1(json.dumps(payload, default=str, separators=(",", ":")).encode()).hexdigest()
+
+def stored_records(db, fields, name: str = "ref_municipios", key: str = "codigo_ibge") -> dict:
+    """Estado atual da coleção numa única leitura: {key: doc só com `fields`}."""
+    proj = {"_id": 0, key: 1, **{f: 1 for f in fields}}
+    with metrics.timer("refdata.read_state", collection=name):
+        return {d[key]: d for d in db.get_collection(name).find({}, proj) if key in d}
+
+# ---------- cache de CSVs por conteúdo ----------
+def file_digest(path: str | Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def cached_csv_frame(path: str | Path, parser: Callable[[str], pd.DataFrame], tag: str) -> pd.DataFrame:
+    """
+    Resultado de `parser(path)` em cache por (tag, hash dos bytes do arquivo):
+    memória do processo -> Parquet em data/ref/.cache -> parse de fato.
+    Devolve sempre uma cópia (o chamador pode alterar à vontade).
+    """
+    digest = file_digest(path)
+    key = f"{tag}-{digest}"
+    df = _frames.get(key)
+    if df is None:
+        cache_file = CACHE_DIR / f"csv-{tag}-{Path(path).stem}-{digest[:16]}.parquet"
+        if cache_file.exists():
+            metrics.incr("refdata.csv_cache_hit", tag=tag)
+            df = pq.read_table(cache_file).to_pandas()
+        else:
+            metrics.incr("refdata.csv_cache_miss", tag=tag)
+            df = parser(str(path))
+            _atomic_write_table(pa.Table.from_pandas(df, preserve_index=False), cache_file)
+            _prune(f"csv-{tag}-{Path(path).stem}-", keep=cache_file)
+        with _lock:
+            _frames[key] = df
+    return df.copy()
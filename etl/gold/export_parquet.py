@@ -1,45 +1,70 @@
 # etl/gold/export_parquet.py
-import os
+import os, time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 import pandas as pd
 import numpy as np
 import pyarrow as pa
+import pyarrow.compute as pc
 import pyarrow.parquet as pq
-from pymongo import MongoClient
-
+from etl.common import metrics
 from etl.common.config import load_settings
 from etl.common.dateutils import last_n_days_window
+from etl.common.mongo import mongo_db
+from etl.common.refdata import load_snapshot
+from etl.gold import fire_grid, hot_index, risk_baseline
+from etl.weather import buckets
 
 PARQUET_ROOT = "data/gold"
 
 def _write_partitioned(df: pd.DataFrame, base: Path, part_cols: list[str]):
     base.mkdir(parents=True, exist_ok=True)
-    # evita valores incompatíveis com parquet
-    df = df.replace([np.inf, -np.inf], np.nan)
-    for keys, sub in df.groupby(part_cols, dropna=False):
-        if not isinstance(keys, tuple):
-            keys = (keys,)
-        sub = sub.drop(columns=[c for c in part_cols if c in sub.columns], errors="ignore")
-        parts = []
-        for col, val in zip(part_cols, keys):
-            sval = "" if pd.isna(val) else str(val)
-            parts.append(f"{col}={sval}")
-        out_dir = base.joinpath(*parts)
-        out_dir.mkdir(parents=True, exist_ok=True)
-        pq.write_table(pa.Table.from_pandas(sub, preserve_index=False), out_dir / "part.parquet")
+    h_part = metrics.histogram("gold.write_partition_seconds", dataset=base.name)
+    with metrics.timer("gold.write_partitioned", dataset=base.name):
+        # evita valores incompatíveis com parquet
+        df = df.replace([np.inf, -np.inf], np.nan)
+        for keys, sub in df.groupby(part_cols, dropna=False):
+            t0 = time.perf_counter()
+            if not isinstance(keys, tuple):
+                keys = (keys,)
+            sub = sub.drop(columns=[c for c in part_cols if c in sub.columns], errors="ignore")
+            parts = []
+            for col, val in zip(part_cols, keys):
+                sval = "" if pd.isna(val) else str(val)
+                parts.append(f"{col}={sval}")
+            out_dir = base.joinpath(*parts)
+            out_dir.mkdir(parents=True, exist_ok=True)
+            pq.write_table(pa.Table.from_pandas(sub, preserve_index=False), out_dir / "part.parquet")
+            h_part.observe(time.perf_counter() - t0)
+            metrics.incr("gold.partitions_written", dataset=base.name)
+    metrics.incr("gold.rows_written", len(df), dataset=base.name)
 
 def _write_single(df: pd.DataFrame, out_file: Path):
     out_file.parent.mkdir(parents=True, exist_ok=True)
     df = df.replace([np.inf, -np.inf], np.nan)
-    table = pa.Table.from_pandas(df, preserve_index=False)
-    pq.write_table(table, out_file)
+    with metrics.timer("gold.write_single", dataset=out_file.stem):
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_table(table, out_file)
 
-def build_fact_fires_daily(mongo_uri: str, lookback_days: int = 180) -> pd.DataFrame:
+def _ts_match(lookback_days: int, start, end) -> dict:
+    """Janela explícita [start, end) ou os últimos `lookback_days` dias (até agora)."""
+    if start is not None and end is not None:
+        return {"$gte": start, "$lt": end}
     start, end = last_n_days_window(lookback_days)
-    cli = MongoClient(mongo_uri); db = cli.get_database()
+    return {"$gte": start, "$lte": end}
+
+def _first_match(lookback_days: int, start, end, uf_filter) -> dict:
+    """1º estágio: janela de tempo e, por shard, meta.uf (usa o índice {meta.uf:1, ts:-1})."""
+    match = {"ts": _ts_match(lookback_days, start, end)}
+    if uf_filter is not None:
+        match = {"meta.uf": uf_filter, **match}
+    return {"$match": match}
+
+def build_fact_fires_daily(mongo_uri: str, lookback_days: int = 180, db=None, start=None, end=None,
+                           uf_filter=None) -> pd.DataFrame:
     pipe = [
-        {"$match": {"ts": {"$gte": start, "$lte": end}}},
+        _first_match(lookback_days, start, end, uf_filter),
         {"$match": {"meta.municipio_ibge": {"$ne": None}}},
         {"$project": {
             "date": {"$dateTrunc": {"date": "$ts", "unit": "day"}},
@@ -67,7 +92,9 @@ def build_fact_fires_daily(mongo_uri: str, lookback_days: int = 180) -> pd.DataF
             "p95_conf":{"$arrayElemAt":["$p95_conf",0]}
         }}
     ]
-    rows = list(db.raw_fires.aggregate(pipe)); cli.close()
+    with mongo_db(mongo_uri, db) as db, metrics.timer("gold.aggregate", collection="raw_fires"):
+        rows = list(db.raw_fires.aggregate(pipe))
+    metrics.incr("gold.aggregate_rows", len(rows), collection="raw_fires")
     if not rows:
         return pd.DataFrame(columns=["date","municipio_ibge","uf","focos","p95_conf","year","month"])
     df = pd.DataFrame(rows)
@@ -78,11 +105,49 @@ def build_fact_fires_daily(mongo_uri: str, lookback_days: int = 180) -> pd.DataF
     df = df[["date","municipio_ibge","uf","focos","p95_conf","year","month"]]
     return df
 
-def build_weather_daily(mongo_uri: str, lookback_days: int = 180) -> pd.DataFrame:
-    start, end = last_n_days_window(lookback_days)
-    cli = MongoClient(mongo_uri); db = cli.get_database()
-    pipe = [
-        {"$match": {"ts": {"$gte": start, "$lte": end}}},
+def _bucket_match(lookback_days: int, start, end, uf_filter) -> dict:
+    """Mesma janela de _first_match sobre weather_buckets: `date` é o início do dia (UTC), então o 1º dia entra inteiro."""
+    window = _ts_match(lookback_days, start, end)
+    window["$gte"] = buckets.day_of(window["$gte"])
+    match = {"date": window, "municipio_ibge": {"$ne": None}}
+    if uf_filter is not None:
+        match = {"uf": uf_filter, **match}
+    return match
+
+def build_weather_daily(mongo_uri: str, lookback_days: int = 180, db=None, start=None, end=None,
+                        uf_filter=None) -> pd.DataFrame:
+    """
+    Estatísticas diárias por município. Com WEATHER_STORAGE=bucket lê
+    weather_buckets (um doc por município-dia, arrays horários) em vez de
+    agrupar as horas de raw_weather.
+    """
+    if buckets.storage_mode() == "bucket":
+        collection = buckets.COLLECTION
+        pipe = buckets.daily_stats_pipeline(_bucket_match(lookback_days, start, end, uf_filter))
+    else:
+        collection = "raw_weather"
+        pipe = _hourly_weather_pipeline(lookback_days, start, end, uf_filter)
+    with mongo_db(mongo_uri, db) as db, metrics.timer("gold.aggregate", collection=collection):
+        rows = list(db.get_collection(collection).aggregate(pipe))
+    metrics.incr("gold.aggregate_rows", len(rows), collection=collection)
+    if not rows:
+        return pd.DataFrame(columns=[
+            "date","municipio_ibge","uf","temp_mean","hum_min","wind_max","gust_max","cloud_mean","precip_sum","dew_mean",
+            "year","month"
+        ])
+    df = pd.DataFrame(rows)
+    df["date"] = pd.to_datetime(df["date"], utc=True).dt.date
+    df["year"] = pd.to_datetime(df["date"]).dt.year
+    df["month"] = pd.to_datetime(df["date"]).dt.month.astype(int)
+    df = df[[
+        "date","municipio_ibge","uf","temp_mean","hum_min","wind_max","gust_max","cloud_mean","precip_sum","dew_mean",
+        "year","month"
+    ]]
+    return df
+
+def _hourly_weather_pipeline(lookback_days: int, start, end, uf_filter) -> list[dict]:
+    return [
+        _first_match(lookback_days, start, end, uf_filter),
         {"$match": {"meta.municipio_ibge": {"$ne": None}}},
         {"$project": {
             "date": {"$dateTrunc": {"date": "$ts", "unit": "day"}},
@@ -111,49 +176,29 @@ def build_weather_daily(mongo_uri: str, lookback_days: int = 180) -> pd.DataFram
             "temp_mean":1,"hum_min":1,"wind_max":1,"gust_max":1,"cloud_mean":1,"precip_sum":1,"dew_mean":1
         }}
     ]
-    rows = list(db.raw_weather.aggregate(pipe)); cli.close()
-    if not rows:
-        return pd.DataFrame(columns=[
-            "date","municipio_ibge","uf","temp_mean","hum_min","wind_max","gust_max","cloud_mean","precip_sum","dew_mean",
-            "year","month"
-        ])
-    df = pd.DataFrame(rows)
-    df["date"] = pd.to_datetime(df["date"], utc=True).dt.date
-    df["year"] = pd.to_datetime(df["date"]).dt.year
-    df["month"] = pd.to_datetime(df["date"]).dt.month.astype(int)
-    df = df[[
-        "date","municipio_ibge","uf","temp_mean","hum_min","wind_max","gust_max","cloud_mean","precip_sum","dew_mean",
-        "year","month"
-    ]]
-    return df
 
-def load_dim_municipio(mongo_uri: str) -> pd.DataFrame:
-    cli = MongoClient(mongo_uri); db = cli.get_database()
-    rows = list(db.ref_municipios.find({}, {"_id":0}))
-    cli.close()
-    if not rows:
-        return pd.DataFrame(columns=["municipio_ibge","municipio","uf","populacao","lat","lon","area_km2"])
-    df = pd.DataFrame(rows)
-    # padroniza nomes/ordem
-    if "municipio_ibge" not in df.columns and "codigo_ibge" in df.columns:
-        df = df.rename(columns={"codigo_ibge": "municipio_ibge"})
-    if "uf" not in df.columns and "uf_sigla" in df.columns:
-        df = df.rename(columns={"uf_sigla": "uf"})
-    keep = ["municipio_ibge","municipio","uf","populacao","lat","lon","area_km2"]
-    for k in keep:
-        if k not in df.columns:
-            df[k] = np.nan if k not in ("municipio_ibge","municipio","uf","populacao") else (0 if k=="populacao" else None)
-    df = df[keep]
-    return df
+def load_dim_municipio(mongo_uri: str, db=None) -> pd.DataFrame:
+    # snapshot versionado de ref_municipios: só relê o Mongo se a coleção mudou
+    with metrics.timer("gold.load_dim"):
+        return load_snapshot(mongo_uri, db=db).to_frame()
 
-def _safe_norm(series: pd.Series) -> pd.Series:
-    s = pd.to_numeric(series, errors="coerce")
-    mn, mx = s.min(skipna=True), s.max(skipna=True)
+RISK_COLUMNS = [
+    "date","municipio_ibge","uf","temp_mean","hum_min","wind_max","gust_max","cloud_mean","precip_sum",
+    "focos","focos_3d","focos_3d_100k","risk_score","year","month"
+]
+RISK_COMPONENTS = ("wind", "hum", "rain", "fires")
+
+def _norm_between(s: pd.Series, mn, mx) -> pd.Series:
     if pd.isna(mn) or pd.isna(mx) or mx == mn:
         return pd.Series(np.zeros(len(s)), index=s.index)
     return (s - mn) / (mx - mn)
 
-def build_fact_risk_daily(fires_df: pd.DataFrame, weather_df: pd.DataFrame, dim_mun: pd.DataFrame) -> pd.DataFrame:
+def _safe_norm(series: pd.Series) -> pd.Series:
+    s = pd.to_numeric(series, errors="coerce")
+    return _norm_between(s, s.min(skipna=True), s.max(skipna=True))
+
+def _risk_inputs(fires_df: pd.DataFrame, weather_df: pd.DataFrame, dim_mun: pd.DataFrame) -> pd.DataFrame | None:
+    """Clima diário + focos/focos_3d/focos_3d_100k por município (None se não há clima)."""
     f = fires_df.copy()
     w = weather_df.copy()
     d = dim_mun.copy()
@@ -163,10 +208,7 @@ def build_fact_risk_daily(fires_df: pd.DataFrame, weather_df: pd.DataFrame, dim_
             df["municipio_ibge"] = pd.to_numeric(df["municipio_ibge"], errors="coerce").astype("Int64")
 
     if w.empty:
-        return pd.DataFrame(columns=[
-            "date","municipio_ibge","uf","temp_mean","hum_min","wind_max","gust_max","cloud_mean","precip_sum",
-            "focos","focos_3d","focos_3d_100k","risk_score","year","month"
-        ])
+        return None
 
     f3 = f.sort_values(["municipio_ibge","date"]).copy()
     if not f3.empty:
@@ -194,27 +236,62 @@ def build_fact_risk_daily(fires_df: pd.DataFrame, weather_df: pd.DataFrame, dim_
         fwd["focos_3d"] / (fwd["populacao"] / 100000.0),
         np.nan
     )
+    return fwd
 
-    comp_wind  = _safe_norm(fwd["wind_max"])
-    comp_hum   = _safe_norm((100 - pd.to_numeric(fwd["hum_min"], errors="coerce").clip(0,100)))
-    comp_rain  = _safe_norm((10 - pd.to_numeric(fwd["precip_sum"], errors="coerce")).clip(lower=0))
-    comp_fires = _safe_norm(fwd["focos_3d_100k"].fillna(0))
+def _risk_components(fwd: pd.DataFrame) -> dict[str, pd.Series]:
+    """Componentes do risco antes da normalização min–max."""
+    return {
+        "wind":  pd.to_numeric(fwd["wind_max"], errors="coerce"),
+        "hum":   pd.to_numeric((100 - pd.to_numeric(fwd["hum_min"], errors="coerce").clip(0,100)), errors="coerce"),
+        "rain":  pd.to_numeric((10 - pd.to_numeric(fwd["precip_sum"], errors="coerce")).clip(lower=0), errors="coerce"),
+        "fires": pd.to_numeric(fwd["focos_3d_100k"].fillna(0), errors="coerce"),
+    }
 
-    fwd["risk_score"] = (comp_wind + comp_hum + comp_rain + comp_fires) / 4.0
+def risk_bounds(fwd: pd.DataFrame) -> dict[str, tuple[float, float]]:
+    """(min, max) de cada componente — combináveis entre partes (ver merge_bounds)."""
+    return {k: (s.min(skipna=True), s.max(skipna=True)) for k, s in _risk_components(fwd).items()}
 
-    out = fwd[[
-        "date","municipio_ibge","uf","temp_mean","hum_min","wind_max","gust_max","cloud_mean","precip_sum",
-        "focos","focos_3d","focos_3d_100k","risk_score","year","month"
-    ]].copy()
+def merge_bounds(parts: list[dict]) -> dict[str, tuple[float, float]]:
+    out = {}
+    for k in RISK_COMPONENTS:
+        mins = [p[k][0] for p in parts if k in p and not pd.isna(p[k][0])]
+        maxs = [p[k][1] for p in parts if k in p and not pd.isna(p[k][1])]
+        out[k] = (min(mins) if mins else np.nan, max(maxs) if maxs else np.nan)
     return out
 
-def main():
-    s = load_settings()
+def score_risk(fwd: pd.DataFrame, bounds: dict | None = None, clip: bool = False) -> pd.DataFrame:
+    """
+    risk_score = média dos 4 componentes normalizados, pelos próprios dados ou
+    por `bounds`. `clip=True` (baseline) limita cada componente a [0, 1].
+    """
+    bounds = bounds or risk_bounds(fwd)
+    comps = _risk_components(fwd)
+    fwd = fwd.copy()
+    normed = (_norm_between(comps[k], *bounds[k]) for k in RISK_COMPONENTS)
+    if clip:
+        normed = (c.clip(0, 1) for c in normed)
+    fwd["risk_score"] = sum(normed) / 4.0
+    return fwd[RISK_COLUMNS].copy()
+
+def build_fact_risk_daily(fires_df: pd.DataFrame, weather_df: pd.DataFrame, dim_mun: pd.DataFrame,
+                          baseline=None) -> pd.DataFrame:
+    """Com `baseline` (etl/gold/risk_baseline.py) o score é estável; sem ele, min–max da janela (legado)."""
+    fwd = _risk_inputs(fires_df, weather_df, dim_mun)
+    if fwd is None:
+        return pd.DataFrame(columns=RISK_COLUMNS)
+    if baseline is not None:
+        return score_risk(fwd, baseline.bounds, clip=True)
+    return score_risk(fwd)
 
-    fires_df   = build_fact_fires_daily(s.mongo_uri, lookback_days=180)
-    weather_df = build_weather_daily(s.mongo_uri, lookback_days=180)
-    dim_mun    = load_dim_municipio(s.mongo_uri)
+def _active_baseline():
+    b = risk_baseline.load_current()
+    if b is None:
+        print("[gold] risk_score: sem baseline, normalizando pela janela (legado)")
+    else:
+        print(f"[gold] risk_score: baseline {b.version} ({b.period['start']} → {b.period['end']})")
+    return b
 
+def write_gold(fires_df: pd.DataFrame, weather_df: pd.DataFrame, dim_mun: pd.DataFrame):
     root = Path(PARQUET_ROOT)
 
     # fact_fires_daily
@@ -230,17 +307,22 @@ def main():
 
     # fact_risk_daily
     if not weather_df.empty:
-        risk_df = build_fact_risk_daily(fires_df, weather_df, dim_mun)
+        with metrics.timer("gold.build_risk"):
+            risk_df = build_fact_risk_daily(fires_df, weather_df, dim_mun, baseline=_active_baseline())
         _write_partitioned(risk_df, root / "fact_risk_daily", ["uf","year","month"])
         _write_single(
             risk_df.sort_values(["uf","date","municipio_ibge"]),
             root / "fact_risk_daily.parquet"
         )
         print("[gold] fact_risk_daily OK (partitioned + single)")
+        write_hot_index(risk_df, dim_mun)
     else:
         print("[gold] fact_risk_daily: clima vazio")
 
-    # dim_municipio
+    write_dim(dim_mun)
+
+def write_dim(dim_mun: pd.DataFrame):
+    root = Path(PARQUET_ROOT)
     if not dim_mun.empty:
         # arquivo único (e ainda mantemos o antigo dentro da pasta)
         _write_single(dim_mun, root / "dim_municipio.parquet")
@@ -250,5 +332,271 @@ def main():
     else:
         print("[gold] dim_municipio: vazio")
 
+def write_hot_index(risk_df: pd.DataFrame | None = None, dim_mun: pd.DataFrame | None = None):
+    """Índice quente do risco mais recente (etl/gold/hot_index.py); sem frames, lê os arquivos únicos."""
+    root = Path(PARQUET_ROOT)
+    if risk_df is not None and dim_mun is not None:
+        out = hot_index.publish(risk_df, dim_mun, root=root / "hot_index")
+    else:
+        out = hot_index.publish_from_gold(root, root=root / "hot_index")
+    print(f"[gold] hot_index OK ({out})" if out else "[gold] hot_index: sem fact_risk_daily")
+
+def write_fire_grid(mongo_uri: str, lookback_days: int = 180, db=None):
+    """Grade de focos por dia/nível (etl/gold/fire_grid.py); só os dias novos são lidos do Mongo."""
+    if os.environ.get("FIRE_GRID", "1") == "0":
+        return
+    end = datetime.now(timezone.utc).date()
+    with mongo_db(mongo_uri, db) as db:
+        out = fire_grid.update(db, end - timedelta(days=lookback_days - 1), end,
+                               root=Path(PARQUET_ROOT) / "fire_grid")
+    print(f"[gold] fire_grid OK ({out['days']} dias recalculados, {out['points']} focos)")
+
+# ---------- carry do focos_3d entre janelas ----------
+CARRY_ROWS = 2   # rolling(3) do focos_3d é por linha: linhas anteriores necessárias por município
+FIRES_COLUMNS = ["date", "municipio_ibge", "uf", "focos", "p95_conf", "year", "month"]
+
+def _as_date(d):
+    return d.date() if isinstance(d, datetime) else d
+
+def fires_carry(fires: pd.DataFrame) -> pd.DataFrame:
+    """Últimas CARRY_ROWS linhas de focos por município (entrada do rolling da janela seguinte)."""
+    if fires.empty:
+        return fires
+    f = fires.sort_values(["municipio_ibge", "date"])
+    return f.groupby("municipio_ibge", dropna=False).tail(CARRY_ROWS)
+
+def gold_fires_carry(since, before) -> pd.DataFrame:
+    """
+    Carry do focos_3d lido das partições já gravadas de fact_fires_daily: as
+    últimas CARRY_ROWS linhas de cada município com since <= date < before.
+    `since` é o início da janela de um gold completo equivalente (o rolling
+    do legado não olha antes dele). Uma partição por vez; memória ~2 x municípios.
+    """
+    since, before = _as_date(since), _as_date(before)
+    base = Path(PARQUET_ROOT) / "fact_fires_daily"
+    carry = None
+    for f in base.glob("uf=*/year=*/month=*/part.parquet"):
+        kv = dict(p.split("=", 1) for p in f.relative_to(base).parts[:-1])
+        ym = (int(kv["year"]), int(kv["month"]))
+        if not (since.year, since.month) <= ym <= (before.year, before.month):
+            continue
+        df = pq.ParquetFile(f).read().to_pandas()
+        df = df[(df["date"] >= since) & (df["date"] < before)]
+        if df.empty:
+            continue
+        df = df.assign(uf=kv["uf"] or None, year=ym[0], month=ym[1])
+        carry = fires_carry(df if carry is None else pd.concat([carry, df], ignore_index=True))
+    if carry is None:
+        return pd.DataFrame(columns=FIRES_COLUMNS)
+    return carry[FIRES_COLUMNS].reset_index(drop=True)
+
+def _with_carry(carry: pd.DataFrame, fires: pd.DataFrame) -> pd.DataFrame:
+    return pd.concat([carry, fires], ignore_index=True) if not carry.empty else fires
+
+# ---------- backfill: uma janela (mês) por vez ----------
+def write_gold_window(mongo_uri: str, start, end, db=None, dim_mun: pd.DataFrame | None = None,
+                      carry_since=None) -> dict:
+    """
+    Agrega [start, end) e grava só as partições uf/year/month da janela (sem
+    os arquivos únicos). Com janelas alinhadas ao mês, cada partição pertence
+    a uma única janela.
+    O focos_3d continua o das janelas anteriores: o carry vem das partições
+    de fact_fires_daily com carry_since <= date < start (None = sem histórico),
+    então as janelas precisam rodar em ordem para o resultado ser igual ao de
+    um gold completo desde carry_since.
+    Sem baseline ativo, o risk_score normaliza (min–max) dentro da janela.
+    """
+    root = Path(PARQUET_ROOT)
+    fires_df   = build_fact_fires_daily(mongo_uri, db=db, start=start, end=end)
+    weather_df = build_weather_daily(mongo_uri, db=db, start=start, end=end)
+    if dim_mun is None:
+        dim_mun = load_dim_municipio(mongo_uri, db=db)
+    carry = gold_fires_carry(carry_since, start) if carry_since is not None else pd.DataFrame(columns=FIRES_COLUMNS)
+
+    out = {"fires_rows": len(fires_df), "risk_rows": 0}
+    if not fires_df.empty:
+        _write_partitioned(fires_df, root / "fact_fires_daily", ["uf","year","month"])
+    if not weather_df.empty:
+        with metrics.timer("gold.build_risk"):
+            risk_df = build_fact_risk_daily(_with_carry(carry, fires_df), weather_df, dim_mun,
+                                            baseline=risk_baseline.load_current())
+        _write_partitioned(risk_df, root / "fact_risk_daily", ["uf","year","month"])
+        out["risk_rows"] = len(risk_df)
+    return out
+
+def rebuild_single(dataset: str, since=None) -> int:
+    """
+    Remonta data/gold/<dataset>.parquet a partir das partições uf/year/month,
+    uma partição por vez (ParquetWriter), na ordem uf, date, municipio_ibge e
+    com as colunas do arquivo único de write_gold. `since` (date) limita às
+    datas >= since. Memória limitada a uma partição. Retorna o número de linhas.
+    """
+    root = Path(PARQUET_ROOT)
+    base = root / dataset
+    parts = []
+    for f in base.glob("uf=*/year=*/month=*/part.parquet"):
+        kv = dict(p.split("=", 1) for p in f.relative_to(base).parts[:-1])
+        key = (kv["uf"], int(kv["year"]), int(kv["month"]))
+        if since is None or key[1:] >= (since.year, since.month):
+            parts.append((key, f))
+    if not parts:
+        return 0
+    parts.sort(key=lambda x: x[0])
+
+    # schema único: tipos promovidos entre partições (ex.: coluna toda nula numa delas)
+    file_schema = pa.unify_schemas([pq.read_schema(f).remove_metadata() for _, f in parts],
+                                   promote_options="permissive")
+    head = [c for c in ("date", "municipio_ibge") if c in file_schema.names]
+    rest = [file_schema.field(c) for c in file_schema.names if c not in head]
+    schema = pa.schema([file_schema.field(c) for c in head] + [pa.field("uf", pa.string())] + rest +
+                       [pa.field("year", pa.int32()), pa.field("month", pa.int64())])
+
+    out_file = root / f"{dataset}.parquet"
+    tmp = out_file.with_suffix(".parquet.tmp")
+    rows = 0
+    with metrics.timer("gold.rebuild_single", dataset=dataset), pq.ParquetWriter(tmp, schema) as writer:
+        for (uf, year, month), f in parts:
+            t = pq.read_table(f)
+            if since is not None and "date" in t.column_names:
+                t = t.filter(pc.greater_equal(t.column("date"), pa.scalar(since, pa.date32())))
+            n = t.num_rows
+            cols = {c: t.column(c) for c in t.column_names}
+            cols["uf"] = pa.array([uf or None] * n, pa.string())
+            cols["year"] = pa.array([year] * n, pa.int32())
+            cols["month"] = pa.array([month] * n, pa.int64())
+            t = pa.table([cols[c].cast(fld.type) if c in cols else pa.nulls(n, fld.type)
+                          for c, fld in zip(schema.names, schema)], schema=schema)
+            order = [(c, "ascending") for c in ("date", "municipio_ibge") if c in schema.names]
+            writer.write_table(t.sort_by(order) if order else t)
+            rows += n
+    os.replace(tmp, out_file)
+    return rows
+
+# ---------- incremental: só os dias recentes (requer baseline) ----------
+INCREMENTAL_DAYS = int(os.environ.get("GOLD_INCREMENTAL_DAYS", "3"))   # dias recalculados a cada execução
+
+def _merge_partitioned(df: pd.DataFrame, base: Path, part_cols: list[str], since):
+    """
+    Substitui nas partições uf/year/month as linhas com date >= since pelas de
+    `df` (o resto da partição fica como está). Partições dos meses afetados
+    sem linhas novas também perdem as linhas >= since.
+    """
+    months = {(d.year, d.month) for d in pd.date_range(since, datetime.now(timezone.utc).date())}
+    targets = {}
+    for f in base.glob("uf=*/year=*/month=*/part.parquet"):
+        kv = dict(p.split("=", 1) for p in f.relative_to(base).parts[:-1])
+        if (int(kv["year"]), int(kv["month"])) in months:
+            targets[(kv["uf"], kv["year"], kv["month"])] = None
+    df = df.replace([np.inf, -np.inf], np.nan)
+    groups = {}
+    for keys, sub in df.groupby(part_cols, dropna=False):
+        keys = tuple("" if pd.isna(v) else str(v) for v in keys)
+        groups[keys] = sub.drop(columns=part_cols)
+        targets[keys] = None
+
+    h_part = metrics.histogram("gold.write_partition_seconds", dataset=base.name)
+    with metrics.timer("gold.merge_partitioned", dataset=base.name):
+        for keys in targets:
+            t0 = time.perf_counter()
+            out_dir = base.joinpath(*[f"{c}={v}" for c, v in zip(part_cols, keys)])
+            f = out_dir / "part.parquet"
+            old = pq.ParquetFile(f).read().to_pandas() if f.exists() else None
+            if old is not None:
+                old = old[pd.to_datetime(old["date"]) < pd.Timestamp(since)]
+            frames = [x for x in (old, groups.get(keys)) if x is not None and not x.empty]
+            if not frames:
+                f.unlink(missing_ok=True)
+                continue
+            merged = pd.concat(frames, ignore_index=True).sort_values(["date", "municipio_ibge"], kind="stable")
+            out_dir.mkdir(parents=True, exist_ok=True)
+            pq.write_table(pa.Table.from_pandas(merged, preserve_index=False), f)
+            h_part.observe(time.perf_counter() - t0)
+            metrics.incr("gold.partitions_written", dataset=base.name)
+    metrics.incr("gold.rows_written", len(df), dataset=base.name)
+
+def write_gold_incremental(mongo_uri: str, days: int = INCREMENTAL_DAYS, lookback_days: int = 180, db=None) -> bool:
+    """
+    Recalcula só os últimos `days` dias (focos e risco) e os mescla nas
+    partições; os arquivos únicos são remontados das partições (janela de
+    `lookback_days`). Sem baseline ativo não há como anexar sem mudar o
+    histórico: devolve False e o chamador faz o gold completo.
+    """
+    baseline = _active_baseline()
+    if baseline is None:
+        return False
+    root = Path(PARQUET_ROOT)
+    now = datetime.now(timezone.utc)
+    since = (now - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+    print(f"[gold] incremental: recalculando desde {since.date()}")
+
+    window_start = last_n_days_window(lookback_days)[0].date()
+    # focos_3d: as 2 linhas anteriores de cada município, como no gold completo (antes do merge)
+    carry      = gold_fires_carry(window_start, since)
+    fires_df   = build_fact_fires_daily(mongo_uri, db=db, start=since, end=now)
+    weather_df = build_weather_daily(mongo_uri, db=db, start=since, end=now)
+    dim_mun    = load_dim_municipio(mongo_uri, db=db)
+
+    _merge_partitioned(fires_df, root / "fact_fires_daily", ["uf","year","month"], since.date())
+    with metrics.timer("gold.build_risk"):
+        risk_df = build_fact_risk_daily(_with_carry(carry, fires_df), weather_df, dim_mun, baseline=baseline)
+    _merge_partitioned(risk_df, root / "fact_risk_daily", ["uf","year","month"], since.date())
+    print(f"[gold] incremental: focos={len(fires_df)} risco={len(risk_df)} linhas novas")
+
+    for dataset in ("fact_fires_daily", "fact_risk_daily"):
+        rows = rebuild_single(dataset, since=window_start)
+        print(f"[gold] {dataset} OK (partitioned + single, incremental; {rows} linhas)")
+    write_dim(dim_mun)
+    write_hot_index()
+    return True
+
+def main(db=None, shards: int | None = None, incremental: bool | None = None, streaming: bool | None = None,
+         resume: bool | None = None):
+    s = load_settings()
+    shards = int(os.environ.get("GOLD_SHARDS", "0")) if shards is None else shards
+    incremental = os.environ.get("GOLD_INCREMENTAL", "0") == "1" if incremental is None else incremental
+    streaming = os.environ.get("GOLD_STREAMING", "0") == "1" if streaming is None else streaming
+    resume = os.environ.get("ETL_RESUME", "0") == "1" if resume is None else resume
+
+    if incremental:
+        if write_gold_incremental(s.mongo_uri, db=db):
+            return write_fire_grid(s.mongo_uri, db=db)
+        print("[gold] incremental indisponível sem baseline; gerando o gold completo")
+
+    if streaming:
+        # janelas mensais em sequência, memória de uma janela (etl/gold/streaming.py)
+        from etl.gold.streaming import run_streaming
+        lookback = int(os.environ.get("GOLD_LOOKBACK_DAYS", "180"))
+        out = run_streaming(s.mongo_uri, lookback_days=lookback, db=db, resume=resume)
+        write_fire_grid(s.mongo_uri, lookback_days=lookback, db=db)
+        return out
+
+    if shards > 0:
+        # extração/risco/escrita por grupo de UF em processos (etl/gold/sharded.py)
+        from etl.gold.sharded import run_sharded
+        out = run_sharded(s.mongo_uri, lookback_days=180, shards=shards, db=db)
+        write_fire_grid(s.mongo_uri, db=db)
+        return out
+
+    fires_df   = build_fact_fires_daily(s.mongo_uri, lookback_days=180, db=db)
+    weather_df = build_weather_daily(s.mongo_uri, lookback_days=180, db=db)
+    dim_mun    = load_dim_municipio(s.mongo_uri, db=db)
+
+    write_gold(fires_df, weather_df, dim_mun)
+    write_fire_grid(s.mongo_uri, db=db)
+
 if __name__ == "__main__":
-    main()
+    import argparse
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--shards", type=int, default=None,
+                    help="Grupos de UF em processos paralelos (0 = monolítico; default: env GOLD_SHARDS ou 0)")
+    ap.add_argument("--incremental", action="store_true", default=None,
+                    help=f"Só os últimos GOLD_INCREMENTAL_DAYS ({INCREMENTAL_DAYS}) dias, mesclados nas partições "
+                         "(requer baseline; env GOLD_INCREMENTAL=1)")
+    ap.add_argument("--streaming", action="store_true", default=None,
+                    help="Janelas mensais em sequência com memória limitada (GOLD_LOOKBACK_DAYS, GOLD_WINDOW_DAYS; "
+                         "env GOLD_STREAMING=1)")
+    ap.add_argument("--resume", action="store_true", default=None,
+                    help="Com --streaming e baseline: pula os meses já publicados pela execução interrompida "
+                         "(logs/journal; env ETL_RESUME=1)")
+    args = ap.parse_args()
+    main(shards=args.shards, incremental=args.incremental, streaming=args.streaming, resume=args.resume)
@@ -0,0 +1,287 @@
+# etl/gold/fire_grid.py
+"""
+Grade espaço-temporal de focos para os mapas do relatório (densidade por
+zoom nas páginas Overview e Risk & Weather), sem puxar os pontos de
+raw_fires do Mongo a cada visual.
+
+Os focos são contados por dia em células lat/lon regulares, em vários níveis
+(FIRE_GRID_LEVELS, lado da célula em graus, do mais grosso ao mais fino;
+default 1.0, 0.25, 0.05 ~ 110 km, 28 km, 5,5 km). A célula é
+    ix = floor((lon + 180) / cell), iy = floor((lat + 90) / cell),
+    tile = iy * n_cols + ix            (n_cols = 360 / cell)
+toda em NumPy (np.unique sobre a chave dia x tile + bincount).
+
+Saída em data/gold/fire_grid/:
+    level=<n>/year=<a>/month=<m>/part.parquet   date, tile, ix, iy, focos, conf_mean (por tile, date)
+    _index.parquet                              um registro por (nível, tile) já visto:
+                                                cell_deg, ix, iy, bbox, centro, 1º/último dia
+    _built.json                                 níveis e dias já processados
+
+Incremental: só os dias da janela que ainda não estão em _built.json, mais os
+últimos FIRE_GRID_REFRESH_DAYS (focos recentes ainda chegam), são lidos do
+Mongo e substituídos nas partições dos seus meses. Mudar os níveis refaz tudo.
+
+    python -m etl.gold.fire_grid build                      # últimos 180 dias (incremental)
+    python -m etl.gold.fire_grid build --start 2024-01-01 --end 2024-12-31
+    python -m etl.gold.fire_grid tiles --level 1 --start 2025-10-01 --end 2025-10-14 --bbox -20,-60,-5,-40
+"""
+import json, os, shutil
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from etl.common import metrics
+
+GRID_DIR = Path("data/gold/fire_grid")
+LEVELS = tuple(float(x) for x in os.environ.get("FIRE_GRID_LEVELS", "1.0,0.25,0.05").split(","))
+REFRESH_DAYS = int(os.environ.get("FIRE_GRID_REFRESH_DAYS", "3"))
+ROW_GROUP = 32_768
+
+SCHEMA = pa.schema([
+    ("date", pa.date32()), ("tile", pa.int64()), ("ix", pa.int32()), ("iy", pa.int32()),
+    ("focos", pa.int32()), ("conf_mean", pa.float32()),
+])
+
+def n_cols(cell: float) -> int:
+    return int(round(360.0 / cell))
+
+def tile_bounds(ix, iy, cell: float) -> dict:
+    """bbox e centro das células (arrays)."""
+    lon_min = np.asarray(ix) * cell - 180.0
+    lat_min = np.asarray(iy) * cell - 90.0
+    return {"lat_min": lat_min, "lat_max": lat_min + cell, "lon_min": lon_min, "lon_max": lon_min + cell,
+            "lat": lat_min + cell / 2, "lon": lon_min + cell / 2}
+
+# ---------- binning ----------
+def bin_points(days: np.ndarray, lat: np.ndarray, lon: np.ndarray, conf: np.ndarray, cell: float) -> pd.DataFrame:
+    """
+    Focos (dia datetime64[D], lat, lon, confiança com NaN) -> uma linha por
+    (date, tile) com a contagem e a confiança média, ordenada por date, tile.
+    """
+    ok = np.isfinite(lat) & np.isfinite(lon) & (np.abs(lat) <= 90) & (np.abs(lon) <= 180)
+    days, lat, lon, conf = days[ok], lat[ok], lon[ok], conf[ok]
+    if not len(days):
+        return SCHEMA.empty_table().to_pandas()
+    cols = n_cols(cell)
+    ix = np.minimum(np.floor((lon + 180.0) / cell).astype(np.int64), cols - 1)
+    iy = np.minimum(np.floor((lat + 90.0) / cell).astype(np.int64), int(round(180.0 / cell)) - 1)
+    tile = iy * cols + ix
+    ncells = cols * int(round(180.0 / cell))
+    day0 = days.min()
+    key = (days - day0).astype(np.int64) * ncells + tile
+    uniq, inv, focos = np.unique(key, return_inverse=True, return_counts=True)
+    has_conf = np.isfinite(conf)
+    conf_sum = np.bincount(inv, weights=np.where(has_conf, conf, 0.0), minlength=len(uniq))
+    conf_n = np.bincount(inv, weights=has_conf, minlength=len(uniq))
+    tiles = uniq % ncells
+    with np.errstate(invalid="ignore", divide="ignore"):
+        conf_mean = np.where(conf_n > 0, conf_sum / conf_n, np.nan)
+    return pd.DataFrame({
+        "date": (day0 + (uniq // ncells).astype("timedelta64[D]")).astype("datetime64[D]"),
+        "tile": tiles, "ix": (tiles % cols).astype(np.int32), "iy": (tiles // cols).astype(np.int32),
+        "focos": focos.astype(np.int32), "conf_mean": conf_mean.astype(np.float32),
+    })
+
+# ---------- Mongo ----------
+def read_points(db, start: datetime, end: datetime) -> dict[str, np.ndarray]:
+    """Focos de raw_fires em [start, end) só com ts/lat/lon/confiança, já em arrays."""
+    cur = db.raw_fires.find({"ts": {"$gte": start, "$lt": end}},
+                            {"_id": 0, "ts": 1, "lat": 1, "lon": 1, "confianca": 1}, batch_size=50_000)
+    with metrics.timer("gold.fire_grid_read"):
+        df = pd.DataFrame(list(cur), columns=["ts", "lat", "lon", "confianca"])
+    metrics.incr("gold.fire_grid_points", len(df))
+    ts = pd.to_datetime(df["ts"], utc=True).dt.tz_localize(None)
+    return {
+        "days": ts.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]"),
+        "lat": pd.to_numeric(df["lat"], errors="coerce").to_numpy(dtype=float),
+        "lon": pd.to_numeric(df["lon"], errors="coerce").to_numpy(dtype=float),
+        "conf": pd.to_numeric(df["confianca"], errors="coerce").to_numpy(dtype=float),
+    }
+
+# ---------- escrita ----------
+def _part_file(root: Path, level: int, year: int, month: int) -> Path:
+    return root / f"level={level}" / f"year={year}" / f"month={month}" / "part.parquet"
+
+def _replace_days(root: Path, level: int, year: int, month: int, days: set, new: pd.DataFrame):
+    """Troca na partição do mês as linhas dos `days` pelas de `new` (já só desse mês)."""
+    f = _part_file(root, level, year, month)
+    frames = []
+    if f.exists():
+        old = pq.ParquetFile(f).read()
+        keep = pc.invert(pc.is_in(old.column("date"), value_set=pa.array(sorted(days), pa.date32())))
+        frames.append(old.filter(keep).cast(SCHEMA))
+    if not new.empty:
+        frames.append(pa.Table.from_pandas(new.assign(date=new["date"].dt.date), schema=SCHEMA,
+                                           preserve_index=False))
+    table = pa.concat_tables(frames) if frames else SCHEMA.empty_table()
+    if table.num_rows == 0:
+        f.unlink(missing_ok=True)
+        return
+    f.parent.mkdir(parents=True, exist_ok=True)
+    tmp = f.with_suffix(".parquet.tmp")
+    # ordem por tile (faixa de latitude, depois longitude): as estatísticas de iy/ix dos
+    # row groups podam o recorte por bbox
+    pq.write_table(table.sort_by([("tile", "ascending"), ("date", "ascending")]), tmp, row_group_size=ROW_GROUP)
+    os.replace(tmp, f)
+    metrics.incr("gold.partitions_written", dataset="fire_grid")
+
+def _update_index(root: Path, levels: tuple, binned: dict[int, pd.DataFrame], reset: bool):
+    f = root / "_index.parquet"
+    frames = [] if reset or not f.exists() else [pq.read_table(f).to_pandas()]
+    for level, df in binned.items():
+        if df.empty:
+            continue
+        g = df.groupby("tile", as_index=False).agg(ix=("ix", "first"), iy=("iy", "first"),
+                                                   first_date=("date", "min"), last_date=("date", "max"))
+        g["first_date"] = g["first_date"].dt.date
+        g["last_date"] = g["last_date"].dt.date
+        frames.append(g.assign(level=level, cell_deg=levels[level],
+                               **tile_bounds(g["ix"].to_numpy(), g["iy"].to_numpy(), levels[level])))
+    if not frames:
+        return
+    idx = pd.concat(frames, ignore_index=True)
+    idx = idx.groupby(["level", "tile"], as_index=False).agg(
+        cell_deg=("cell_deg", "first"), ix=("ix", "first"), iy=("iy", "first"),
+        lat_min=("lat_min", "first"), lat_max=("lat_max", "first"),
+        lon_min=("lon_min", "first"), lon_max=("lon_max", "first"), lat=("lat", "first"), lon=("lon", "first"),
+        first_date=("first_date", "min"), last_date=("last_date", "max"))
+    tmp = f.with_suffix(".parquet.tmp")
+    pq.write_table(pa.Table.from_pandas(idx, preserve_index=False), tmp)
+    os.replace(tmp, f)
+
+def _manifest(root: Path) -> dict:
+    try:
+        return json.loads((root / "_built.json").read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {"levels": [], "days": []}
+
+def update(db, start: date, end: date, root: str | Path | None = None, full: bool = False,
+           levels: tuple = LEVELS) -> dict:
+    """
+    Garante a grade dos dias [start, end] (inclusivo). Lê do Mongo só os dias
+    que faltam (e os REFRESH_DAYS mais recentes); `full` refaz a janela toda.
+    Retorna {"days": dias recalculados, "points": focos lidos}.
+    """
+    root = Path(root) if root else GRID_DIR
+    man = _manifest(root)
+    reset = [float(x) for x in man["levels"]] != list(levels)
+    if reset and root.exists():
+        shutil.rmtree(root)        # níveis mudaram: partições antigas não valem mais
+        man = {"levels": [], "days": []}
+    built = set(man["days"])
+    wanted = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    refresh_from = end - timedelta(days=REFRESH_DAYS - 1)
+    todo = [d for d in wanted if full or d.isoformat() not in built or d >= refresh_from]
+    if not todo:
+        return {"days": 0, "points": 0}
+
+    # um mês por vez: uma leitura do Mongo e uma regravação por partição
+    months: dict[tuple, list[date]] = {}
+    for d in todo:
+        months.setdefault((d.year, d.month), []).append(d)
+    points, binned_all = 0, {i: [] for i in range(len(levels))}
+    with metrics.timer("gold.fire_grid"):
+        for (year, month), days in sorted(months.items()):
+            lo = datetime(days[0].year, days[0].month, days[0].day, tzinfo=timezone.utc)
+            hi = datetime(days[-1].year, days[-1].month, days[-1].day, tzinfo=timezone.utc) + timedelta(days=1)
+            pts = read_points(db, lo, hi)
+            mask = np.isin(pts["days"], np.array(days, dtype="datetime64[D]"))
+            pts = {k: v[mask] for k, v in pts.items()}
+            points += len(pts["days"])
+            for level, cell in enumerate(levels):
+                df = bin_points(pts["days"], pts["lat"], pts["lon"], pts["conf"], cell)
+                _replace_days(root, level, year, month, set(days), df)
+                binned_all[level].append(df)
+            built.update(d.isoformat() for d in days)
+            print(f"[fire_grid] {year}-{month:02d}: {len(days)} dias, {len(pts['days'])} focos")
+
+    binned = {lv: pd.concat(fr, ignore_index=True) for lv, fr in binned_all.items() if fr}
+    _update_index(root, levels, binned, reset)
+    root.mkdir(parents=True, exist_ok=True)
+    tmp = root / "_built.json.tmp"
+    tmp.write_text(json.dumps({"levels": list(levels), "days": sorted(built)}), encoding="utf-8")
+    os.replace(tmp, root / "_built.json")
+    return {"days": len(todo), "points": points}
+
+# ---------- leitura ----------
+def level_for(cell_deg: float, levels: tuple = LEVELS) -> int:
+    """Nível mais fino com célula >= cell_deg (ex.: o tamanho de pixel do mapa em graus)."""
+    ok = [i for i, c in enumerate(levels) if c >= cell_deg] or range(len(levels))
+    return min(ok, key=lambda i: levels[i])
+
+def tiles(level: int, start: date, end: date, bbox: tuple | None = None, root: str | Path | None = None,
+          levels: tuple = LEVELS) -> pd.DataFrame:
+    """
+    Focos por tile no nível `level` somados em [start, end], opcionalmente
+    dentro de bbox=(lat_min, lon_min, lat_max, lon_max). Abre só as partições
+    dos meses da janela; o recorte usa ix/iy (estatísticas dos row groups).
+    """
+    root = Path(root) if root else GRID_DIR
+    cell = levels[level]
+    files, y, m = [], start.year, start.month
+    while (y, m) <= (end.year, end.month):
+        f = _part_file(root, level, y, m)
+        if f.exists():
+            files.append(str(f))
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    cols = ["tile", "ix", "iy", "focos", "conf_mean"]
+    if not files:
+        return pd.DataFrame(columns=cols + list(tile_bounds([], [], cell)))
+    flt = (ds.field("date") >= pa.scalar(start, pa.date32())) & (ds.field("date") <= pa.scalar(end, pa.date32()))
+    if bbox is not None:
+        lat_min, lon_min, lat_max, lon_max = bbox
+        flt &= (ds.field("iy") >= int(np.floor((lat_min + 90) / cell))) & \
+               (ds.field("iy") <= int(np.floor((lat_max + 90) / cell))) & \
+               (ds.field("ix") >= int(np.floor((lon_min + 180) / cell))) & \
+               (ds.field("ix") <= int(np.floor((lon_max + 180) / cell)))
+    with metrics.timer("gold.fire_grid_query"):
+        t = ds.dataset(files, schema=SCHEMA, format="parquet").to_table(columns=cols, filter=flt)
+        tile = t.column("tile").to_numpy()
+        uniq, first, inv = np.unique(tile, return_index=True, return_inverse=True)
+        focos = t.column("focos").to_numpy().astype(np.int64)
+        conf = t.column("conf_mean").to_numpy(zero_copy_only=False).astype(float)
+        has_conf = np.isfinite(conf)
+        conf_w = np.bincount(inv, weights=np.where(has_conf, conf * focos, 0.0), minlength=len(uniq))
+        conf_n = np.bincount(inv, weights=np.where(has_conf, focos, 0), minlength=len(uniq))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            conf_mean = np.where(conf_n > 0, conf_w / conf_n, np.nan)
+        ix, iy = t.column("ix").to_numpy()[first], t.column("iy").to_numpy()[first]
+        out = pd.DataFrame({"tile": uniq, "ix": ix, "iy": iy,
+                            "focos": np.bincount(inv, weights=focos, minlength=len(uniq)).astype(np.int64),
+                            "conf_mean": conf_mean.astype(np.float32), **tile_bounds(ix, iy, cell)})
+    return out.sort_values("focos", ascending=False, kind="stable").reset_index(drop=True)
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Grade de focos por dia e nível (mapas do relatório).")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="Atualiza a grade a partir de raw_fires (incremental)")
+    b.add_argument("--start", default=None, type=date.fromisoformat, help="AAAA-MM-DD; default: fim - 179 dias")
+    b.add_argument("--end", default=None, type=date.fromisoformat, help="AAAA-MM-DD; default: hoje (UTC)")
+    b.add_argument("--full", action="store_true", help="Refaz todos os dias da janela")
+    t = sub.add_parser("tiles", help="Focos por tile num nível e janela")
+    t.add_argument("--level", type=int, default=0)
+    t.add_argument("--start", required=True, type=date.fromisoformat)
+    t.add_argument("--end", required=True, type=date.fromisoformat)
+    t.add_argument("--bbox", default=None, help="lat_min,lon_min,lat_max,lon_max")
+    t.add_argument("--n", type=int, default=20)
+    args = ap.parse_args()
+
+    if args.cmd == "build":
+        from etl.common.config import load_settings
+        from etl.common.mongo import mongo_db
+        end = args.end or datetime.now(timezone.utc).date()
+        start = args.start or end - timedelta(days=179)
+        with mongo_db(load_settings().mongo_uri) as db:
+            out = update(db, start, end, full=args.full)
+        print(f"[fire_grid] {out['days']} dias recalculados, {out['points']} focos")
+    else:
+        bbox = tuple(float(x) for x in args.bbox.split(",")) if args.bbox else None
+        df = tiles(args.level, args.start, args.end, bbox=bbox)
+        print(df.head(args.n).to_string(index=False))
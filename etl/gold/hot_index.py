@@ -0,0 +1,322 @@
+# etl/gold/hot_index.py
+"""
+Índice "quente" do risco mais recente por município, para os alertas que
+perguntam o tempo todo "qual o risco perto deste lat/lon?" e "quem está
+acima do limiar agora?" sem reler fact_risk_daily.parquet nem juntar com
+dim_municipio a cada consulta.
+
+Gerado no fim do export_parquet (write_gold, sharded e incremental):
+    data/gold/hot_index/<versão>/latest.npy        array estruturado, 1 linha por município
+                                                   (ordenado por municipio_ibge)
+    data/gold/hot_index/<versão>/grid_order.npy    linhas agrupadas por célula da grade lat/lon
+    data/gold/hot_index/<versão>/grid_offsets.npy  início de cada célula em grid_order (CSR)
+    data/gold/hot_index/<versão>/score_order.npy   linhas por risk_score decrescente
+    data/gold/hot_index/<versão>/score_keys.npy    -risk_score nessa ordem (NaN -> +inf), p/ searchsorted
+    data/gold/hot_index/<versão>/meta.json         grade (origem, célula, dimensões), data de referência
+    data/gold/hot_index/CURRENT                    nome da versão ativa (troca atômica)
+
+Os .npy são abertos com mmap (np.load(mmap_mode="r")): carregar é abrir
+arquivos, sem parse. As consultas usam só NumPy:
+
+    from etl.gold import hot_index
+    idx = hot_index.load()
+    rows, km = idx.nearest(-15.79, -47.88, k=5)
+    rows, km = idx.within(-15.79, -47.88, radius_km=100)
+    rows = idx.above(0.7, uf="MT")
+"""
+import json, math, os, shutil, threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from etl.common import metrics
+
+HOT_DIR = Path("data/gold/hot_index")
+FORMAT = 1
+CELL_DEG = float(os.environ.get("HOT_INDEX_CELL_DEG", "0.5"))   # lado da célula da grade (graus)
+# idade máxima (dias antes de as_of) da última linha de um município; mais velha, ele sai do índice
+MAX_AGE_DAYS = int(os.environ.get("HOT_INDEX_MAX_AGE_DAYS", "1"))
+KEEP_VERSIONS = 2
+EARTH_KM = 6371.0088
+KM_PER_DEG = math.pi * EARTH_KM / 180.0
+# a distância mínima até células fora do anel usa a aproximação plana (lon * cos(lat));
+# a margem cobre a diferença para o grande círculo em células pequenas
+RING_SAFETY = 0.9
+
+DTYPE = np.dtype([
+    ("municipio_ibge", "<i8"), ("uf", "<U2"), ("date", "<M8[D]"), ("lat", "<f8"), ("lon", "<f8"),
+    ("risk_score", "<f4"), ("focos", "<f4"), ("focos_3d_100k", "<f4"),
+    ("precip_sum", "<f4"), ("hum_min", "<f4"), ("wind_max", "<f4"),
+])
+SOURCE_COLUMNS = ["date", "municipio_ibge", "uf", "risk_score", "focos", "focos_3d_100k",
+                  "precip_sum", "hum_min", "wind_max"]
+
+_lock = threading.Lock()
+_loaded: dict[str, "HotIndex"] = {}   # versão -> índice aberto
+
+def haversine_km(lat, lon, lats, lons) -> np.ndarray:
+    p1, p2 = np.radians(lat), np.radians(lats)
+    dphi, dlmb = p2 - p1, np.radians(lons) - np.radians(lon)
+    a = np.sin(dphi / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin(dlmb / 2) ** 2
+    return 2 * EARTH_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+@dataclass(frozen=True)
+class HotIndex:
+    version: str
+    latest: np.ndarray         # DTYPE, ordenado por municipio_ibge
+    grid_order: np.ndarray     # int32: linhas com coordenada, agrupadas por célula
+    grid_offsets: np.ndarray   # int32: len = n_lat * n_lon + 1
+    score_order: np.ndarray    # int32: linhas por risk_score decrescente (NaN no fim)
+    score_keys: np.ndarray     # float32: -risk_score em score_order (crescente; NaN -> +inf)
+    meta: dict
+
+    def __len__(self):
+        return len(self.latest)
+
+    # ---------- lookups ----------
+    def get(self, code: int):
+        """Linha (np.void) do município ou None."""
+        codes = self.latest["municipio_ibge"]
+        i = int(np.searchsorted(codes, code))
+        return self.latest[i] if i < len(codes) and codes[i] == code else None
+
+    def above(self, threshold: float, uf: str | None = None, limit: int | None = None) -> np.ndarray:
+        """Municípios com risk_score >= threshold (maior risco primeiro)."""
+        n = int(np.searchsorted(self.score_keys, -np.float32(threshold), side="right"))
+        rows = self.score_order[:n]
+        if uf is not None:
+            rows = rows[self.latest["uf"][rows] == uf.upper()]
+        return self.latest[rows[:limit] if limit else rows]
+
+    # ---------- espaciais ----------
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        m = self.meta["grid"]
+        return (math.floor((lat - m["lat0"]) / m["cell_deg"]), math.floor((lon - m["lon0"]) / m["cell_deg"]))
+
+    def _span(self, i: int, j0: int, j1: int) -> np.ndarray:
+        """Linhas das células (i, j0..j1) — contíguas em grid_order."""
+        m = self.meta["grid"]
+        if not 0 <= i < m["n_lat"]:
+            return self.grid_order[:0]
+        j0, j1 = max(j0, 0), min(j1, m["n_lon"] - 1)
+        if j0 > j1:
+            return self.grid_order[:0]
+        base = i * m["n_lon"]
+        return self.grid_order[self.grid_offsets[base + j0]:self.grid_offsets[base + j1 + 1]]
+
+    def _result(self, rows: np.ndarray, dist: np.ndarray, k: int | None = None):
+        order = np.argsort(dist, kind="stable")[:k]
+        return self.latest[rows[order]], dist[order]
+
+    def within(self, lat: float, lon: float, radius_km: float) -> tuple[np.ndarray, np.ndarray]:
+        """Municípios com centróide a até `radius_km` (linhas, distâncias em km), do mais perto."""
+        m = self.meta["grid"]
+        dlat = radius_km / KM_PER_DEG
+        coslat = max(math.cos(math.radians(min(abs(lat) + dlat, 89.0))), 1e-6)
+        dlon = radius_km / (KM_PER_DEG * coslat)
+        i0, j0 = self._cell(lat - dlat, lon - dlon)
+        i1, j1 = self._cell(lat + dlat, lon + dlon)
+        spans = [self._span(i, j0, j1) for i in range(max(i0, 0), min(i1, m["n_lat"] - 1) + 1)]
+        rows = np.concatenate(spans) if spans else self.grid_order[:0]
+        dist = haversine_km(lat, lon, self.latest["lat"][rows], self.latest["lon"][rows])
+        ok = dist <= radius_km
+        return self._result(rows[ok], dist[ok])
+
+    def nearest(self, lat: float, lon: float, k: int = 5) -> tuple[np.ndarray, np.ndarray]:
+        """k municípios mais próximos (linhas, distâncias em km): anéis de células a partir da do ponto."""
+        m = self.meta["grid"]
+        k = min(int(k), len(self.grid_order))
+        i0, j0 = self._cell(lat, lon)
+        if k <= 0 or not (0 <= i0 < m["n_lat"] and 0 <= j0 < m["n_lon"]):
+            rows = self.grid_order
+            return self._result(rows, haversine_km(lat, lon, self.latest["lat"][rows], self.latest["lon"][rows]), k)
+        # km mínimos por célula de distância (lado leste-oeste na latitude mais extrema da grade)
+        cell_km = m["cell_deg"] * KM_PER_DEG * m["min_cos_lat"] * RING_SAFETY
+        found, dists = [], []
+        n_found, r = 0, 0
+        r_max = max(m["n_lat"], m["n_lon"])
+        while True:
+            if r == 0:
+                ring = [self._span(i0, j0, j0)]
+            else:
+                ring = [self._span(i0 - r, j0 - r, j0 + r), self._span(i0 + r, j0 - r, j0 + r)]
+                for i in range(i0 - r + 1, i0 + r):
+                    ring += [self._span(i, j0 - r, j0 - r), self._span(i, j0 + r, j0 + r)]
+            rows = np.concatenate(ring)
+            if len(rows):
+                found.append(rows)
+                dists.append(haversine_km(lat, lon, self.latest["lat"][rows], self.latest["lon"][rows]))
+                n_found += len(rows)
+            if n_found >= k:
+                kth = np.partition(np.concatenate(dists), k - 1)[k - 1]
+                if kth <= r * cell_km or r >= r_max:
+                    break
+            elif r >= r_max:
+                break
+            r += 1
+        return self._result(np.concatenate(found), np.concatenate(dists), k)
+
+# ---------- construção ----------
+def latest_rows(risk_df: pd.DataFrame, dim: pd.DataFrame, max_age_days: int | None = None) -> np.ndarray:
+    """
+    Última linha de risco por município + centróide de dim_municipio, como array DTYPE.
+    Só entram municípios cuja última linha tem até `max_age_days` dias antes da
+    data mais recente (as_of): focos/clima só existem para cidades com atividade
+    recente, e o risco de meses atrás não pode aparecer ao lado do de hoje.
+    """
+    max_age_days = MAX_AGE_DAYS if max_age_days is None else max_age_days
+    df = risk_df[[c for c in SOURCE_COLUMNS if c in risk_df.columns]].copy()
+    df["municipio_ibge"] = pd.to_numeric(df["municipio_ibge"], errors="coerce")
+    df = df.dropna(subset=["municipio_ibge", "date"])
+    df["date"] = pd.to_datetime(df["date"])
+    df = df.sort_values(["municipio_ibge", "date"], kind="stable").drop_duplicates("municipio_ibge", keep="last")
+    if len(df):
+        df = df[df["date"] >= df["date"].max().normalize() - pd.Timedelta(days=max_age_days)]
+    coords = dim[["municipio_ibge", "lat", "lon"]].copy()
+    coords["municipio_ibge"] = pd.to_numeric(coords["municipio_ibge"], errors="coerce")
+    df = df.merge(coords.dropna(subset=["municipio_ibge"]).drop_duplicates("municipio_ibge", keep="last"),
+                  on="municipio_ibge", how="left")
+
+    out = np.zeros(len(df), dtype=DTYPE)
+    out["municipio_ibge"] = df["municipio_ibge"].astype("int64").to_numpy()
+    out["uf"] = df["uf"].fillna("").astype(str).to_numpy() if "uf" in df.columns else ""
+    out["date"] = df["date"].to_numpy().astype("datetime64[D]")
+    for c in ("lat", "lon", "risk_score", "focos", "focos_3d_100k", "precip_sum", "hum_min", "wind_max"):
+        out[c] = pd.to_numeric(df[c], errors="coerce").to_numpy(dtype="float64") if c in df.columns else np.nan
+    return out
+
+def build(latest: np.ndarray, cell_deg: float = CELL_DEG, max_age_days: int | None = None) -> tuple[dict, dict]:
+    """
+    Grade uniforme (CSR por célula) e ordem por risco sobre `latest`. Devolve (arrays, meta).
+    `max_age_days`: o corte que latest_rows aplicou, só registrado no meta.
+    """
+    has_xy = np.isfinite(latest["lat"]) & np.isfinite(latest["lon"])
+    rows = np.flatnonzero(has_xy).astype("int32")
+    if len(rows):
+        lat0 = math.floor(latest["lat"][rows].min() / cell_deg) * cell_deg
+        lon0 = math.floor(latest["lon"][rows].min() / cell_deg) * cell_deg
+        n_lat = int((latest["lat"][rows].max() - lat0) // cell_deg) + 1
+        n_lon = int((latest["lon"][rows].max() - lon0) // cell_deg) + 1
+    else:
+        lat0 = lon0 = 0.0
+        n_lat = n_lon = 1
+    ci = np.clip(((latest["lat"][rows] - lat0) // cell_deg).astype("int64"), 0, n_lat - 1)
+    cj = np.clip(((latest["lon"][rows] - lon0) // cell_deg).astype("int64"), 0, n_lon - 1)
+    cell = ci * n_lon + cj
+    order = np.argsort(cell, kind="stable")
+    offsets = np.zeros(n_lat * n_lon + 1, dtype="int32")
+    np.cumsum(np.bincount(cell, minlength=n_lat * n_lon), out=offsets[1:])
+
+    keys = -latest["risk_score"].astype("float32")
+    keys[np.isnan(keys)] = np.inf
+    score_order = np.lexsort((latest["municipio_ibge"], keys)).astype("int32")
+
+    max_abs_lat = max(abs(lat0), abs(lat0 + n_lat * cell_deg))
+    meta = {
+        "format": FORMAT, "rows": int(len(latest)), "indexed": int(len(rows)),
+        "as_of": str(latest["date"].max()) if len(latest) else None, "max_age_days": max_age_days,
+        "built_at": datetime.now(timezone.utc).isoformat(),
+        "grid": {"lat0": lat0, "lon0": lon0, "cell_deg": cell_deg, "n_lat": n_lat, "n_lon": n_lon,
+                 "min_cos_lat": math.cos(math.radians(min(max_abs_lat, 89.0)))},
+    }
+    arrays = {"latest": latest, "grid_order": rows[order], "grid_offsets": offsets, "score_order": score_order,
+              "score_keys": keys[score_order]}
+    return arrays, meta
+
+def publish(risk_df: pd.DataFrame, dim: pd.DataFrame, root: str | Path | None = None,
+            max_age_days: int | None = None) -> Path:
+    """Constrói e grava uma versão nova e a ativa (CURRENT); mantém as KEEP_VERSIONS mais novas."""
+    base = Path(root) if root else HOT_DIR
+    max_age_days = MAX_AGE_DAYS if max_age_days is None else max_age_days
+    with metrics.timer("gold.hot_index_build"):
+        arrays, meta = build(latest_rows(risk_df, dim, max_age_days), max_age_days=max_age_days)
+    version = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{os.getpid()}"
+    meta["version"] = version
+    out = base / version
+    out.mkdir(parents=True, exist_ok=True)
+    for name, arr in arrays.items():
+        np.save(out / f"{name}.npy", arr, allow_pickle=False)
+    (out / "meta.json").write_text(json.dumps(meta, indent=1), encoding="utf-8")
+    tmp = base / f"CURRENT.tmp{os.getpid()}"
+    tmp.write_text(version, encoding="utf-8")
+    os.replace(tmp, base / "CURRENT")
+    for old in sorted(p for p in base.iterdir() if p.is_dir())[:-KEEP_VERSIONS]:
+        shutil.rmtree(old, ignore_errors=True)
+    return out
+
+def publish_from_gold(gold_root: str | Path = "data/gold", root: str | Path | None = None) -> Path | None:
+    """Versão a partir dos arquivos únicos fact_risk_daily.parquet + dim_municipio.parquet."""
+    import pyarrow.parquet as pq
+    gold_root = Path(gold_root)
+    risk_file, dim_file = gold_root / "fact_risk_daily.parquet", gold_root / "dim_municipio.parquet"
+    if not risk_file.exists() or not dim_file.exists():
+        return None
+    cols = [c for c in SOURCE_COLUMNS if c in pq.read_schema(risk_file).names]
+    risk = pq.read_table(risk_file, columns=cols, memory_map=True).to_pandas()
+    dim = pq.read_table(dim_file, columns=["municipio_ibge", "lat", "lon"], memory_map=True).to_pandas()
+    return publish(risk, dim, root=root)
+
+# ---------- leitura ----------
+def load(root: str | Path | None = None) -> HotIndex | None:
+    """Versão ativa (mmap), reaproveitada enquanto CURRENT não mudar; None se não houver índice."""
+    base = Path(root) if root else HOT_DIR
+    try:
+        version = (base / "CURRENT").read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    key = f"{base.resolve()}:{version}"
+    with _lock:
+        idx = _loaded.get(key)
+    if idx is not None:
+        return idx
+    d = base / version
+    arrays = {n: np.load(d / f"{n}.npy", mmap_mode="r", allow_pickle=False)
+              for n in ("latest", "grid_order", "grid_offsets", "score_order", "score_keys")}
+    meta = json.loads((d / "meta.json").read_text(encoding="utf-8"))
+    if meta.get("format") != FORMAT:
+        raise ValueError(f"formato de hot_index não suportado: {meta.get('format')}")
+    idx = HotIndex(version=version, meta=meta, **arrays)
+    with _lock:
+        _loaded.clear()
+        _loaded[key] = idx
+    return idx
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Índice quente do risco mais recente por município.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("build", help="Gera uma versão a partir de data/gold/*.parquet")
+    n = sub.add_parser("nearest", help="k municípios mais próximos de lat/lon")
+    n.add_argument("lat", type=float)
+    n.add_argument("lon", type=float)
+    n.add_argument("--k", type=int, default=5)
+    w = sub.add_parser("within", help="Municípios a até R km de lat/lon")
+    w.add_argument("lat", type=float)
+    w.add_argument("lon", type=float)
+    w.add_argument("--km", type=float, default=50.0)
+    a = sub.add_parser("above", help="Municípios com risk_score >= limiar")
+    a.add_argument("threshold", type=float)
+    a.add_argument("--uf", default=None)
+    a.add_argument("--limit", type=int, default=50)
+    args = ap.parse_args()
+
+    if args.cmd == "build":
+        out = publish_from_gold()
+        print(f"[hot_index] {'sem fact_risk_daily/dim_municipio' if out is None else out}")
+        raise SystemExit(0)
+    idx = load()
+    if idx is None:
+        raise SystemExit("[hot_index] índice não encontrado; rode o gold ou `python -m etl.gold.hot_index build`")
+    if args.cmd == "above":
+        rows, dist = idx.above(args.threshold, uf=args.uf, limit=args.limit), None
+    elif args.cmd == "nearest":
+        rows, dist = idx.nearest(args.lat, args.lon, k=args.k)
+    else:
+        rows, dist = idx.within(args.lat, args.lon, radius_km=args.km)
+    for i, r in enumerate(rows):
+        km = "" if dist is None else f"  {dist[i]:8.1f} km"
+        print(f"{r['municipio_ibge']}  {r['uf']}  {r['date']}  risk={r['risk_score']:.3f}  "
+              f"focos_3d_100k={r['focos_3d_100k']:.1f}{km}")
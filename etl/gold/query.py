@@ -0,0 +1,374 @@
+# etl/gold/query.py
+"""
+Leitura de baixa latência dos datasets gold particionados (uf/year/month).
+
+Para as ferramentas internas que hoje carregam data/gold/*.parquet inteiros:
+"risco do município X nos últimos 30 dias", "top 50 por focos_3d_100k hoje
+na UF Y" e as consultas da página Municipality Drilldown do relatório
+(top municípios por focos em 30 dias, mapa de focos e a tabela detalhada
+com a linha de totais).
+
+- Poda de partições: a consulta só abre os part.parquet das UFs e meses que
+  podem ter linhas (os caminhos são montados e conferidos com stat, sem
+  listar a árvore toda); o pyarrow.dataset aplica projeção de colunas e o
+  filtro (date, municipio_ibge) nas estatísticas dos row groups.
+- Arquivos lidos com memory map (LocalFileSystem(use_mmap=True)).
+- Cache LRU de resultados em memória: a chave inclui (caminho, mtime, tamanho)
+  de cada partição lida, então qualquer regravação do gold invalida só as
+  consultas que dependiam daquela partição. Entradas velhas saem pelo LRU.
+
+Uso como biblioteca:
+    from etl.gold import query
+    query.risk_series(3550308, days=30)
+    query.top_municipios("SP", metric="focos_3d_100k", n=50)
+
+CLI:
+    python -m etl.gold.query risk-series 3550308 --days 30
+    python -m etl.gold.query top --uf SP --n 50
+    python -m etl.gold.query top-fires --uf SP --days 30
+    python -m etl.gold.query drilldown --uf SP --start 2025-10-03 --end 2025-10-14
+"""
+import os, threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs as pafs
+
+from etl.common import metrics
+
+GOLD_ROOT = Path("data/gold")    # mesmo PARQUET_ROOT de export_parquet
+CACHE_SIZE = int(os.environ.get("GOLD_QUERY_CACHE", "256"))   # resultados em memória
+
+PARTITION_FIELDS = [pa.field("uf", pa.string()), pa.field("year", pa.int32()), pa.field("month", pa.int32())]
+PARTITIONING = ds.partitioning(pa.schema(PARTITION_FIELDS), flavor="hive")
+_FS = pafs.LocalFileSystem(use_mmap=True)
+
+RISK_SERIES_COLUMNS = ["date", "risk_score", "focos", "focos_3d", "focos_3d_100k",
+                       "temp_mean", "hum_min", "wind_max", "precip_sum"]
+DRILLDOWN_COLUMNS = ["date", "municipio_ibge", "municipio", "uf", "focos", "focos_3d", "focos_3d_100k",
+                     "risk_score", "precip_sum", "temp_mean", "wind_max"]
+
+_lock = threading.Lock()
+_results: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
+_schemas: dict[tuple, pa.Schema] = {}    # (caminho, mtime_ns) -> schema do arquivo
+_dim_cache: dict = {}                    # "state" -> (mtime, tamanho); "frame" -> DataFrame
+
+# ---------- partições ----------
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+def _months(start: date, end: date):
+    y, m = start.year, start.month
+    while (y, m) <= (end.year, end.month):
+        yield y, m
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+
+def _ufs(dataset: str) -> list[str]:
+    try:
+        with os.scandir(GOLD_ROOT / dataset) as it:
+            return sorted(e.name[3:] for e in it if e.is_dir() and e.name.startswith("uf="))
+    except FileNotFoundError:
+        return []
+
+def _select(dataset: str, ufs, start: date, end: date) -> tuple:
+    """Partições que podem ter linhas em [start, end]: ((caminho, mtime_ns, tamanho), ...)."""
+    base = (GOLD_ROOT / dataset).absolute()
+    out = []
+    for uf in (_ufs(dataset) if ufs is None else ufs):
+        for y, m in _months(start, end):
+            path = base / f"uf={uf}" / f"year={y}" / f"month={m}" / "part.parquet"
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            out.append((str(path), st.st_mtime_ns, st.st_size))
+    return tuple(out)
+
+def _latest_month(dataset: str, ufs) -> tuple[int, int] | None:
+    """Maior (ano, mês) com partição nas UFs dadas."""
+    base = GOLD_ROOT / dataset
+    best = None
+    for uf in (_ufs(dataset) if ufs is None else ufs):
+        for ydir in (base / f"uf={uf}").glob("year=*"):
+            for mdir in ydir.glob("month=*/part.parquet"):
+                ym = (int(ydir.name[5:]), int(mdir.parent.name[6:]))
+                best = ym if best is None or ym > best else best
+    return best
+
+def _schema(parts: tuple) -> pa.Schema:
+    """Schema unificado das partições (footers em cache por arquivo/mtime) + campos de partição."""
+    schemas = []
+    for path, mtime, _ in parts:
+        s = _schemas.get((path, mtime))
+        if s is None:
+            s = _schemas[(path, mtime)] = pq.read_schema(path, memory_map=True).remove_metadata()
+        schemas.append(s)
+    unified = pa.unify_schemas(schemas, promote_options="permissive")
+    names = {f.name for f in PARTITION_FIELDS}
+    return pa.schema([f for f in unified if f.name not in names] + PARTITION_FIELDS)
+
+def _read(dataset: str, parts: tuple, columns: list[str], filter=None) -> pd.DataFrame:
+    """Lê só `parts` como pyarrow.dataset hive, com projeção e filtro."""
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    schema = _schema(parts)
+    dset = ds.dataset([p for p, _, _ in parts], schema=schema, format="parquet", filesystem=_FS,
+                      partitioning=PARTITIONING, partition_base_dir=str((GOLD_ROOT / dataset).absolute()))
+    with metrics.timer("gold.query_scan", dataset=dataset):
+        table = dset.to_table(columns=[c for c in columns if c in schema.names], filter=filter)
+    df = table.to_pandas()
+    for c in columns:
+        if c not in df.columns:
+            df[c] = None
+    return df
+
+def _date_range(start: date, end: date):
+    return ((pc.field("date") >= pa.scalar(start, pa.date32())) &
+            (pc.field("date") <= pa.scalar(end, pa.date32())))
+
+# ---------- cache ----------
+def _cached(key: tuple, parts: tuple, compute) -> pd.DataFrame:
+    """Resultado de `compute()` em LRU por (consulta, partições com mtime). Devolve cópia."""
+    k = (key, parts)
+    with _lock:
+        hit = _results.get(k)
+        if hit is not None:
+            _results.move_to_end(k)
+    if hit is not None:
+        metrics.incr("gold.query_cache_hit", query=key[0])
+        return hit.copy()
+    metrics.incr("gold.query_cache_miss", query=key[0])
+    df = compute()
+    with _lock:
+        _results[k] = df
+        while len(_results) > CACHE_SIZE:
+            _results.popitem(last=False)
+    return df.copy()
+
+def clear_cache():
+    with _lock:
+        _results.clear()
+        _schemas.clear()
+        _dim_cache.clear()
+
+# ---------- dimensão ----------
+def _dim_state() -> tuple:
+    path = GOLD_ROOT / "dim_municipio.parquet"
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return (str(path), None, None)
+    return (str(path), st.st_mtime_ns, st.st_size)
+
+def _dim(state: tuple) -> pd.DataFrame:
+    """dim_municipio indexado por municipio_ibge (municipio, uf, lat, lon); relido se o arquivo mudar."""
+    with _lock:
+        if _dim_cache.get("state") == state:
+            return _dim_cache["frame"]
+    if state[1] is None:
+        df = pd.DataFrame(columns=["municipio", "uf", "lat", "lon"], index=pd.Index([], name="municipio_ibge"))
+    else:
+        df = pq.read_table(state[0], columns=["municipio_ibge", "municipio", "uf", "lat", "lon"],
+                           memory_map=True).to_pandas()
+        df["municipio_ibge"] = pd.to_numeric(df["municipio_ibge"], errors="coerce")
+        df = df.dropna(subset=["municipio_ibge"]).astype({"municipio_ibge": "int64"})
+        df = df.drop_duplicates("municipio_ibge", keep="last").set_index("municipio_ibge")
+    with _lock:
+        _dim_cache.update(state=state, frame=df)
+    return df
+
+def _with_names(df: pd.DataFrame, dim: pd.DataFrame, cols=("municipio",)) -> pd.DataFrame:
+    codes = pd.to_numeric(df["municipio_ibge"], errors="coerce")
+    for c in cols:
+        df[c] = codes.map(dim[c]) if not dim.empty else None
+    return df
+
+def _uf_of(code: int, dim: pd.DataFrame) -> str | None:
+    try:
+        uf = dim.at[int(code), "uf"]
+    except (KeyError, TypeError, ValueError):
+        return None
+    return uf if isinstance(uf, str) and uf else None
+
+def _window(days: int, end: date | None) -> tuple[date, date]:
+    end = end or _today()
+    return end - timedelta(days=max(1, days) - 1), end
+
+def _ufs_arg(uf: str | None):
+    return None if uf is None else [uf.upper()]
+
+# ---------- consultas ----------
+def risk_series(municipio_ibge: int, days: int = 30, end: date | None = None,
+                columns: list[str] = RISK_SERIES_COLUMNS) -> pd.DataFrame:
+    """Série diária de fact_risk_daily de um município em [end - days + 1, end] (default: até hoje)."""
+    with metrics.timer("gold.query", query="risk_series"):
+        start, end = _window(days, end)
+        dim_state = _dim_state()
+        uf = _uf_of(municipio_ibge, _dim(dim_state))   # poda pela UF do município
+        parts = _select("fact_risk_daily", None if uf is None else [uf], start, end)
+        cols = list(dict.fromkeys(["date", *columns]))
+
+        def compute():
+            flt = _date_range(start, end) & (pc.field("municipio_ibge") == int(municipio_ibge))
+            df = _read("fact_risk_daily", parts, cols, flt)
+            return df[[c for c in cols if c in df.columns]].sort_values("date", kind="stable").reset_index(drop=True)
+
+        return _cached(("risk_series", int(municipio_ibge), start, end, tuple(cols)), parts + (dim_state,), compute)
+
+def latest_date(dataset: str = "fact_risk_daily", uf: str | None = None) -> date | None:
+    """Data mais recente com linhas no dataset (na UF, se dada)."""
+    ym = _latest_month(dataset, _ufs_arg(uf))
+    if ym is None:
+        return None
+    first = date(ym[0], ym[1], 1)
+    parts = _select(dataset, _ufs_arg(uf), first, first)
+
+    def compute():
+        df = _read(dataset, parts, ["date"])
+        return pd.DataFrame({"date": [df["date"].max() if not df.empty else None]})
+
+    return _cached(("latest_date", dataset, uf), parts, compute)["date"].iloc[0]
+
+def top_municipios(uf: str | None = None, day: date | None = None, metric: str = "focos_3d_100k",
+                   n: int = 50) -> pd.DataFrame:
+    """Top `n` municípios por `metric` em fact_risk_daily num dia (default: o mais recente da UF)."""
+    with metrics.timer("gold.query", query="top_municipios"):
+        day = day or latest_date("fact_risk_daily", uf)
+        if day is None:
+            return pd.DataFrame(columns=["date", "municipio_ibge", "municipio", "uf", metric, "risk_score"])
+        dim_state = _dim_state()
+        parts = _select("fact_risk_daily", _ufs_arg(uf), day, day)
+        cols = list(dict.fromkeys(["date", "municipio_ibge", "uf", metric, "risk_score"]))
+
+        def compute():
+            flt = pc.field("date") == pa.scalar(day, pa.date32())
+            df = _read("fact_risk_daily", parts, cols, flt)
+            df = df.sort_values([metric, "municipio_ibge"], ascending=[False, True], na_position="last",
+                                kind="stable").head(n)
+            df = _with_names(df, _dim(dim_state))
+            return df[["date", "municipio_ibge", "municipio", "uf", *cols[3:]]].reset_index(drop=True)
+
+        return _cached(("top_municipios", uf, day, metric, n), parts + (dim_state,), compute)
+
+def top_fires(uf: str | None = None, days: int = 30, end: date | None = None, n: int = 10,
+              municipio_ibge: int | None = None) -> pd.DataFrame:
+    """Drilldown: municípios com mais focos (soma de fact_fires_daily) nos últimos `days` dias."""
+    with metrics.timer("gold.query", query="top_fires"):
+        start, end = _window(days, end)
+        dim_state = _dim_state()
+        parts = _select("fact_fires_daily", _ufs_arg(uf), start, end)
+
+        def compute():
+            flt = _date_range(start, end)
+            if municipio_ibge is not None:
+                flt = flt & (pc.field("municipio_ibge") == int(municipio_ibge))
+            df = _read("fact_fires_daily", parts, ["municipio_ibge", "uf", "focos"], flt)
+            df = (df.groupby(["municipio_ibge", "uf"], as_index=False, dropna=False)["focos"].sum()
+                    .sort_values(["focos", "municipio_ibge"], ascending=[False, True], kind="stable").head(n))
+            df = _with_names(df, _dim(dim_state))
+            return df[["municipio_ibge", "municipio", "uf", "focos"]].reset_index(drop=True)
+
+        return _cached(("top_fires", uf, start, end, n, municipio_ibge), parts + (dim_state,), compute)
+
+def fires_map(uf: str | None = None, start: date | None = None, end: date | None = None,
+              municipio_ibge: int | None = None) -> pd.DataFrame:
+    """Drilldown: focos por município em [start, end] com o centróide (lat/lon) para o mapa."""
+    with metrics.timer("gold.query", query="fires_map"):
+        start, end = (start, end or _today()) if start else _window(30, end)
+        dim_state = _dim_state()
+        parts = _select("fact_fires_daily", _ufs_arg(uf), start, end)
+
+        def compute():
+            flt = _date_range(start, end)
+            if municipio_ibge is not None:
+                flt = flt & (pc.field("municipio_ibge") == int(municipio_ibge))
+            df = _read("fact_fires_daily", parts, ["municipio_ibge", "uf", "focos"], flt)
+            df = df.groupby(["municipio_ibge", "uf"], as_index=False, dropna=False)["focos"].sum()
+            df = _with_names(df, _dim(dim_state), cols=("municipio", "lat", "lon"))
+            return df[["municipio_ibge", "municipio", "uf", "lat", "lon", "focos"]] \
+                .sort_values("municipio_ibge", kind="stable").reset_index(drop=True)
+
+        return _cached(("fires_map", uf, start, end, municipio_ibge), parts + (dim_state,), compute)
+
+def drilldown(uf: str | None = None, start: date | None = None, end: date | None = None,
+              municipio_ibge: int | None = None) -> pd.DataFrame:
+    """Drilldown: tabela diária por município (data desc, nome) de fact_risk_daily em [start, end]."""
+    with metrics.timer("gold.query", query="drilldown"):
+        start, end = (start, end or _today()) if start else _window(30, end)
+        dim_state = _dim_state()
+        ufs = _ufs_arg(uf)
+        if ufs is None and municipio_ibge is not None:
+            own = _uf_of(municipio_ibge, _dim(dim_state))
+            ufs = None if own is None else [own]
+        parts = _select("fact_risk_daily", ufs, start, end)
+        cols = [c for c in DRILLDOWN_COLUMNS if c != "municipio"]
+
+        def compute():
+            flt = _date_range(start, end)
+            if municipio_ibge is not None:
+                flt = flt & (pc.field("municipio_ibge") == int(municipio_ibge))
+            df = _with_names(_read("fact_risk_daily", parts, cols, flt), _dim(dim_state))
+            df = df.sort_values(["date", "municipio", "municipio_ibge"], ascending=[False, True, True],
+                                na_position="last", kind="stable")
+            return df[DRILLDOWN_COLUMNS].reset_index(drop=True)
+
+        return _cached(("drilldown", uf, start, end, municipio_ibge), parts + (dim_state,), compute)
+
+def drilldown_totals(df: pd.DataFrame) -> dict:
+    """Linha 'Total' da tabela do drilldown (somas, médias e máximo como no relatório)."""
+    def num(c):
+        return pd.to_numeric(df[c], errors="coerce")
+    out = {
+        "focos": num("focos").sum(), "focos_3d": num("focos_3d").mean(),
+        "focos_3d_100k": num("focos_3d_100k").sum(), "risk_score": num("risk_score").mean(),
+        "precip_sum": num("precip_sum").sum(), "temp_mean": num("temp_mean").mean(),
+        "wind_max": num("wind_max").max(),
+    }
+    return {k: None if pd.isna(v) else float(v) for k, v in out.items()}
+
+def _parse_day(s: str | None) -> date | None:
+    return datetime.strptime(s, "%Y-%m-%d").date() if s else None
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Consultas rápidas sobre o gold particionado.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("risk-series", help="Série de risco de um município")
+    r.add_argument("municipio_ibge", type=int)
+    r.add_argument("--days", type=int, default=30)
+    r.add_argument("--end", default=None, help="AAAA-MM-DD; default: hoje (UTC)")
+    t = sub.add_parser("top", help="Top municípios por métrica num dia")
+    t.add_argument("--uf", default=None)
+    t.add_argument("--day", default=None, help="AAAA-MM-DD; default: data mais recente")
+    t.add_argument("--metric", default="focos_3d_100k")
+    t.add_argument("--n", type=int, default=50)
+    f = sub.add_parser("top-fires", help="Municípios com mais focos nos últimos N dias")
+    f.add_argument("--uf", default=None)
+    f.add_argument("--days", type=int, default=30)
+    f.add_argument("--end", default=None)
+    f.add_argument("--n", type=int, default=10)
+    d = sub.add_parser("drilldown", help="Tabela diária por município + totais")
+    d.add_argument("--uf", default=None)
+    d.add_argument("--municipio", type=int, default=None)
+    d.add_argument("--start", default=None)
+    d.add_argument("--end", default=None)
+    args = ap.parse_args()
+
+    pd.set_option("display.width", 200)
+    if args.cmd == "risk-series":
+        print(risk_series(args.municipio_ibge, days=args.days, end=_parse_day(args.end)).to_string(index=False))
+    elif args.cmd == "top":
+        print(top_municipios(args.uf, day=_parse_day(args.day), metric=args.metric, n=args.n).to_string(index=False))
+    elif args.cmd == "top-fires":
+        print(top_fires(args.uf, days=args.days, end=_parse_day(args.end), n=args.n).to_string(index=False))
+    elif args.cmd == "drilldown":
+        df = drilldown(args.uf, start=_parse_day(args.start), end=_parse_day(args.end),
+                       municipio_ibge=args.municipio)
+        print(df.to_string(index=False))
+        print("[query] total:", drilldown_totals(df))
@@ -0,0 +1,164 @@
+# etl/gold/risk_baseline.py
+"""
+Baselines de normalização do risk_score, versionados em data/gold/_baselines.
+
+O risk_score é a média de 4 componentes (vento, umidade, chuva, focos/100k),
+cada um levado a [0, 1] por min–max. Sem baseline, o min/max sai dos dados
+da janela atual (_safe_norm) e todo o histórico muda a cada execução. Com
+baseline, os limites vêm de um período de referência fixo:
+
+    risco(dia) = média_k clip((x_k - min_k) / (max_k - min_k), 0, 1)
+
+então o score de um dia não depende dos outros dias e dá para acrescentar
+só os dias novos (export_parquet --incremental).
+
+Arquivos:
+    data/gold/_baselines/risk_baseline-<versão>.json   (imutáveis)
+    data/gold/_baselines/current.json                  (cópia do ativo)
+
+O refresh é um job separado, lido das partições de fact_risk_daily (que
+guardam os valores brutos wind_max/hum_min/precip_sum/focos_3d_100k):
+
+    python -m etl.gold.risk_baseline refresh --start 2024-01-01 --end 2024-12-31
+    python -m etl.gold.risk_baseline list
+    python -m etl.gold.risk_baseline activate <versão>
+"""
+import hashlib, json, os
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+BASELINE_DIR = Path("data/gold/_baselines")
+FORMAT = 1
+# colunas brutas de fact_risk_daily usadas pelos componentes
+SOURCE_COLUMNS = ["date", "wind_max", "hum_min", "precip_sum", "focos_3d_100k"]
+
+@dataclass(frozen=True)
+class Baseline:
+    version: str
+    bounds: dict        # componente -> (min, max)
+    period: dict        # {"start": "AAAA-MM-DD", "end": "AAAA-MM-DD"}
+    rows: int
+    created_at: str
+
+    def to_json(self) -> dict:
+        return {
+            "format": FORMAT, "version": self.version, "method": "minmax", "created_at": self.created_at,
+            "period": self.period, "rows": self.rows,
+            "components": {k: {"min": mn, "max": mx} for k, (mn, mx) in self.bounds.items()},
+        }
+
+    @classmethod
+    def from_json(cls, d: dict) -> "Baseline":
+        if d.get("format") != FORMAT:
+            raise ValueError(f"formato de baseline não suportado: {d.get('format')}")
+        return cls(version=d["version"], period=d["period"], rows=d["rows"], created_at=d["created_at"],
+                   bounds={k: (v["min"], v["max"]) for k, v in d["components"].items()})
+
+def _num(v):
+    return None if v is None or v != v else float(v)
+
+def make_baseline(bounds: dict, start: date, end: date, rows: int) -> Baseline:
+    bounds = {k: (_num(mn), _num(mx)) for k, (mn, mx) in bounds.items()}
+    period = {"start": start.isoformat(), "end": end.isoformat()}
+    digest = hashlib.sha1(json.dumps([bounds, period], sort_keys=True).encode()).hexdigest()[:8]
+    created = datetime.now(timezone.utc)
+    return Baseline(version=f"{created:%Y%m%d}-{digest}", bounds=bounds, period=period, rows=rows,
+                    created_at=created.isoformat())
+
+# ---------- persistência ----------
+def _atomic_write_json(path: Path, data: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + f".tmp{os.getpid()}")
+    tmp.write_text(json.dumps(data, indent=1, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+def save(baseline: Baseline, activate: bool = True) -> Path:
+    path = BASELINE_DIR / f"risk_baseline-{baseline.version}.json"
+    _atomic_write_json(path, baseline.to_json())
+    if activate:
+        _atomic_write_json(BASELINE_DIR / "current.json", baseline.to_json())
+    return path
+
+def load_current() -> Baseline | None:
+    """Baseline ativo ou None (=> normalização legada pela janela)."""
+    path = BASELINE_DIR / "current.json"
+    if not path.exists():
+        return None
+    return Baseline.from_json(json.loads(path.read_text(encoding="utf-8")))
+
+def versions() -> list[Baseline]:
+    out = [Baseline.from_json(json.loads(p.read_text(encoding="utf-8")))
+           for p in sorted(BASELINE_DIR.glob("risk_baseline-*.json"))]
+    return sorted(out, key=lambda b: b.created_at)
+
+def activate(version: str) -> Baseline:
+    path = BASELINE_DIR / f"risk_baseline-{version}.json"
+    if not path.exists():
+        raise FileNotFoundError(f"baseline não encontrado: {path}")
+    b = Baseline.from_json(json.loads(path.read_text(encoding="utf-8")))
+    _atomic_write_json(BASELINE_DIR / "current.json", b.to_json())
+    return b
+
+# ---------- refresh (job separado) ----------
+def compute_from_gold(start: date, end: date, root: str | Path | None = None) -> Baseline:
+    """
+    Limites por componente sobre fact_risk_daily em [start, end], uma partição
+    por vez (min/max combinam entre partições, memória de uma partição).
+    """
+    from etl.gold import export_parquet as ex
+    base = Path(root or ex.PARQUET_ROOT) / "fact_risk_daily"
+    parts, rows = [], 0
+    for f in sorted(base.glob("uf=*/year=*/month=*/part.parquet")):
+        kv = dict(p.split("=", 1) for p in f.relative_to(base).parts[:-1])
+        ym = (int(kv["year"]), int(kv["month"]))
+        if not ((start.year, start.month) <= ym <= (end.year, end.month)):
+            continue
+        t = pq.read_table(f, columns=SOURCE_COLUMNS)
+        d = t.column("date")
+        t = t.filter(pc.and_(pc.greater_equal(d, pa.scalar(start, pa.date32())),
+                             pc.less_equal(d, pa.scalar(end, pa.date32()))))
+        if t.num_rows == 0:
+            continue
+        parts.append(ex.risk_bounds(t.to_pandas()))
+        rows += t.num_rows
+    if not rows:
+        raise SystemExit(f"Sem linhas em {base} entre {start} e {end}; rode o gold antes do refresh.")
+    return make_baseline(ex.merge_bounds(parts), start, end, rows)
+
+def _parse_day(s: str) -> date:
+    return datetime.strptime(s, "%Y-%m-%d").date()
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Baselines de normalização do risk_score.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("refresh", help="Calcula um baseline novo a partir de fact_risk_daily")
+    r.add_argument("--start", default=None, help="AAAA-MM-DD; default: fim - 365 dias")
+    r.add_argument("--end", default=None, help="AAAA-MM-DD; default: ontem (UTC)")
+    r.add_argument("--no-activate", action="store_true", help="Só grava a versão, sem torná-la a ativa")
+    sub.add_parser("list", help="Lista as versões")
+    a = sub.add_parser("activate", help="Ativa uma versão existente (ex.: rollback)")
+    a.add_argument("version")
+    args = ap.parse_args()
+
+    if args.cmd == "refresh":
+        end = _parse_day(args.end) if args.end else datetime.now(timezone.utc).date() - timedelta(days=1)
+        start = _parse_day(args.start) if args.start else end - timedelta(days=365)
+        b = compute_from_gold(start, end)
+        path = save(b, activate=not args.no_activate)
+        print(f"[baseline] {b.version} ({b.rows} linhas, {start} → {end}) -> {path}"
+              + ("" if args.no_activate else " [ativo]"))
+        for k, (mn, mx) in b.bounds.items():
+            print(f"[baseline]   {k:<6} min={mn} max={mx}")
+    elif args.cmd == "list":
+        cur = load_current()
+        for b in versions():
+            mark = "*" if cur and cur.version == b.version else " "
+            print(f"{mark} {b.version}  {b.period['start']} → {b.period['end']}  rows={b.rows}")
+    elif args.cmd == "activate":
+        print(f"[baseline] ativo: {activate(args.version).version}")
@@ -0,0 +1,164 @@
+# etl/gold/sharded.py
+"""
+Gold sharded por UF: extração, risco e escrita das partições em processos.
+
+Cada shard (grupo de UFs) roda num processo com seu próprio MongoClient:
+as agregações começam com `$match` em meta.uf + ts (índice {meta.uf:1, ts:-1})
+e as saídas vão direto para as partições uf=.../year=.../month=... do shard
+(UFs distintas => partições distintas, sem disputa entre processos).
+
+Sem baseline (etl/gold/risk_baseline.py), o risk_score normaliza cada
+componente pelo min/max de TODO o país, então o risco roda em duas fases:
+  1) shard: agrega focos/clima, grava fact_fires_daily, calcula os
+     componentes do risco e devolve min/max deles (o frame fica em disco);
+  2) shard: aplica os limites globais e grava fact_risk_daily.
+Com baseline ativo, a fase 2 usa os limites dele. Resultado idêntico ao
+write_gold monolítico. Os arquivos únicos (fact_*.parquet) são remontados
+das partições com ParquetWriter.
+
+Uso:
+    python -m etl.gold.export_parquet --shards 6
+    python -m etl.gold.sharded --shards 6 --lookback-days 180
+"""
+import multiprocessing as mp, shutil, tempfile, time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from etl.common import metrics
+from etl.common.config import load_settings
+from etl.common.dateutils import last_n_days_window
+from etl.common.mongo import mongo_db
+
+# UFs em ordem aproximada de volume de focos: o round-robin espalha as pesadas entre shards
+UFS_BY_VOLUME = (
+    "PA", "MT", "MA", "TO", "AM", "PI", "BA", "RO", "MS", "AC", "GO", "MG", "CE", "RR",
+    "PE", "SP", "PR", "RS", "PB", "AP", "RN", "SC", "AL", "SE", "ES", "RJ", "DF",
+)
+OTHER = "_outras"   # docs sem UF ou com UF fora da lista (ex.: nome por extenso)
+
+def uf_groups(n_shards: int) -> list[tuple[str, ...]]:
+    """Divide as UFs em até n grupos (round-robin por volume) + o grupo das 'outras'."""
+    n = max(1, min(int(n_shards), len(UFS_BY_VOLUME)))
+    groups = [UFS_BY_VOLUME[i::n] for i in range(n)]
+    return groups + [(OTHER,)]
+
+def _uf_filter(group: tuple[str, ...]) -> dict:
+    if group == (OTHER,):
+        return {"$nin": list(UFS_BY_VOLUME)}
+    return {"$in": list(group)}
+
+# ---------- fases (processos filhos) ----------
+def _extract_shard(mongo_uri: str, group: tuple[str, ...], lookback_days: int, dim_pop: pd.DataFrame,
+                   spill_dir: str, root: str) -> dict:
+    from etl.gold import export_parquet as ex
+    t0 = time.perf_counter()
+    uf_filter = _uf_filter(group)
+    with mongo_db(mongo_uri) as db:
+        fires_df = ex.build_fact_fires_daily(mongo_uri, lookback_days=lookback_days, db=db, uf_filter=uf_filter)
+        weather_df = ex.build_weather_daily(mongo_uri, lookback_days=lookback_days, db=db, uf_filter=uf_filter)
+
+    if not fires_df.empty:
+        ex._write_partitioned(fires_df, Path(root) / "fact_fires_daily", ["uf","year","month"])
+
+    out = {"group": group, "fires_rows": len(fires_df), "weather_rows": len(weather_df),
+           "bounds": None, "spill": None}
+    with metrics.timer("gold.build_risk", phase="inputs"):
+        fwd = ex._risk_inputs(fires_df, weather_df, dim_pop)
+    if fwd is not None and not fwd.empty:
+        out["bounds"] = ex.risk_bounds(fwd)
+        spill = Path(spill_dir) / f"risk_{'_'.join(group)}.parquet"
+        pq.write_table(pa.Table.from_pandas(fwd, preserve_index=False), spill)
+        out["spill"] = str(spill)
+    out["elapsed_s"] = round(time.perf_counter() - t0, 3)
+    out["metrics"] = metrics.REGISTRY.snapshot()
+    return out
+
+def _score_shard(spill: str, bounds: dict, clip: bool, root: str) -> dict:
+    from etl.gold import export_parquet as ex
+    fwd = pq.read_table(spill).to_pandas()
+    with metrics.timer("gold.build_risk", phase="score"):
+        risk_df = ex.score_risk(fwd, bounds, clip=clip)
+    ex._write_partitioned(risk_df, Path(root) / "fact_risk_daily", ["uf","year","month"])
+    return {"risk_rows": len(risk_df), "metrics": metrics.REGISTRY.snapshot()}
+
+# ---------- orquestração ----------
+def _merge_counters(snapshots: list[list[dict]]):
+    """Soma os contadores dos filhos no registro do pai (timers dos filhos ficam só no log)."""
+    for snap in snapshots:
+        for r in snap:
+            if r["type"] == "counter":
+                metrics.incr(r["name"], r["value"], **r["labels"])
+
+def run_sharded(mongo_uri: str, lookback_days: int = 180, shards: int = 4, workers: int | None = None,
+                db=None) -> dict:
+    """Gold completo (fires, risk, dim) com shards por grupo de UF num pool de processos."""
+    from etl.gold import export_parquet as ex
+
+    root = Path(ex.PARQUET_ROOT)
+    groups = uf_groups(shards)
+    workers = max(1, workers or shards)
+    with metrics.timer("gold.load_dim"):
+        dim_mun = ex.load_snapshot(mongo_uri, db=db).to_frame()
+    dim_pop = dim_mun[["municipio_ibge", "populacao"]]
+    since = last_n_days_window(lookback_days)[0].date()
+    baseline = ex._active_baseline()
+
+    spill_dir = tempfile.mkdtemp(prefix="gold-shards-")
+    children = []
+    try:
+        ctx = mp.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool, \
+             metrics.timer("gold.sharded_seconds"):
+            # fase 1: extração + focos + componentes do risco por shard
+            futs = [pool.submit(_extract_shard, mongo_uri, g, lookback_days, dim_pop, spill_dir, str(root))
+                    for g in groups]
+            phase1 = [f.result() for f in futs]
+            for r in phase1:
+                print(f"[gold] shard {','.join(r['group'])}: focos={r['fires_rows']} clima={r['weather_rows']} "
+                      f"({r['elapsed_s']:.2f}s)")
+            children += [r["metrics"] for r in phase1]
+
+            # fase 2: normalização com o baseline ou com os limites do país inteiro
+            if baseline is not None:
+                bounds = baseline.bounds
+            else:
+                bounds = ex.merge_bounds([r["bounds"] for r in phase1 if r["bounds"]])
+            futs = [pool.submit(_score_shard, r["spill"], bounds, baseline is not None, str(root))
+                    for r in phase1 if r["spill"]]
+            phase2 = [f.result() for f in futs]
+            children += [r["metrics"] for r in phase2]
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+    _merge_counters(children)
+
+    fires_rows = sum(r["fires_rows"] for r in phase1)
+    risk_rows = sum(r["risk_rows"] for r in phase2)
+    # arquivos únicos: mesma janela do modo monolítico, remontados das partições
+    if fires_rows:
+        ex.rebuild_single("fact_fires_daily", since=since)
+        print("[gold] fact_fires_daily OK (partitioned + single, sharded)")
+    else:
+        print("[gold] fact_fires_daily: vazio")
+    if risk_rows:
+        ex.rebuild_single("fact_risk_daily", since=since)
+        print("[gold] fact_risk_daily OK (partitioned + single, sharded)")
+    else:
+        print("[gold] fact_risk_daily: clima vazio")
+    ex.write_dim(dim_mun)
+    if risk_rows:
+        ex.write_hot_index()
+    return {"shards": len(groups), "fires_rows": fires_rows, "risk_rows": risk_rows}
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Gold sharded por UF em processos.")
+    ap.add_argument("--shards", type=int, default=4, help="Grupos de UF (+1 para UF ausente/outras)")
+    ap.add_argument("--workers", type=int, default=None, help="Processos; default: --shards")
+    ap.add_argument("--lookback-days", type=int, default=180)
+    args = ap.parse_args()
+    print(run_sharded(load_settings().mongo_uri, lookback_days=args.lookback_days, shards=args.shards,
+                      workers=args.workers))
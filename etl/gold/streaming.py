@@ -0,0 +1,304 @@
+# etl/gold/streaming.py
+"""
+Gold em janelas sequenciais, com memória limitada a uma janela (lookbacks
+longos na máquina de exportação).
+
+O gold monolítico (write_gold) segura fires_df, weather_df e risk_df do
+lookback inteiro ao mesmo tempo, mais as cópias do _risk_inputs e as cópias
+ordenadas dos arquivos únicos. Aqui o intervalo [início do lookback, agora)
+é cortado em meses (ou em GOLD_WINDOW_DAYS dias) e cada janela é extraída,
+pontuada e anexada às saídas com pyarrow.ParquetWriter (schemas explícitos):
+    data/gold/fact_*_daily/uf=/year=/month=/part.parquet   um writer por partição,
+                                                          fechado quando o mês acaba
+    data/gold/fact_*_daily.parquet                        um writer, uma escrita por janela
+
+Entre janelas só passa o carry do focos_3d: o rolling(3) do legado é por
+linha (município, data ordenada), então bastam as 2 últimas linhas de focos
+de cada município (no máximo 2 x municípios linhas, qualquer que seja o
+lookback). O resultado é igual ao do gold monolítico; o arquivo único fica
+ordenado por janela e, dentro dela, por uf, date, municipio_ibge.
+
+Normalização do risk_score:
+- com baseline ativo, cada janela é pontuada e gravada na hora (1 passada);
+- sem baseline (legado), o min/max é do lookback inteiro: a 1ª passada grava
+  os insumos de cada janela num spill temporário e acumula os limites
+  (merge_bounds, como no gold sharded); a 2ª relê janela a janela e pontua.
+
+Retomada (--resume, com baseline ativo): cada mês cujas partições foram
+publicadas vira uma unidade no diário (etl/common/journal.py). Numa retomada,
+com a mesma janela e o mesmo baseline da execução interrompida, as janelas
+de meses já publicados só reextraem os focos (para o carry); o resto segue
+normal e, no fim, os arquivos únicos são remontados das partições
+(rebuild_single) e o índice quente é relido deles. Sem baseline o score
+depende do lookback inteiro e tudo é refeito.
+
+Uso:
+    python -m etl.gold.streaming --lookback-days 1095
+    python -m etl.gold.streaming --lookback-days 1095 --resume
+    python -m etl.gold.export_parquet --streaming          # GOLD_STREAMING=1, GOLD_LOOKBACK_DAYS
+"""
+import os, shutil, tempfile, time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from etl.common import journal, metrics
+from etl.common.dateutils import last_n_days_window
+from etl.common.mongo import mongo_db
+
+WINDOW_DAYS = int(os.environ.get("GOLD_WINDOW_DAYS", "0"))   # 0 = meses do calendário
+
+FIRES_PART_SCHEMA = pa.schema([
+    ("date", pa.date32()), ("municipio_ibge", pa.int64()), ("focos", pa.int64()), ("p95_conf", pa.float64()),
+])
+RISK_PART_SCHEMA = pa.schema(
+    [("date", pa.date32()), ("municipio_ibge", pa.int64())] +
+    [(c, pa.float64()) for c in ("temp_mean", "hum_min", "wind_max", "gust_max", "cloud_mean", "precip_sum",
+                                 "focos", "focos_3d", "focos_3d_100k", "risk_score")]
+)
+
+def _single_schema(part: pa.Schema) -> pa.Schema:
+    """Arquivo único = colunas da partição + uf/year/month, na ordem do write_gold."""
+    fields = list(part)
+    return pa.schema(fields[:2] + [pa.field("uf", pa.string())] + fields[2:] +
+                     [pa.field("year", pa.int32()), pa.field("month", pa.int64())])
+
+FIRES_SCHEMA = _single_schema(FIRES_PART_SCHEMA)
+RISK_SCHEMA = _single_schema(RISK_PART_SCHEMA)
+
+def windows(start: datetime, end: datetime, days: int = WINDOW_DAYS) -> list[tuple[datetime, datetime]]:
+    """[start, end) em janelas consecutivas: meses do calendário (days=0) ou blocos de `days` dias."""
+    out, cur = [], start
+    while cur < end:
+        if days > 0:
+            nxt = cur + timedelta(days=days)
+        else:
+            nxt = (cur.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0, second=0,
+                                                                    microsecond=0)
+        out.append((cur, min(nxt, end)))
+        cur = nxt
+    return out
+
+# ---------- escrita incremental ----------
+def _table(df: pd.DataFrame, schema: pa.Schema) -> pa.Table:
+    df = df.replace([np.inf, -np.inf], np.nan)
+    cols = []
+    for fld in schema:
+        if fld.name not in df.columns:
+            cols.append(pa.nulls(len(df), fld.type))
+            continue
+        s = df[fld.name]
+        if pa.types.is_integer(fld.type):
+            s = pd.to_numeric(s, errors="coerce").astype("Int64")
+        elif pa.types.is_floating(fld.type):
+            s = pd.to_numeric(s, errors="coerce").astype(float)
+        cols.append(pa.array(s, type=fld.type, from_pandas=True))
+    return pa.Table.from_arrays(cols, schema=schema)
+
+def _append_partitioned(writers: dict, df: pd.DataFrame, base: Path, schema: pa.Schema):
+    """Anexa as linhas às partições uf/year/month (abre o writer da partição na 1ª vez)."""
+    h_part = metrics.histogram("gold.write_partition_seconds", dataset=base.name)
+    for (uf, year, month), sub in df.groupby(["uf", "year", "month"], dropna=False, sort=True):
+        t0 = time.perf_counter()
+        key = ("" if pd.isna(uf) else str(uf), int(year), int(month))
+        if key not in writers:
+            out_dir = base / f"uf={key[0]}" / f"year={key[1]}" / f"month={key[2]}"
+            out_dir.mkdir(parents=True, exist_ok=True)
+            tmp = out_dir / "part.parquet.tmp"
+            writers[key] = (pq.ParquetWriter(tmp, schema), tmp)
+            metrics.incr("gold.partitions_written", dataset=base.name)
+        writers[key][0].write_table(_table(sub.sort_values(["date", "municipio_ibge"]), schema))
+        h_part.observe(time.perf_counter() - t0)
+    metrics.incr("gold.rows_written", len(df), dataset=base.name)
+
+def _close_partitions(writers: dict, before: tuple[int, int] | None = None):
+    """Fecha e publica (tmp -> part.parquet) os writers dos meses < `before` (todos, se None)."""
+    for key in [k for k in writers if before is None or k[1:] < before]:
+        w, tmp = writers.pop(key)
+        w.close()
+        os.replace(tmp, tmp.with_suffix(""))
+
+# ---------- janelas ----------
+def _month_units(ws: datetime, we: datetime) -> list[tuple[int, int]]:
+    """Meses (ano, mês) tocados por [ws, we)."""
+    last = we - timedelta(microseconds=1)
+    y, m, out = ws.year, ws.month, []
+    while (y, m) <= (last.year, last.month):
+        out.append((y, m))
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return out
+
+def _drop_months(df: pd.DataFrame, months: set) -> pd.DataFrame:
+    """Tira as linhas de meses já publicados (retomada com janelas que cruzam o mês)."""
+    if df.empty or not months:
+        return df
+    return df[~pd.MultiIndex.from_arrays([df["year"], df["month"]]).isin(list(months))]
+
+def _window_inputs(ex, mongo_uri, db, ws, we, carry, dim_pop):
+    """Focos da janela, insumos do risco (com o carry no rolling) e o novo carry."""
+    fires = ex.build_fact_fires_daily(mongo_uri, db=db, start=ws, end=we)
+    weather = ex.build_weather_daily(mongo_uri, db=db, start=ws, end=we)
+    with_carry = ex._with_carry(carry, fires)
+    with metrics.timer("gold.build_risk", phase="inputs"):
+        fwd = ex._risk_inputs(with_carry, weather, dim_pop)
+    return fires, fwd, ex.fires_carry(with_carry)
+
+def run_streaming(mongo_uri: str, lookback_days: int = 180, window_days: int = WINDOW_DAYS, db=None,
+                  resume: bool = False) -> dict:
+    """Gold completo (fires, risk, dim, índice quente) janela a janela. Retorna contagens e janelas."""
+    from etl.gold import export_parquet as ex
+
+    root = Path(ex.PARQUET_ROOT)
+    start, end = last_n_days_window(lookback_days)
+    baseline = ex._active_baseline()
+    jr, published = None, set()
+    if baseline is not None:
+        jr = journal.open_run("gold", {"start": start, "end": end, "window_days": window_days,
+                                       "baseline": baseline.version},
+                              resume=resume, same=("window_days", "baseline"))
+        start, end = jr.params["start"], jr.params["end"]
+        published = {tuple(int(x) for x in u[len("month:"):].split("-")) for u in jr.units_done("month:")}
+    elif resume:
+        print("[journal] gold: sem baseline o score depende do lookback inteiro; refazendo tudo")
+    wins = windows(start, end, window_days)
+    single = not published   # retomada: arquivos únicos remontados das partições no fim
+    print(f"[gold] streaming: {len(wins)} janelas de {start.date()} a {end.date()}"
+          + (f" ({len(published)} meses já publicados)" if published else ""))
+
+    with mongo_db(mongo_uri, db) as db:
+        with metrics.timer("gold.load_dim"):
+            dim_mun = ex.load_snapshot(mongo_uri, db=db).to_frame()
+        dim_pop = dim_mun[["municipio_ibge", "populacao"]]
+
+        root.mkdir(parents=True, exist_ok=True)
+        fire_parts, risk_parts = {}, {}
+        fires_single = pq.ParquetWriter(root / "fact_fires_daily.parquet.tmp", FIRES_SCHEMA) if single else None
+        risk_single = pq.ParquetWriter(root / "fact_risk_daily.parquet.tmp", RISK_SCHEMA) if single else None
+        spill_dir = Path(tempfile.mkdtemp(prefix="gold-stream-"))
+        carry = pd.DataFrame(columns=ex.FIRES_COLUMNS)
+        latest = None
+        out = {"windows": len(wins), "fires_rows": 0, "risk_rows": 0}
+        pending_months: list[tuple[int, int]] = []
+
+        def publish_months(before: tuple[int, int] | None = None):
+            """Registra no diário os meses com as partições dos dois datasets já publicadas."""
+            while pending_months and (before is None or pending_months[0] < before):
+                y, m = pending_months.pop(0)
+                if jr is not None:
+                    jr.complete(f"month:{y:04d}-{m:02d}")
+
+        def emit_risk(risk_df: pd.DataFrame, we: datetime):
+            nonlocal latest
+            risk_df = _drop_months(risk_df, published)
+            if not risk_df.empty:
+                _append_partitioned(risk_parts, risk_df, root / "fact_risk_daily", RISK_PART_SCHEMA)
+                if single:
+                    risk_single.write_table(
+                        _table(risk_df.sort_values(["uf", "date", "municipio_ibge"]), RISK_SCHEMA))
+                # índice quente: só a última linha de cada município
+                both = risk_df if latest is None else pd.concat([latest, risk_df], ignore_index=True)
+                latest = both.sort_values(["municipio_ibge", "date"]).drop_duplicates("municipio_ibge", keep="last")
+                out["risk_rows"] += len(risk_df)
+            _close_partitions(risk_parts, before=(we.year, we.month))   # meses encerrados
+
+        try:
+            spills, parts_bounds = [], []
+            with metrics.timer("gold.streaming_seconds"):
+                for i, (ws, we) in enumerate(wins):
+                    months = _month_units(ws, we)
+                    if published.issuperset(months):
+                        # meses já publicados: só os focos, para o carry do rolling
+                        fires = ex.build_fact_fires_daily(mongo_uri, db=db, start=ws, end=we)
+                        carry = ex.fires_carry(ex._with_carry(carry, fires))
+                        print(f"[journal] gold {ws.date()} → {we.date()}: já publicada")
+                        continue
+                    pending_months += [ym for ym in months if ym not in published and ym not in pending_months]
+                    with metrics.timer("gold.window_seconds"):
+                        fires, fwd, carry = _window_inputs(ex, mongo_uri, db, ws, we, carry, dim_pop)
+                        fires = _drop_months(fires, published)
+                        if not fires.empty:
+                            _append_partitioned(fire_parts, fires, root / "fact_fires_daily", FIRES_PART_SCHEMA)
+                            if single:
+                                fires_single.write_table(
+                                    _table(fires.sort_values(["uf", "date", "municipio_ibge"]), FIRES_SCHEMA))
+                            out["fires_rows"] += len(fires)
+                        _close_partitions(fire_parts, before=(we.year, we.month))
+                        if fwd is None or fwd.empty:
+                            pass
+                        elif baseline is not None:
+                            with metrics.timer("gold.build_risk", phase="score"):
+                                risk_df = ex.score_risk(fwd, baseline.bounds, clip=True)
+                            emit_risk(risk_df, we)
+                            del risk_df
+                        else:
+                            parts_bounds.append(ex.risk_bounds(fwd))
+                            spill = spill_dir / f"w{i:04d}.parquet"
+                            pq.write_table(pa.Table.from_pandas(fwd, preserve_index=False), spill)
+                            spills.append((spill, we))
+                        del fires, fwd
+                        if baseline is not None:
+                            _close_partitions(risk_parts, before=(we.year, we.month))
+                            publish_months(before=(we.year, we.month))
+                    print(f"[gold] streaming {ws.date()} → {we.date()}: focos={out['fires_rows']} "
+                          f"risco={out['risk_rows']}")
+
+                # sem baseline: 2ª passada com os limites do lookback inteiro
+                if spills:
+                    bounds = ex.merge_bounds(parts_bounds)
+                    for spill, we in spills:
+                        fwd = pq.read_table(spill).to_pandas()
+                        with metrics.timer("gold.build_risk", phase="score"):
+                            risk_df = ex.score_risk(fwd, bounds)
+                        del fwd
+                        emit_risk(risk_df, we)
+                        spill.unlink()
+            _close_partitions(fire_parts)
+            _close_partitions(risk_parts)
+            publish_months()
+        finally:
+            # em erro, os .tmp ficam para trás e as saídas anteriores continuam valendo
+            for w, _ in (*fire_parts.values(), *risk_parts.values()):
+                w.close()
+            for w in (fires_single, risk_single):
+                if w is not None:
+                    w.close()
+            shutil.rmtree(spill_dir, ignore_errors=True)
+
+    if not single:
+        for dataset in ("fact_fires_daily", "fact_risk_daily"):
+            print(f"[gold] {dataset}.parquet remontado das partições: "
+                  f"{ex.rebuild_single(dataset, since=start.date())} linhas")
+        ex.write_dim(dim_mun)
+        ex.write_hot_index()
+        jr.finish()
+        return out
+
+    for dataset, rows in (("fact_fires_daily", out["fires_rows"]), ("fact_risk_daily", out["risk_rows"])):
+        tmp = root / f"{dataset}.parquet.tmp"
+        if rows:
+            os.replace(tmp, root / f"{dataset}.parquet")
+            print(f"[gold] {dataset} OK (partitioned + single, streaming; {rows} linhas)")
+        else:
+            tmp.unlink(missing_ok=True)
+            print(f"[gold] {dataset}: vazio")
+    ex.write_dim(dim_mun)
+    if latest is not None:
+        ex.write_hot_index(latest, dim_mun)
+    if jr is not None:
+        jr.finish()
+    return out
+
+if __name__ == "__main__":
+    import argparse
+    from etl.common.config import load_settings
+    ap = argparse.ArgumentParser(description="Gold em janelas sequenciais (memória de uma janela).")
+    ap.add_argument("--lookback-days", type=int, default=int(os.environ.get("GOLD_LOOKBACK_DAYS", "180")))
+    ap.add_argument("--window-days", type=int, default=WINDOW_DAYS, help="0 = meses do calendário")
+    ap.add_argument("--resume", action="store_true", help="Pula os meses já publicados pela execução interrompida")
+    args = ap.parse_args()
+    print(run_streaming(load_settings().mongo_uri, lookback_days=args.lookback_days, window_days=args.window_days,
+                        resume=args.resume))
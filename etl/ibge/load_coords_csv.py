@@ -1,59 +1,39 @@
 # etl/ibge/load_coords_csv.py
-import sys, re
+import sys
 import pandas as pd
-from pymongo import MongoClient, UpdateOne
+from pymongo import UpdateOne
+from etl.common import refdata
 from etl.common.config import load_settings
+from etl.common.ibge import digits_int, norm_col, pick_col, read_csv_fast
+from etl.common.mongo import mongo_db
+from etl.common.refdata import cached_csv_frame
 
 CAND_ID  = {"codigo_ibge","municipio_ibge","cod_municipio","ibge","codigo","codigo_municipio"}
 CAND_LAT = {"lat","latitude"}
 CAND_LON = {"lon","long","longitude"}
 
-def _norm(s: str) -> str:
-    s = (s or "").strip().lower()
-    s = s.replace("á","a").replace("à","a").replace("ã","a").replace("â","a") \
-         .replace("é","e").replace("ê","e").replace("í","i").replace("ó","o") \
-         .replace("ô","o").replace("õ","o").replace("ú","u").replace("ç","c")
-    s = re.sub(r"[^a-z0-9]+","_", s)
-    s = re.sub(r"_+","_", s).strip("_")
-    return s
-
-def _pick(df: pd.DataFrame, candidates: set[str]) -> str | None:
-    for c in df.columns:
-        if _norm(c) in candidates:
-            return c
-    return None
-
-def _read_csv_any(path: str) -> pd.DataFrame:
-    for enc in ("utf-8-sig","utf-8","latin1"):
-        try:
-            return pd.read_csv(path, sep=None, engine="python", encoding=enc, dtype=str)
-        except Exception:
-            pass
-    return pd.read_csv(path, dtype=str)
-
 def load_coords(csv_path: str) -> pd.DataFrame:
-    df = _read_csv_any(csv_path)
+    # parse só roda de novo quando o conteúdo do CSV muda
+    return cached_csv_frame(csv_path, _parse_coords, tag="coords")
+
+def _parse_coords(csv_path: str) -> pd.DataFrame:
+    df = read_csv_fast(csv_path)
     if df.empty:
         raise ValueError("CSV vazio.")
 
     # renomeia colunas para norm
-    df = df.rename(columns={c:_norm(c) for c in df.columns})
+    df = df.rename(columns={c: norm_col(c) for c in df.columns})
 
-    id_col  = _pick(df, CAND_ID)
-    lat_col = _pick(df, CAND_LAT)
-    lon_col = _pick(df, CAND_LON)
+    id_col  = pick_col(df, CAND_ID)
+    lat_col = pick_col(df, CAND_LAT)
+    lon_col = pick_col(df, CAND_LON)
     missing = [n for n,v in {"id":id_col,"lat":lat_col,"lon":lon_col}.items() if v is None]
     if missing:
         raise ValueError(f"Colunas não encontradas no CSV: {missing} (aceitas id={CAND_ID}, lat={CAND_LAT}, lon={CAND_LON})")
 
     # converte tipos
-    def to_int(x):
-        if pd.isna(x): return None
-        s = re.sub(r"\D","", str(x))
-        return int(s) if s else None
-
     out = pd.DataFrame({
-        "codigo_ibge": df[id_col].map(to_int),
+        "codigo_ibge": digits_int(df[id_col]),
         "lat": pd.to_numeric(df[lat_col], errors="coerce"),
         "lon": pd.to_numeric(df[lon_col], errors="coerce"),
     })
@@ -65,31 +45,48 @@ def load_coords(csv_path: str) -> pd.DataFrame:
     out = out.drop_duplicates(subset=["codigo_ibge"], keep="last")
     return out
 
-def upsert_coords(df: pd.DataFrame, overwrite: bool) -> int:
+def upsert_coords(df: pd.DataFrame, overwrite: bool, db=None) -> int:
+    """
+    Lê lat/lon atuais de ref_municipios numa única consulta e só grava o que muda:
+    - overwrite=True: municípios cujo lat/lon difere do CSV;
+    - overwrite=False: só municípios ainda sem lat/lon (ausente, null ou NaN).
+    Municípios que não existem na coleção são ignorados (não cria novos).
+    """
     s = load_settings()
-    cli = MongoClient(s.mongo_uri); db = cli.get_database()
-    col = db.ref_municipios
+    nan = float("nan")
+    missing_coords = [{"lat": None}, {"lon": None}, {"lat": nan}, {"lon": nan}]
 
-    ops = []
-    for r in df.to_dict(orient="records"):
-        filt = {"codigo_ibge": int(r["codigo_ibge"])}
-        if overwrite:
-            upd = {"$set": {"lat": float(r["lat"]), "lon": float(r["lon"])}}
-        else:
-            # só atualiza se lat/lon estiverem ausentes ou nulos
-            upd = {"$set": {"lat": float(r["lat"]), "lon": float(r["lon"])}}
-        ops.append(UpdateOne(filt, upd, upsert=False))  # não cria novos municípios
+    with mongo_db(s.mongo_uri, db) as db:
+        stored = refdata.stored_records(db, ["lat", "lon"])
+        ops = []
+        for r in df.to_dict(orient="records"):
+            code = int(r["codigo_ibge"])
+            cur = stored.get(code)
+            if cur is None:
+                continue  # não cria novos municípios
+            lat, lon = float(r["lat"]), float(r["lon"])
+            has_coords = not (refdata.is_missing(cur.get("lat")) or refdata.is_missing(cur.get("lon")))
+            if overwrite:
+                if has_coords and refdata.record_hash(cur, ["lat", "lon"]) == refdata.record_hash({"lat": lat, "lon": lon}):
+                    continue
+                filt = {"codigo_ibge": code}
+            else:
+                # só atualiza se lat/lon estiverem ausentes ou nulos
+                if has_coords:
+                    continue
+                filt = {"codigo_ibge": code, "$or": missing_coords}
+            ops.append(UpdateOne(filt, {"$set": {"lat": lat, "lon": lon}}, upsert=False))
 
-    if not ops:
-        cli.close()
-        return 0
-    res = col.bulk_write(ops, ordered=False)
-    cli.close()
+        print(f"[coords-csv] {len(df)} no CSV, {len(ops)} a gravar (overwrite={overwrite})")
+        if not ops:
+            return 0
+        res = db.ref_municipios.bulk_write(ops, ordered=False)
     return res.modified_count
 
-def main(csv_path: str, overwrite: bool):
+def main(csv_path: str, overwrite: bool, db=None):
     df = load_coords(csv_path)
-    n = upsert_coords(df, overwrite=overwrite)
+    n = upsert_coords(df, overwrite=overwrite, db=db)
+    refdata.invalidate()
     print(f"[coords-csv] Municípios atualizados (lat/lon): {n}")
 
 if __name__ == "__main__":
@@ -1,43 +1,16 @@
 # etl/ibge/load_ref_municipios.py
-import os, re, sys, unicodedata
+import os, sys
 from pathlib import Path
 from itertools import islice
 import pandas as pd
-from pymongo import MongoClient, UpdateOne
+from pymongo import UpdateOne
+from etl.common import refdata
 from etl.common.config import load_settings
+from etl.common.ibge import digits_int, norm_col, parse_pop, pick_col, read_csv_fast
+from etl.common.mongo import mongo_db
+from etl.common.refdata import cached_csv_frame
 
 # ---------- Helpers ----------
-def _strip_accents(s: str) -> str:
-    s = unicodedata.normalize("NFD", s)
-    s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
-    return unicodedata.normalize("NFC", s)
-
-def _norm_col(s: str) -> str:
-    s = (s or "").strip()
-    s = _strip_accents(s).lower()
-    s = re.sub(r"[^a-z0-9]+", "_", s)
-    s = re.sub(r"_+", "_", s).strip("_")
-    return s
-
-def _to_int_safe(x):
-    if pd.isna(x): return None
-    s = re.sub(r"\D", "", str(x))
-    return int(s) if s else None
-
-def _to_pop_int(x):
-    if pd.isna(x): return 0
-    s = str(x).strip().replace(".", "").replace(",", ".")
-    try: return int(float(s))
-    except Exception: return 0
-
-def _read_csv_any(path: str) -> pd.DataFrame:
-    for enc in ("utf-8-sig", "utf-8", "latin1"):
-        try:
-            return pd.read_csv(path, sep=None, engine="python", encoding=enc, dtype=str)
-        except Exception:
-            pass
-    return pd.read_csv(path, dtype=str)
-
 def _batches(it, size=1000):
     it = iter(it)
     while True:
@@ -55,45 +28,42 @@ CAND_LAT      = {"lat", "latitude"}
 CAND_LON      = {"lon", "long", "longitude"}
 CAND_AREA     = {"area_km2", "area", "area_total_km2"}
 
-def _pick_col(df: pd.DataFrame, cands: set[str]):
-    for c in df.columns:
-        if _norm_col(c) in cands:
-            return c
-    return None
-
 # ---------- Pipeline ----------
 def load_csv_to_dataframe(csv_path: str) -> pd.DataFrame:
     if not os.path.exists(csv_path):
         raise FileNotFoundError(f"CSV não encontrado: {csv_path}")
+    # parse só roda de novo quando o conteúdo do CSV muda
+    return cached_csv_frame(csv_path, _parse_csv, tag="ref")
 
-    raw = _read_csv_any(csv_path)
+def _parse_csv(csv_path: str) -> pd.DataFrame:
+    raw = read_csv_fast(csv_path)
     if raw.empty:
         raise ValueError("CSV lido está vazio.")
 
     # Normaliza nomes
-    rename_map = {c: _norm_col(c) for c in raw.columns}
+    rename_map = {c: norm_col(c) for c in raw.columns}
     df = raw.rename(columns=rename_map).copy()
 
     # Detecta colunas
-    col_mun_id   = _pick_col(df, CAND_MUN_ID)
-    col_mun_name = _pick_col(df, CAND_MUN_NAME)
-    col_uf       = _pick_col(df, CAND_UF)
-    col_uf_code  = _pick_col(df, CAND_UF_CODE)
-    col_pop      = _pick_col(df, CAND_POP)
-    col_lat      = _pick_col(df, CAND_LAT)
-    col_lon      = _pick_col(df, CAND_LON)
-    col_area     = _pick_col(df, CAND_AREA)
+    col_mun_id   = pick_col(df, CAND_MUN_ID)
+    col_mun_name = pick_col(df, CAND_MUN_NAME)
+    col_uf       = pick_col(df, CAND_UF)
+    col_uf_code  = pick_col(df, CAND_UF_CODE)
+    col_pop      = pick_col(df, CAND_POP)
+    col_lat      = pick_col(df, CAND_LAT)
+    col_lon      = pick_col(df, CAND_LON)
+    col_area     = pick_col(df, CAND_AREA)
 
     if not col_mun_id:
         raise ValueError("Não foi possível identificar a coluna do código do município (codigo_ibge).")
 
     # Chave IBGE (7 dígitos): usa já-pronto ou compõe COD_UF(2) + MUN(5)
-    mun_id_series = df[col_mun_id].apply(_to_int_safe)
+    mun_id_series = digits_int(df[col_mun_id])
     if col_uf_code is not None:
-        lengths = mun_id_series.dropna().astype(int).astype(str).str.len()
+        lengths = mun_id_series.dropna().astype(str).str.len()
         if not lengths.empty and (lengths.median() <= 5 or lengths.max() <= 6):
-            uf_code = df[col_uf_code].apply(_to_int_safe).fillna(0).astype(int)
-            mun5 = mun_id_series.fillna(0).astype(int)
+            uf_code = digits_int(df[col_uf_code]).fillna(0).astype("int64")
+            mun5 = mun_id_series.fillna(0).astype("int64")
             mun_id_series = (uf_code * 100000 + mun5).astype(int)
 
     if not col_mun_name:
@@ -105,7 +75,7 @@ def load_csv_to_dataframe(csv_path: str) -> pd.DataFrame:
     else:
         uf_series = pd.Series([None] * len(df))
 
-    pop_series = df[col_pop].apply(_to_pop_int).astype(int) if col_pop else pd.Series([0] * len(df), dtype=int)
+    pop_series = parse_pop(df[col_pop]) if col_pop else pd.Series([0] * len(df), dtype=int)
     lat_series  = pd.to_numeric(df[col_lat], errors="coerce") if col_lat else pd.Series([None]*len(df))
     lon_series  = pd.to_numeric(df[col_lon], errors="coerce") if col_lon else pd.Series([None]*len(df))
     area_series = pd.to_numeric(df[col_area], errors="coerce") if col_area else pd.Series([None]*len(df))
@@ -125,31 +95,46 @@ def load_csv_to_dataframe(csv_path: str) -> pd.DataFrame:
     out = out.drop_duplicates(subset=["codigo_ibge"], keep="last")
     return out
 
-def mongo_upsert(df: pd.DataFrame, mongo_uri: str, batch_size: int = 1000) -> int:
-    cli = MongoClient(mongo_uri)
-    db = cli.get_database()
-    col = db.get_collection("ref_municipios")
-
-    records = df.to_dict(orient="records")
+def mongo_upsert(df: pd.DataFrame, mongo_uri: str, batch_size: int = 1000, db=None) -> int:
+    """
+    Upsert incremental: lê o estado atual da coleção uma vez, compara o hash de
+    cada registro com o do documento gravado e só envia UpdateOne para
+    municípios novos ou alterados. Campos vazios (NaN/None) não sobrescrevem
+    o que já existe (ex.: lat/lon vindos do loader de coordenadas).
+    """
+    records = [
+        {k: v for k, v in r.items() if not refdata.is_missing(v)}
+        for r in df.to_dict(orient="records")
+    ]
+    fields = sorted({k for r in records for k in r})
     total = 0
-    for batch in _batches(records, batch_size):
-        ops = [
-            UpdateOne(
-                {"codigo_ibge": int(r["codigo_ibge"])},
-                {"$set": r},
-                upsert=True
-            )
-            for r in batch
+    with mongo_db(mongo_uri, db) as db:
+        col = db.get_collection("ref_municipios")
+        stored = refdata.stored_records(db, fields)
+        changed = [
+            r for r in records
+            if int(r["codigo_ibge"]) not in stored
+            or refdata.record_hash(r) != refdata.record_hash(stored[int(r["codigo_ibge"])], r.keys())
         ]
-        res = col.bulk_write(ops, ordered=False)
-        total += (res.upserted_count or 0) + (res.modified_count or 0)
-    cli.close()
+        print(f"[ref_municipios] {len(records)} no CSV, {len(changed)} novos/alterados")
+        for batch in _batches(changed, batch_size):
+            ops = [
+                UpdateOne(
+                    {"codigo_ibge": int(r["codigo_ibge"])},
+                    {"$set": r},
+                    upsert=True
+                )
+                for r in batch
+            ]
+            res = col.bulk_write(ops, ordered=False)
+            total += (res.upserted_count or 0) + (res.modified_count or 0)
     return total
 
-def main(csv_path="data/ref/municipios.csv"):
+def main(csv_path="data/ref/municipios.csv", db=None):
     s = load_settings()
     df = load_csv_to_dataframe(csv_path)
-    n = mongo_upsert(df, s.mongo_uri, 1000)
+    n = mongo_upsert(df, s.mongo_uri, 1000, db=db)
+    refdata.invalidate()
     print(f"[ref_municipios] Registros inseridos/atualizados: {n}")
 
 if __name__ == "__main__":
@@ -1,11 +1,12 @@
-import io, sys, csv, httpx
+import io, sys, csv, hashlib, itertools, time
 from tqdm import tqdm
-from pymongo import MongoClient
-from pymongo.errors import DuplicateKeyError
 from datetime import datetime, timezone
 from dateutil import parser as dtparser
+from etl.common import journal, metrics, refdata
 from etl.common.config import load_settings
 from etl.common.dateutils import last_n_days_window
+from etl.common.httpclient import get_client
+from etl.common.mongo import insert_dedup, mongo_db
 
 # Mapa UF nome->sigla e id->sigla (IBGE)
 UF_NOME2SIGLA = {
@@ -21,6 +22,8 @@ UF_ID2SIGLA = {
     29:"BA",31:"MG",32:"ES",33:"RJ",35:"SP",41:"PR",42:"SC",43:"RS",50:"MS",51:"MT",52:"GO",53:"DF"
 }
 
+DEDUP_FIELDS = {"ext_id": "ext_id"}   # chave em dedup_fires_extid -> campo do doc em raw_fires
+
 COL_MAP = {
     "ext_id": {"id","uid"},
     "lat": {"latitude","lat"},
@@ -109,61 +112,166 @@ def row_to_doc(row: dict):
         "ingest_ts": datetime.now(timezone.utc)
     }
 
-def fetch_and_ingest(days: int = 7, batch_size: int = 2000, no_window: bool=False, debug: int=0):
-    s = load_settings()
-    if not s.inpe_csv_urls:
-        print("ERRO: Configure INPE_CSV_URLS em configs/.env", file=sys.stderr)
-        sys.exit(1)
-
-    if not no_window:
-        date_start, date_end = last_n_days_window(days)
-        print(f"[WINDOW] {date_start.isoformat()} → {date_end.isoformat()} (UTC)")
-    else:
-        date_start = datetime(1970,1,1,tzinfo=timezone.utc)
-        date_end = datetime(9999,1,1,tzinfo=timezone.utc)
-        print("[WINDOW] desabilitada (no_window=True)")
+def _enrich_from_ref(doc: dict, snap):
+    """Completa UF (sigla) e nome do município pelo snapshot de referência, quando faltarem."""
+    meta = doc["meta"]
+    i = snap.row(meta["municipio_ibge"]) if meta["municipio_ibge"] is not None else None
+    if i is None:
+        return
+    uf = meta.get("uf")
+    if (not uf or len(str(uf)) != 2) and snap.uf[i]:
+        meta["uf"] = snap.uf[i]
+    if not meta.get("municipio") and snap.municipio[i]:
+        meta["municipio"] = snap.municipio[i]
 
-    client = MongoClient(s.mongo_uri)
-    db = client.get_database()
+def _ingest_urls(db, http, urls: list[str], delimiter: str, date_start, date_end, totals: dict, snap=None,
+                 batch_size: int = 2000, skip_missing: bool = False, jr=None):
+    """
+    Com `jr` (etl/common/journal.py): URLs concluídas nem são baixadas; numa
+    URL parcial, as linhas já gravadas (até o último lote) são puladas sem parse
+    — só se o arquivo baixado de novo for o mesmo (sha1/tamanho gravados com o
+    progresso): os diários do INPE são republicados ao longo do dia, e um
+    arquivo reescrito é relido do início, com o dedupe absorvendo as repetidas.
+    Antes de cada lote o diário registra as linhas em voo (`inflight`): na
+    retomada, os focos dessas linhas com ext_id reservado mas sem doc em
+    raw_fires (morte entre a reserva e a gravação) são gravados de novo.
+    """
     col_ts = db.get_collection("raw_fires")              # time-series
     col_dedup = db.get_collection("dedup_fires_extid")   # normal com unique
 
-    totals = {"read":0,"parsed":0,"out_of_window":0,"inserted":0,"skipped_dup":0}
-    for url in s.inpe_csv_urls:
+    h_row = metrics.histogram("fires.row_to_doc_seconds")
+    h_insert = metrics.histogram("fires.mongo_insert_seconds")
+    perf = time.perf_counter
+    batch_size = max(1, int(batch_size))
+
+    docs, keys = [], []
+    # linhas da URL atual já tratadas (gravadas ou descartadas); start = início do lote em docs;
+    # recover = fim das linhas que estavam em voo quando a tentativa anterior morreu
+    pos = {"unit": None, "rows": 0, "start": 0, "recover": 0, "fp": {}}
+    def flush():
+        if docs:
+            if jr is not None and pos["unit"]:
+                jr.mark(pos["unit"], rows=pos["start"], inflight=pos["rows"], **pos["fp"])
+            t0 = perf()
+            # dedup por ext_id em lote; sem ext_id grava direto (podem ocorrer raros duplicados)
+            inserted, dup = insert_dedup(col_ts, col_dedup, docs, keys,
+                                         recover=DEDUP_FIELDS if pos["start"] < pos["recover"] else None)
+            h_insert.observe(perf() - t0)
+            metrics.incr("fires.insert_batches")
+            totals["inserted"] += inserted
+            totals["skipped_dup"] += dup
+            docs.clear(); keys.clear()
+        if jr is not None and pos["unit"]:
+            jr.mark(pos["unit"], rows=pos["rows"], **pos["fp"])
+        pos["start"] = pos["rows"]
+
+    for url in urls:
+        unit = f"url:{url}"
+        if jr is not None and jr.done(unit):
+            print(f"[journal] já concluída: {url}")
+            continue
         print(f"[GET] {url}")
-        r = httpx.get(url, timeout=120); r.raise_for_status()
-        rd = csv.DictReader(io.StringIO(r.text), delimiter=s.csv_delimiter)
+        with metrics.timer("fires.http_get"):
+            r = http.get(url, timeout=120)
+        if skip_missing and r.status_code == 404:
+            # arquivos diários/mensais do INPE podem faltar em alguns dias
+            print(f"[WARN] não encontrado (404): {url}")
+            metrics.incr("fires.missing_files")
+            continue
+        r.raise_for_status()
+        metrics.incr("fires.http_bytes", len(r.content))
+        rd = csv.DictReader(io.StringIO(r.text), delimiter=delimiter)
         print("[HEADERS]", rd.fieldnames)
+        prog = jr.progress(unit) if jr is not None else {}
+        fp = {"sha1": hashlib.sha1(r.content).hexdigest(), "size": len(r.content)}
+        skip, recover = prog.get("rows", 0), prog.get("inflight", 0)
+        if prog and any(prog.get(k) != v for k, v in fp.items()):
+            # arquivo mudou (republicado/reordenado): as linhas já gravadas não são mais as primeiras N
+            print(f"[journal] {url} mudou desde a tentativa anterior; relendo do início")
+            metrics.incr("fires.resume_content_changed")
+            skip, recover = 0, (float("inf") if recover else 0)
+        if skip:
+            print(f"[journal] retomando {url} na linha {skip + 1}")
+            metrics.incr("fires.rows_resumed", skip)
+        pos.update(unit=unit, rows=skip, start=skip, recover=recover, fp=fp)
 
-        for row in tqdm(rd, desc="Processando"):
+        for row in tqdm(itertools.islice(rd, skip, None), desc="Processando", initial=skip):
+            pos["rows"] += 1
             totals["read"] += 1
+            t0 = perf()
             doc = row_to_doc(row)
+            h_row.observe(perf() - t0)
             if doc is None:
                 continue
+            if snap is not None:
+                _enrich_from_ref(doc, snap)
             totals["parsed"] += 1
             if not (date_start <= doc["ts"] <= date_end):
                 totals["out_of_window"] += 1
                 continue
 
             ext_id = doc.get("ext_id")
-            if not ext_id:
-                # Sem ext_id: insere direto (podem ocorrer raros duplicados)
-                col_ts.insert_one(doc)
-                totals["inserted"] += 1
-                continue
+            docs.append(doc)
+            keys.append({"ext_id": ext_id} if ext_id else None)
+            if len(docs) >= batch_size:
+                flush()
+        flush()
+        if jr is not None:
+            jr.complete(unit, rows=pos["rows"])
+        pos["unit"] = None
 
-            # 1) tenta reservar a chave na dedup
-            try:
-                col_dedup.insert_one({"ext_id": ext_id})
-            except DuplicateKeyError:
-                totals["skipped_dup"] += 1
-                continue
+def fetch_and_ingest(days: int = 7, batch_size: int = 2000, no_window: bool=False, debug: int=0, db=None, http=None,
+                     urls: list[str] | None = None, window: tuple | None = None, skip_missing: bool = False,
+                     resume: bool = False, journal_key: str = ""):
+    """
+    Baixa os CSVs do INPE e grava em raw_fires. `urls`/`window` (início, fim UTC)
+    sobrescrevem INPE_CSV_URLS e a janela de `days` (usado pelo backfill).
+    O progresso vai para o diário (etl/common/journal.py); `resume=True` retoma
+    a última execução inacabada (mesmas URLs e janela) de onde ela parou.
+    """
+    s = load_settings()
+    urls = urls if urls is not None else s.inpe_csv_urls
+    if not urls:
+        print("ERRO: Configure INPE_CSV_URLS em configs/.env", file=sys.stderr)
+        sys.exit(1)
+
+    if window is not None:
+        date_start, date_end = window
+        print(f"[WINDOW] {date_start.isoformat()} → {date_end.isoformat()} (UTC)")
+    elif not no_window:
+        date_start, date_end = last_n_days_window(days)
+        print(f"[WINDOW] {date_start.isoformat()} → {date_end.isoformat()} (UTC)")
+    else:
+        date_start = datetime(1970,1,1,tzinfo=timezone.utc)
+        date_end = datetime(9999,1,1,tzinfo=timezone.utc)
+        print("[WINDOW] desabilitada (no_window=True)")
+
+    totals = {"read":0,"parsed":0,"out_of_window":0,"inserted":0,"skipped_dup":0}
+    own_http = http is None
+    # janela como pedida (explícita ou "últimos N dias"): só retoma com as mesmas URLs e janela
+    spec = list(window) if window is not None else ("all" if no_window else f"days:{days}")
+    jr = journal.open_run("fires", {"urls": urls, "start": date_start, "end": date_end, "window": spec},
+                          resume=resume, key=journal_key, same=("urls", "window"))
+    if jr.resumed:
+        urls, date_start, date_end = jr.params["urls"], jr.params["start"], jr.params["end"]
+        print(f"[WINDOW] retomada: {date_start.isoformat()} → {date_end.isoformat()} (UTC)")
 
-            # 2) grava no time-series
-            col_ts.insert_one(doc)
-            totals["inserted"] += 1
+    try:
+        http = http or get_client(timeout=120)
+        with mongo_db(s.mongo_uri, db) as db:
+            snap = refdata.current_snapshot() or refdata.load_snapshot(s.mongo_uri, db=db)
+            _ingest_urls(db, http, urls, s.csv_delimiter, date_start, date_end, totals, snap=snap,
+                         batch_size=batch_size, skip_missing=skip_missing, jr=jr)
+    except BaseException:
+        jr.close()   # execução fica "running" no diário, retomável com --resume
+        raise
+    finally:
+        if own_http and http is not None:
+            http.close()
+    jr.finish()
 
-    client.close()
+    for k, v in totals.items():
+        metrics.incr(f"fires.{k}", v)
     print(f"[STATS] read={totals['read']} parsed={totals['parsed']} out_of_window={totals['out_of_window']} "
           f"inserted={totals['inserted']} skipped_dup={totals['skipped_dup']}")
     return totals
@@ -175,5 +283,7 @@ if __name__ == "__main__":
     ap.add_argument("--batch", type=int, default=2000)
     ap.add_argument("--no-window", action="store_true")
     ap.add_argument("--debug", type=int, default=0)
+    ap.add_argument("--resume", action="store_true", help="Retoma a última execução inacabada (logs/journal)")
     args = ap.parse_args()
-    fetch_and_ingest(days=args.days, batch_size=args.batch, no_window=args.no_window, debug=args.debug)
+    fetch_and_ingest(days=args.days, batch_size=args.batch, no_window=args.no_window, debug=args.debug,
+                     resume=args.resume)
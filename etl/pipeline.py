@@ -0,0 +1,304 @@
+# etl/pipeline.py
+"""
+Orquestrador da pipeline num único processo.
+
+Substitui os vários `python3 -m ...` do run_update.sh: um só interpretador,
+um MongoClient e um cliente HTTP compartilhados entre as etapas, e etapas
+independentes rodando em paralelo (ex.: clima enquanto carrega ref/coords).
+
+Grafo de dependências:
+    fires -> weather
+    ref   -> coords
+    fires -> gold_fires ; weather -> gold_weather ; ref/coords -> gold_dim
+    gold_fires + gold_weather + gold_dim -> gold (escrita Parquet)
+    fires -> gold_grid (grade de focos por dia/nível, incremental)
+    com --gold-shards N: fires/weather/ref/coords -> gold (sharded por UF, em processos)
+    com --gold-incremental: fires/weather/ref/coords -> gold (só os dias recentes; requer baseline;
+                            a grade de focos roda dentro dele)
+    com --gold-streaming: fires/weather/ref/coords -> gold (janelas mensais em sequência; idem)
+
+Uso:
+    python -m etl.pipeline
+    python -m etl.pipeline --days 10 --coords-csv data/ref/coords_municipios.csv --overwrite
+    python -m etl.pipeline --prometheus --profile fires,gold --profile-mode sample
+    python -m etl.pipeline --resume          # depois de uma execução que morreu no meio
+
+Métricas (etl/common/metrics.py) vão para logs/metrics/metrics_<stamp>.jsonl.
+Progresso (URLs, cidades, meses do gold em janelas) vai para o diário
+etl/common/journal.py; `--resume` retoma de onde a execução anterior parou.
+"""
+import os, sys, threading, time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from pymongo import MongoClient
+
+from etl.common import metrics
+from etl.common.config import load_settings
+from etl.common.httpclient import get_client
+
+REF_CSV_CANDIDATES = ("data/ref/municipios_raw.csv", "data/ref/municipios.csv")
+COORDS_CSV_DEFAULT = "data/ref/coords_municipios.csv"
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable[[dict], object]
+    deps: tuple[str, ...] = ()
+
+class _Tee:
+    """Duplica stdout/stderr no arquivo de log (equivalente ao `| tee -a $LOG`)."""
+    def __init__(self, stream, fh, lock):
+        self._stream, self._fh, self._lock = stream, fh, lock
+
+    def write(self, data):
+        with self._lock:
+            self._stream.write(data)
+            self._fh.write(data)
+        return len(data)
+
+    def flush(self):
+        with self._lock:
+            self._stream.flush()
+            self._fh.flush()
+
+    def isatty(self):
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+# ---------- Etapas ----------
+def _run_fires(ctx):
+    from etl.inpe.fetch_fires import fetch_and_ingest
+    return fetch_and_ingest(days=ctx["args"].days, db=ctx["db"], http=ctx["http"], resume=ctx["args"].resume)
+
+def _run_weather(ctx):
+    from etl.weather.fetch_weather import main as weather_main
+    return weather_main(db=ctx["db"], http=ctx["http"], resume=ctx["args"].resume)
+
+def _run_ref(ctx):
+    from etl.ibge.load_ref_municipios import main as ref_main
+    csv_path = next((p for p in REF_CSV_CANDIDATES if os.path.exists(p)), None)
+    if csv_path is None:
+        print("[info] Sem CSV de municipios (nome/uf/populacao). Pulando.")
+        return None
+    print(f"[run] Ref municipios ({csv_path})...")
+    return ref_main(csv_path, db=ctx["db"])
+
+def _run_coords(ctx):
+    from etl.ibge.load_coords_csv import main as coords_main
+    args = ctx["args"]
+    csv_path = args.coords_csv or (COORDS_CSV_DEFAULT if os.path.exists(COORDS_CSV_DEFAULT) else None)
+    if not csv_path or not os.path.exists(csv_path):
+        print("[info] Sem CSV de coordenadas (lat/lon). Pulando.")
+        return None
+    print(f"[run] Coords municipios ({csv_path}) overwrite={args.overwrite} ...")
+    return coords_main(csv_path, overwrite=args.overwrite, db=ctx["db"])
+
+def _run_gold_fires(ctx):
+    from etl.gold.export_parquet import build_fact_fires_daily
+    return build_fact_fires_daily(ctx["settings"].mongo_uri, lookback_days=180, db=ctx["db"])
+
+def _run_gold_weather(ctx):
+    from etl.gold.export_parquet import build_weather_daily
+    return build_weather_daily(ctx["settings"].mongo_uri, lookback_days=180, db=ctx["db"])
+
+def _run_gold_dim(ctx):
+    from etl.gold.export_parquet import load_dim_municipio
+    return load_dim_municipio(ctx["settings"].mongo_uri, db=ctx["db"])
+
+def _run_gold(ctx):
+    from etl.gold.export_parquet import write_gold
+    res = ctx["results"]
+    return write_gold(res["gold_fires"], res["gold_weather"], res["gold_dim"])
+
+def _run_gold_sharded(ctx):
+    from etl.gold.sharded import run_sharded
+    return run_sharded(ctx["settings"].mongo_uri, lookback_days=180, shards=ctx["args"].gold_shards, db=ctx["db"])
+
+def _run_gold_grid(ctx):
+    from etl.gold.export_parquet import write_fire_grid
+    return write_fire_grid(ctx["settings"].mongo_uri, lookback_days=180, db=ctx["db"])
+
+def _run_gold_incremental(ctx):
+    # sem baseline ativo, main() cai no gold completo (sharded se --gold-shards > 0)
+    from etl.gold.export_parquet import main as gold_main
+    return gold_main(db=ctx["db"], shards=ctx["args"].gold_shards, incremental=True)
+
+def _run_gold_streaming(ctx):
+    from etl.gold.export_parquet import main as gold_main
+    return gold_main(db=ctx["db"], shards=0, incremental=False, streaming=True, resume=ctx["args"].resume)
+
+def build_stages(args) -> list[Stage]:
+    skip = {
+        "fires": args.skip_fires, "weather": args.skip_weather, "ref": args.skip_ref,
+        "coords": args.skip_coords, "gold": args.skip_gold,
+    }
+    stages = [
+        Stage("fires", _run_fires),
+        Stage("weather", _run_weather, ("fires",)),
+        Stage("ref", _run_ref),
+        Stage("coords", _run_coords, ("ref",)),
+    ]
+    if not skip["gold"] and args.gold_incremental:
+        stages.append(Stage("gold", _run_gold_incremental, ("fires", "weather", "ref", "coords")))
+    elif not skip["gold"] and args.gold_streaming:
+        stages.append(Stage("gold", _run_gold_streaming, ("fires", "weather", "ref", "coords")))
+    elif not skip["gold"] and args.gold_shards > 0:
+        stages += [
+            Stage("gold", _run_gold_sharded, ("fires", "weather", "ref", "coords")),
+            Stage("gold_grid", _run_gold_grid, ("fires",)),
+        ]
+    elif not skip["gold"]:
+        stages += [
+            Stage("gold_fires", _run_gold_fires, ("fires",)),
+            Stage("gold_grid", _run_gold_grid, ("fires",)),
+            Stage("gold_weather", _run_gold_weather, ("weather",)),
+            Stage("gold_dim", _run_gold_dim, ("ref", "coords")),
+            Stage("gold", _run_gold, ("gold_fires", "gold_weather", "gold_dim")),
+        ]
+    for name, skipped in skip.items():
+        if skipped and name != "gold":
+            print(f"[skip] {name}")
+    if skip["gold"]:
+        print("[skip] gold")
+
+    # etapas puladas saem do grafo; dependência nelas conta como satisfeita
+    kept = [st for st in stages if not skip.get(st.name, False)]
+    names = {st.name for st in kept}
+    return [Stage(st.name, st.fn, tuple(d for d in st.deps if d in names)) for st in kept]
+
+def run_stages(stages: list[Stage], ctx: dict, max_workers: int = 4) -> dict[str, tuple[str, float]]:
+    """
+    Executa o grafo de etapas num pool de threads: cada etapa é submetida assim
+    que todas as dependências terminam com sucesso. Falha numa etapa cancela
+    só as que dependem dela. Retorna {etapa: (status, segundos)}.
+    """
+    pending = {st.name: st for st in stages}
+    status: dict[str, tuple[str, float]] = {}
+    running = {}
+
+    profile = ctx.get("profile") or {}
+
+    def _timed(st: Stage):
+        t0 = time.perf_counter()
+        try:
+            with metrics.profile_stage(st.name, profile.get(st.name), stamp=ctx.get("stamp")):
+                ctx["results"][st.name] = st.fn(ctx)
+        finally:
+            ctx["elapsed"][st.name] = time.perf_counter() - t0
+            metrics.observe("pipeline.stage_seconds", ctx["elapsed"][st.name], stage=st.name)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage") as pool:
+        while pending or running:
+            for name, st in list(pending.items()):
+                dep_status = [status.get(d, ("pending",))[0] for d in st.deps]
+                if any(s in ("failed", "skipped") for s in dep_status):
+                    del pending[name]
+                    status[name] = ("skipped", 0.0)
+                    print(f"[skip] {name} (dependência falhou)")
+                elif all(s == "ok" for s in dep_status):
+                    del pending[name]
+                    print(f"[run] {name}...")
+                    running[pool.submit(_timed, st)] = name
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = running.pop(fut)
+                elapsed = ctx["elapsed"].get(name, 0.0)
+                try:
+                    fut.result()
+                    status[name] = ("ok", elapsed)
+                except BaseException as e:  # inclui SystemExit das etapas
+                    status[name] = ("failed", elapsed)
+                    metrics.incr("pipeline.stage_failures", stage=name)
+                    print(f"[ERRO] {name}: {e!r}", file=sys.stderr)
+                print(f"[timing] stage={name} status={status[name][0]} elapsed={elapsed:.2f}s")
+    return status
+
+def main(argv=None) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(description="Roda a pipeline completa (INPE, clima, ref, coords, gold) num único processo.")
+    ap.add_argument("--days", type=int, default=int(os.environ.get("DAYS", "7")), help="Lookback dos focos (INPE); default: 7")
+    ap.add_argument("--coords-csv", default="", help="CSV com codigo_ibge, lat, lon (nomes flexíveis)")
+    ap.add_argument("--overwrite", action="store_true", help="Sobrescreve lat/lon existentes")
+    ap.add_argument("--skip-fires", action="store_true", help="Pula INPE")
+    ap.add_argument("--skip-weather", action="store_true", help="Pula Weather")
+    ap.add_argument("--skip-ref", action="store_true", help="Pula REF municipios (nome/uf/população)")
+    ap.add_argument("--skip-coords", action="store_true", help="Pula COORDS (CSV lat/lon)")
+    ap.add_argument("--skip-gold", action="store_true", help="Pula GOLD (Parquet)")
+    ap.add_argument("--workers", type=int, default=4, help="Etapas simultâneas (threads); default: 4")
+    ap.add_argument("--gold-shards", type=int, default=int(os.environ.get("GOLD_SHARDS", "0")),
+                    help="Gold por grupos de UF em N processos (0 = monolítico)")
+    ap.add_argument("--gold-incremental", action="store_true", default=os.environ.get("GOLD_INCREMENTAL", "0") == "1",
+                    help="Gold só dos dias recentes, mesclado nas partições (requer baseline de risco)")
+    ap.add_argument("--gold-streaming", action="store_true", default=os.environ.get("GOLD_STREAMING", "0") == "1",
+                    help="Gold em janelas mensais sequenciais, memória limitada (lookback: GOLD_LOOKBACK_DAYS)")
+    ap.add_argument("--resume", action="store_true", default=os.environ.get("ETL_RESUME", "0") == "1",
+                    help="Retoma a execução interrompida pelo diário (logs/journal): URLs do INPE, cidades "
+                         "do clima e meses do gold em janelas já concluídos são pulados")
+    ap.add_argument("--log", default=None, help="Arquivo de log (append); default: logs/update_<stamp>.log")
+    ap.add_argument("--metrics-dir", default="logs/metrics", help="Onde gravar metrics_<stamp>.jsonl; '' desliga")
+    ap.add_argument("--prometheus", action="store_true", help="Grava também metrics_<stamp>.prom (texto Prometheus)")
+    ap.add_argument("--profile", default="", help="Etapas a perfilar, separadas por vírgula (ex.: fires,gold)")
+    ap.add_argument("--profile-mode", choices=("cprofile", "sample"), default="cprofile",
+                    help="cprofile (.prof) ou sample (amostragem de pilhas, .folded)")
+    args, unknown = ap.parse_known_args(argv)
+
+    stamp = f"{datetime.now():%Y%m%d_%H%M%S}"
+    log_path = Path(args.log or f"logs/update_{stamp}.log")
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    fh = open(log_path, "a", encoding="utf-8")
+    lock = threading.RLock()
+    orig_out, orig_err = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = _Tee(orig_out, fh, lock), _Tee(orig_err, fh, lock)
+
+    try:
+        for u in unknown:
+            print(f"[warn] argumento desconhecido: {u}")
+
+        s = load_settings()
+        mongo = MongoClient(s.mongo_uri)
+        http = get_client(timeout=int(os.environ.get("HTTP_TIMEOUT", "30")))
+        ctx = {"args": args, "settings": s, "db": mongo.get_database(), "http": http,
+               "results": {}, "elapsed": {}, "stamp": stamp,
+               "profile": {name.strip(): args.profile_mode for name in args.profile.split(",") if name.strip()}}
+
+        t0 = time.perf_counter()
+        try:
+            status = run_stages(build_stages(args), ctx, max_workers=args.workers)
+        finally:
+            http.close()
+            mongo.close()
+        total = time.perf_counter() - t0
+
+        print("[timing] ---- resumo ----")
+        for name, (st, secs) in status.items():
+            print(f"[timing] {name:<13} {st:<8} {secs:8.2f}s")
+        print(f"[timing] total (wall)          {total:8.2f}s")
+        metrics.observe("pipeline.total_seconds", total)
+
+        if args.metrics_dir:
+            out = metrics.REGISTRY.write_jsonl(Path(args.metrics_dir) / f"metrics_{stamp}.jsonl", run_id=stamp)
+            print(f"[metrics] {out}")
+            if args.prometheus:
+                print(f"[metrics] {metrics.REGISTRY.write_prometheus(Path(args.metrics_dir) / f'metrics_{stamp}.prom')}")
+
+        failed = [n for n, (st, _) in status.items() if st == "failed"]
+        if failed:
+            print(f"[done] Pipeline com falhas: {', '.join(failed)}. Log: {log_path}")
+            return 1
+        print(f"[done] Pipeline concluída. Log: {log_path}")
+        return 0
+    finally:
+        sys.stdout, sys.stderr = orig_out, orig_err
+        fh.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
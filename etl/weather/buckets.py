@@ -0,0 +1,106 @@
+# etl/weather/buckets.py
+"""
+Clima em buckets por (municipio_ibge, dia) — modo WEATHER_STORAGE=bucket.
+
+No modo padrão (hourly) cada município-hora vira um documento em raw_weather
+(com lat/lon/source/meta repetidos) e outro em dedup_weather_mun_ts. Aqui
+cada município-dia é um único documento em weather_buckets:
+
+    {municipio_ibge: 3550308, date: ISODate("2025-10-14T00:00:00Z"), uf: "SP",
+     lat: -23.55, lon: -46.63, source: "open-meteo", updated_at: ...,
+     hourly: {temperature_2m: [24 valores], relative_humidity_2m: [...], ...}}
+
+O índice do array é a hora UTC (null = hora sem dado). A chave única
+{municipio_ibge, date} faz da gravação um upsert: a coleção de dedupe não é
+necessária e regravar a mesma janela é idempotente (a leitura mais nova da
+API vence). O gold tira as estatísticas diárias direto dos arrays ($avg,
+$min, $max, $sum em $project), sem desmontar horas nem $group.
+"""
+import os
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+
+COLLECTION = "weather_buckets"
+HOURS = 24
+MODES = ("hourly", "bucket")
+
+def storage_mode() -> str:
+    """WEATHER_STORAGE (hourly | bucket), lido na hora (load_settings pode ter carregado o .env)."""
+    mode = os.environ.get("WEATHER_STORAGE", "hourly").strip().lower() or "hourly"
+    if mode not in MODES:
+        raise ValueError(f"WEATHER_STORAGE inválido: {mode!r} (use {' ou '.join(MODES)})")
+    return mode
+
+def ensure_indexes(db):
+    """Idempotente; a chave única é o que torna o upsert seguro entre threads/processos."""
+    col = db.get_collection(COLLECTION)
+    col.create_index([("municipio_ibge", 1), ("date", 1)], unique=True)
+    col.create_index([("uf", 1), ("date", -1)])   # gold sharded por UF
+    col.create_index([("date", -1)])
+
+def day_of(ts: datetime) -> datetime:
+    return ts.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+def _at(values: list, i: int):
+    return values[i] if i < len(values) else None
+
+def _merge_hours(var: str, values: dict[int, object]) -> list:
+    """
+    Array de 24 posições para um pipeline de update: as horas de `values`
+    (hora -> valor) e, nas demais, o que já está no bucket; sem o array (bucket
+    novo, ou variável que passou a ser baixada depois) as demais ficam nulas.
+    """
+    cur = {"$ifNull": [f"$hourly.{var}", [None] * HOURS]}
+    return [{"$literal": values[h]} if h in values else {"$arrayElemAt": [cur, h]} for h in range(HOURS)]
+
+def bucket_ops(mun_id: int, uf, lat, lon, times: list[datetime], hourly: dict[str, list],
+               source: str = "open-meteo") -> list[UpdateOne]:
+    """
+    Upserts por dia para as horas `times` (UTC) com os valores `hourly[var][i]`.
+    Dia completo: $set dos arrays inteiros. Dia parcial (bordas da janela):
+    pipeline de update que regrava cada array com as horas recebidas e mantém
+    as demais como estão — arrays ausentes começam com 24 nulos, nunca viram
+    objeto {"<hora>": valor} como num $set posicional.
+    """
+    days: dict[datetime, dict[int, int]] = {}     # dia -> {hora: índice em times}
+    for i, ts in enumerate(times):
+        days.setdefault(day_of(ts), {})[ts.astimezone(timezone.utc).hour] = i
+    now = datetime.now(timezone.utc)
+    head = {"uf": uf, "lat": lat, "lon": lon, "source": source, "updated_at": now}
+    ops = []
+    for day, hours in days.items():
+        key = {"municipio_ibge": mun_id, "date": day}
+        if len(hours) == HOURS:
+            arrays = {f"hourly.{k}": [_at(v, hours[h]) for h in range(HOURS)] for k, v in hourly.items()}
+            ops.append(UpdateOne(key, {"$set": {**head, **arrays}}, upsert=True))
+        else:
+            arrays = {f"hourly.{k}": _merge_hours(k, {h: _at(v, i) for h, i in hours.items()})
+                      for k, v in hourly.items()}
+            ops.append(UpdateOne(key, [{"$set": {**{f: {"$literal": x} for f, x in head.items()}, **arrays}}],
+                                 upsert=True))
+    return ops
+
+def upsert_buckets(col, ops: list[UpdateOne]) -> int:
+    """Grava em lote (ordenado: o mesmo município-dia pode vir de mais de uma chamada). Retorna upserts."""
+    if not ops:
+        return 0
+    res = col.bulk_write(ops, ordered=True)
+    return res.upserted_count
+
+def daily_stats_pipeline(match: dict) -> list[dict]:
+    """Mesmas colunas do build_weather_daily horário, calculadas sobre os arrays do bucket."""
+    h = "$hourly."
+    return [
+        {"$match": match},
+        {"$project": {
+            "_id": 0, "date": 1, "municipio_ibge": 1, "uf": 1,
+            "temp_mean": {"$avg": h + "temperature_2m"},
+            "hum_min": {"$min": h + "relative_humidity_2m"},
+            "wind_max": {"$max": h + "wind_speed_10m"},
+            "gust_max": {"$max": h + "wind_gusts_10m"},
+            "cloud_mean": {"$avg": h + "cloud_cover"},
+            "precip_sum": {"$sum": h + "precipitation"},
+            "dew_mean": {"$avg": h + "dew_point_2m"},
+        }},
+    ]
@@ -1,23 +1,28 @@
 # etl/weather/fetch_weather.py
 import os
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 import pandas as pd
-from pymongo import MongoClient, UpdateOne
-from pymongo.errors import DuplicateKeyError
 
+from etl.common import journal, metrics, refdata
 from etl.common.config import load_settings
-from etl.common.dateutils import utc_now, last_n_days_window
+from etl.common.dateutils import last_n_days_window
 from etl.common.httpclient import get_client
+from etl.common.mongo import insert_dedup, mongo_db
+from etl.weather import buckets
 
-OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+OPEN_METEO_URL = os.environ.get("OPENMETEO_URL", "https://api.open-meteo.com/v1/forecast")
+# histórico (backfill): a API de forecast só cobre os últimos meses
+OPEN_METEO_ARCHIVE_URL = os.environ.get("OPENMETEO_ARCHIVE_URL", "https://archive-api.open-meteo.com/v1/archive")
 
 # Conjunto padrão de variáveis horárias (pode sobrescrever via .env OPENMETEO_HOURLY)
 DEFAULT_HOURLY = (
     "temperature_2m,relative_humidity_2m,wind_speed_10m,precipitation,"
     "wind_gusts_10m,cloud_cover,dew_point_2m"
 ).split(",")
+# chave em dedup_weather_mun_ts -> campo do doc em raw_weather (recuperação na retomada)
+DEDUP_FIELDS = {"municipio_ibge": "meta.municipio_ibge", "ts": "ts"}
 
 
 def _to_utc(dt: datetime) -> datetime:
@@ -26,17 +31,21 @@ def _to_utc(dt: datetime) -> datetime:
     return dt.astimezone(timezone.utc)
 
 
-def get_target_cities(mongo_uri: str, days: int = 7) -> pd.DataFrame:
+def get_target_cities(mongo_uri: str, days: int = 7, db=None, start: datetime | None = None,
+                      end: datetime | None = None) -> pd.DataFrame:
     """
-    Retorna um DataFrame com os municípios que tiveram focos nos últimos N dias,
-    agregando lat/lon médios por municipio_ibge (fallback por (municipio, uf)).
+    Retorna um DataFrame com os municípios que tiveram focos nos últimos N dias
+    (ou em [start, end), se informados), agregando lat/lon médios por
+    municipio_ibge (fallback por (municipio, uf)).
     """
-    start, end = last_n_days_window(days)
-    cli = MongoClient(mongo_uri)
-    db = cli.get_database()
+    if start is not None and end is not None:
+        ts_match = {"$gte": start, "$lt": end}
+    else:
+        start, end = last_n_days_window(days)
+        ts_match = {"$gte": start, "$lte": end}
 
     pipe = [
-        {"$match": {"ts": {"$gte": start, "$lte": end}}},
+        {"$match": {"ts": ts_match}},
         {"$group": {
             "_id": {
                 "mun_id": "$meta.municipio_ibge",
@@ -50,8 +59,8 @@ def get_target_cities(mongo_uri: str, days: int = 7) -> pd.DataFrame:
         {"$sort": {"focos": -1}},
         {"$limit": 5000}
     ]
-    rows = list(db.raw_fires.aggregate(pipe))
-    cli.close()
+    with mongo_db(mongo_uri, db) as db:
+        rows = list(db.raw_fires.aggregate(pipe))
 
     if not rows:
         return pd.DataFrame(columns=["municipio_ibge", "municipio", "uf", "lat", "lon", "focos"])
@@ -68,17 +77,24 @@ def get_target_cities(mongo_uri: str, days: int = 7) -> pd.DataFrame:
             "focos": r.get("focos", 0),
         })
     df = pd.DataFrame(recs)
+    # UF ausente: completa pelo snapshot de referência (mesma regra do INPE)
+    snap = refdata.current_snapshot()
+    if snap is not None and df["uf"].isna().any():
+        missing = df["uf"].isna()
+        df.loc[missing, "uf"] = snap.take(df.loc[missing, "municipio_ibge"], "uf")
     # sanidade
     df = df.dropna(subset=["lat", "lon"])
     df = df[(df["lat"].between(-90, 90)) & (df["lon"].between(-180, 180))]
     return df.sort_values("focos", ascending=False)
 
 
-def fetch_city_hourly(http, db, city_row, start: datetime, end: datetime, hourly_vars: list[str]) -> int:
+def fetch_city_hourly(http, db, city_row, start: datetime, end: datetime, hourly_vars: list[str],
+                      archive: bool = False, storage: str | None = None, recover: bool = False) -> int:
     """
-    Busca dados horários na Open-Meteo para uma cidade e grava em raw_weather (time-series)
-    com deduplicação via coleção normal dedup_weather_mun_ts (unique (municipio_ibge, ts)).
-    Retorna o número de documentos inseridos.
+    Busca dados horários na Open-Meteo para uma cidade e grava conforme
+    WEATHER_STORAGE (ver store_hourly). `archive=True` usa a API histórica
+    (dias inteiros de start até end, exclusivo). `recover`: ver store_hourly.
+    Retorna o número de horas gravadas.
     """
     lat = float(city_row["lat"])
     lon = float(city_row["lon"])
@@ -90,29 +106,67 @@ def fetch_city_hourly(http, db, city_row, start: datetime, end: datetime, hourly
         "latitude": f"{lat:.5f}",
         "longitude": f"{lon:.5f}",
         "hourly": ",".join(hourly_vars),
-        "start": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
-        "end": end.strftime("%Y-%m-%dT%H:%M:%SZ"),
         "timezone": "UTC",
     }
-
-    r = http.get(OPEN_METEO_URL, params=params)
+    if archive:
+        url = OPEN_METEO_ARCHIVE_URL
+        params["start_date"] = start.strftime("%Y-%m-%d")
+        params["end_date"] = (end - timedelta(seconds=1)).strftime("%Y-%m-%d")
+    else:
+        url = OPEN_METEO_URL
+        params["start"] = start.strftime("%Y-%m-%dT%H:%M:%SZ")
+        params["end"] = end.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    with metrics.timer("weather.http"):
+        r = http.get(url, params=params)
+    metrics.incr("weather.http_status", code=r.status_code)
     r.raise_for_status()
-    data = r.json()
+    with metrics.timer("weather.parse"):
+        data = r.json()
+
+    inserted = store_hourly(db, mun_id, uf, lat, lon, data.get("hourly", {}), storage=storage, recover=recover)
+    metrics.incr("weather.cities")
+    return inserted
+
 
-    hourly = data.get("hourly", {})
+def store_hourly(db, mun_id: int | None, uf, lat: float, lon: float, hourly: dict, storage: str | None = None,
+                 recover: bool = False) -> int:
+    """
+    Grava o bloco "hourly" da Open-Meteo de uma cidade.
+
+    - hourly (padrão): um doc por hora em raw_weather (time-series), com
+      deduplicação via coleção normal dedup_weather_mun_ts (unique (municipio_ibge, ts));
+    - bucket: um doc por (municipio_ibge, dia) em weather_buckets, por upsert
+      (etl/weather/buckets.py). Sem municipio_ibge não há chave: a cidade é pulada.
+    `recover` (cidade que já começou numa tentativa anterior): horas com chave
+    reservada mas sem doc em raw_weather são gravadas de novo (insert_dedup).
+    Retorna o número de horas gravadas.
+    """
     times = hourly.get("time", [])
     if not times:
         return 0
-
+    storage = storage or buckets.storage_mode()
     keys = [k for k in hourly.keys() if k != "time"]
+    ts_list = [datetime.fromisoformat(t.replace("Z", "+00:00")).astimezone(timezone.utc) for t in times]
+    metrics.incr("weather.hours_received", len(times))
+
+    if storage == "bucket":
+        if mun_id is None:
+            metrics.incr("weather.skipped_no_id")
+            return 0
+        ops = buckets.bucket_ops(mun_id, uf, lat, lon, ts_list, {k: hourly.get(k, []) for k in keys})
+        with metrics.timer("weather.insert", storage="bucket"):
+            upserted = buckets.upsert_buckets(db.get_collection(buckets.COLLECTION), ops)
+        metrics.incr("weather.buckets_upserted", upserted)
+        metrics.incr("weather.inserted", len(times))
+        return len(times)
 
     # coleções
     col_ts = db.get_collection("raw_weather")               # time-series
     col_dedup = db.get_collection("dedup_weather_mun_ts")   # normal com unique (municipio_ibge, ts)
 
-    inserted = 0
-    for i, t in enumerate(times):
-        ts_utc = datetime.fromisoformat(t.replace("Z", "+00:00")).astimezone(timezone.utc)
+    docs, dedup_keys = [], []
+    for i, ts_utc in enumerate(ts_list):
         doc = {
             "ts": ts_utc,
             "meta": {"municipio_ibge": mun_id, "uf": uf},
@@ -124,64 +178,121 @@ def fetch_city_hourly(http, db, city_row, start: datetime, end: datetime, hourly
             vlist = hourly.get(k, [])
             if i < len(vlist):
                 doc[k] = vlist[i]
+        docs.append(doc)
+        # Sem municipio_ibge: não é possível deduplicar por chave única — insere direto.
+        dedup_keys.append({"municipio_ibge": mun_id, "ts": ts_utc} if mun_id is not None else None)
 
-        if mun_id is None:
-            # Sem municipio_ibge: não é possível deduplicar por chave única — insere direto.
-            col_ts.insert_one(doc)
-            inserted += 1
-            continue
+    # Reserva as chaves na coleção de dedupe em lote e grava só as horas novas
+    with metrics.timer("weather.insert"):
+        inserted, _ = insert_dedup(col_ts, col_dedup, docs, dedup_keys, recover=DEDUP_FIELDS if recover else None)
 
-        try:
-            # Reserva chave na coleção de dedupe; se já existir, ignora
-            col_dedup.insert_one({"municipio_ibge": mun_id, "ts": ts_utc})
-        except DuplicateKeyError:
-            continue
+    metrics.incr("weather.inserted", inserted)
+    return inserted
 
-        # Grava no time-series
-        col_ts.insert_one(doc)
-        inserted += 1
 
-    return inserted
+def city_unit(city_row, start: datetime, end: datetime) -> str:
+    """Unidade do diário: cidade (municipio_ibge, ou lat/lon sem código) x janela."""
+    mun_id = city_row.get("municipio_ibge")
+    city = int(mun_id) if pd.notna(mun_id) else f"{float(city_row['lat']):.5f},{float(city_row['lon']):.5f}"
+    return f"city:{city}:{start:%Y%m%d%H}-{end:%Y%m%d%H}"
 
 
-def main():
+def fetch_cities(cities_df: pd.DataFrame, start: datetime, end: datetime, hourly_vars: list[str], db, http,
+                 max_workers: int = 6, archive: bool = False, jr=None) -> int:
+    """
+    Busca o clima de cada cidade em paralelo (threads); erros por cidade só contam/avisam.
+    O modo de gravação (WEATHER_STORAGE) é lido uma vez aqui para o lote todo.
+    Com `jr` (etl/common/journal.py), cidades já concluídas na janela são puladas
+    e cada cidade gravada é registrada.
+    """
+    storage = buckets.storage_mode()
+    if storage == "bucket":
+        buckets.ensure_indexes(db)
+    total = skipped = 0
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="weather") as pool:
+        futures = {}
+        for _, row in cities_df.iterrows():
+            unit = city_unit(row, start, end)
+            if jr is not None and jr.done(unit):
+                skipped += 1
+                continue
+            recover = False
+            if jr is not None and storage == "hourly":
+                # começou numa tentativa que morreu: pode ter chaves reservadas sem as horas
+                recover = bool(jr.progress(unit).get("started"))
+                jr.mark(unit, started=True)
+            futures[pool.submit(fetch_city_hourly, http, db, row, start, end, hourly_vars, archive, storage,
+                                recover)] = unit
+        if skipped:
+            print(f"[journal] weather: {skipped} cidades já concluídas, {len(futures)} a buscar")
+        for fut in as_completed(futures):
+            try:
+                hours = fut.result()
+            except Exception as e:
+                metrics.incr("weather.city_errors")
+                print("[WARN]", e)
+                continue
+            total += hours
+            if jr is not None:
+                jr.complete(futures[fut], hours=hours)
+    return total
+
+
+def main(db=None, http=None, resume: bool | None = None):
     s = load_settings()
     days = int(os.environ.get("WEATHER_LOOKBACK_DAYS", "7"))
     hourly_vars = os.environ.get("OPENMETEO_HOURLY", ",".join(DEFAULT_HOURLY)).split(",")
     timeout = int(os.environ.get("HTTP_TIMEOUT", "30"))
     max_workers = int(os.environ.get("MAX_WORKERS", "6"))
+    resume = os.environ.get("ETL_RESUME", "0") == "1" if resume is None else resume
+
+    # Janela dos focos (cidades alvo); numa retomada, a da execução interrompida
+    fires_start, fires_end = last_n_days_window(days)
+    jr = journal.open_run("weather", {"start": fires_start, "end": fires_end, "hourly": hourly_vars},
+                          resume=resume)
+    fires_start, fires_end, hourly_vars = jr.params["start"], jr.params["end"], jr.params["hourly"]
 
     # Janela UTC (horária)
-    start, end = last_n_days_window(days)
-    start = start.replace(minute=0, second=0, microsecond=0)
-    end = _to_utc(utc_now()).replace(minute=0, second=0, microsecond=0)
+    start = fires_start.replace(minute=0, second=0, microsecond=0)
+    end = _to_utc(fires_end).replace(minute=0, second=0, microsecond=0)
 
-    # Municípios alvo com base em raw_fires
-    cities_df = get_target_cities(s.mongo_uri, days=days)
+    # Municípios alvo com base em raw_fires ($lte no fim, como no lookback por dias)
+    cities_df = get_target_cities(s.mongo_uri, db=db, start=fires_start, end=fires_end + timedelta(microseconds=1))
     if cities_df.empty:
         print("[weather] Nenhum município alvo nos últimos", days, "dias.")
-        return
-
-    http_client = get_client(timeout=timeout)
-    mongo = MongoClient(s.mongo_uri)
-    db = mongo.get_database()
-
-    total = 0
-    with ThreadPoolExecutor(max_workers=max_workers) as pool:
-        futures = [
-            pool.submit(fetch_city_hourly, http_client, db, row, start, end, hourly_vars)
-            for _, row in cities_df.iterrows()
-        ]
-        for fut in as_completed(futures):
-            try:
-                total += fut.result()
-            except Exception as e:
-                print("[WARN]", e)
+        jr.finish()
+        return 0
 
-    mongo.close()
-    http_client.close()
-    print(f"[weather] Inseridos (após dedupe): {total}")
+    own_http = http is None
+    http_client = http or get_client(timeout=timeout)
+
+    try:
+        with mongo_db(s.mongo_uri, db) as db:
+            total = fetch_cities(cities_df, start, end, hourly_vars, db, http_client, max_workers=max_workers,
+                                 jr=jr)
+    except BaseException:
+        jr.close()
+        raise
+    finally:
+        if own_http:
+            http_client.close()
+    # cidades com erro ficam pendentes no diário: --resume busca só elas
+    pending = len({city_unit(row, start, end) for _, row in cities_df.iterrows()} - jr.units_done("city:"))
+    if pending:
+        print(f"[weather] {pending} cidades com erro; rode de novo com --resume para buscar só elas")
+        jr.close()
+    else:
+        jr.finish()
+    if buckets.storage_mode() == "bucket":
+        print(f"[weather] Horas gravadas em {buckets.COLLECTION}: {total}")
+    else:
+        print(f"[weather] Inseridos (após dedupe): {total}")
+    return total
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    ap = argparse.ArgumentParser(description="Clima horário (Open-Meteo) dos municípios com focos recentes.")
+    ap.add_argument("--resume", action="store_true", default=None,
+                    help="Retoma a última execução inacabada (logs/journal; env ETL_RESUME=1)")
+    main(resume=ap.parse_args().resume)
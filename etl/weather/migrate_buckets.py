@@ -0,0 +1,113 @@
+# etl/weather/migrate_buckets.py
+"""
+Migra raw_weather (um doc por município-hora) para weather_buckets (um doc por
+município-dia, ver etl/weather/buckets.py), um dia por vez.
+
+Cada dia é lido com um find na janela [dia, dia+1) (índice {ts:-1}), agrupado
+por município e gravado com os mesmos upserts do fetch em modo bucket — rodar
+de novo é idempotente. raw_weather e dedup_weather_mun_ts NÃO são apagadas:
+depois de conferir (--verify) e trocar WEATHER_STORAGE=bucket, o drop é manual.
+
+--verify recalcula o build_weather_daily da janela nos dois modos e compara
+(mesmas linhas, valores iguais até 1e-9).
+
+Uso:
+    python -m etl.weather.migrate_buckets --start 2025-07-01 --end 2025-10-14
+    python -m etl.weather.migrate_buckets --start 2025-07-01 --end 2025-10-14 --verify
+"""
+import os
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from etl.common import metrics
+from etl.common.config import load_settings
+from etl.common.mongo import mongo_db
+from etl.weather import buckets
+
+# campos do doc horário que não são variáveis da Open-Meteo
+NON_VARS = {"_id", "ts", "meta", "lat", "lon", "source"}
+
+def _day_start(d: date) -> datetime:
+    return datetime(d.year, d.month, d.day, tzinfo=timezone.utc)
+
+def day_ops(docs) -> tuple[list, int]:
+    """Docs horários de um dia -> upserts de bucket (por município). Retorna (ops, horas)."""
+    by_mun: dict[int, list[dict]] = {}
+    for d in docs:
+        by_mun.setdefault(d["meta"]["municipio_ibge"], []).append(d)
+    ops, hours = [], 0
+    for mun_id, rows in by_mun.items():
+        rows.sort(key=lambda r: r["ts"])
+        head = rows[-1]
+        keys = sorted({k for r in rows for k in r} - NON_VARS)
+        times = [r["ts"].replace(tzinfo=timezone.utc) if r["ts"].tzinfo is None else r["ts"] for r in rows]
+        hourly = {k: [r.get(k) for r in rows] for k in keys}
+        ops += buckets.bucket_ops(mun_id, head["meta"].get("uf"), head.get("lat"), head.get("lon"), times, hourly,
+                                  source=head.get("source", "open-meteo"))
+        hours += len(rows)
+    return ops, hours
+
+def migrate(db, start: date, end: date) -> int:
+    """Migra os dias de [start, end] (inclusivo). Retorna o número de horas migradas."""
+    buckets.ensure_indexes(db)
+    src, dst = db.get_collection("raw_weather"), db.get_collection(buckets.COLLECTION)
+    total, d = 0, start
+    while d <= end:
+        day0 = _day_start(d)
+        with metrics.timer("weather.migrate_day"):
+            docs = src.find({"ts": {"$gte": day0, "$lt": day0 + timedelta(days=1)},
+                             "meta.municipio_ibge": {"$ne": None}})
+            ops, hours = day_ops(docs)
+            upserted = buckets.upsert_buckets(dst, ops)
+        metrics.incr("weather.migrated_hours", hours)
+        print(f"[migrate] {d}: {hours} horas -> {upserted} buckets novos")
+        total += hours
+        d += timedelta(days=1)
+    return total
+
+def verify(db, start: date, end: date) -> bool:
+    """Compara o build_weather_daily de [start, end] lido de raw_weather e de weather_buckets."""
+    from etl.gold.export_parquet import build_weather_daily
+
+    window = {"start": _day_start(start), "end": _day_start(end) + timedelta(days=1)}
+    prev = os.environ.get("WEATHER_STORAGE")
+    frames = {}
+    try:
+        for mode in buckets.MODES:
+            os.environ["WEATHER_STORAGE"] = mode
+            df = build_weather_daily(None, db=db, **window)
+            frames[mode] = df.sort_values(["date", "municipio_ibge"]).reset_index(drop=True)
+    finally:
+        if prev is None:
+            os.environ.pop("WEATHER_STORAGE", None)
+        else:
+            os.environ["WEATHER_STORAGE"] = prev
+    a, b = frames["hourly"], frames["bucket"]
+    if len(a) != len(b) or not a[["date", "municipio_ibge", "uf"]].equals(b[["date", "municipio_ibge", "uf"]]):
+        print(f"[migrate] verify: linhas diferentes (hourly={len(a)} bucket={len(b)})")
+        return False
+    bad = [c for c in ("temp_mean", "hum_min", "wind_max", "gust_max", "cloud_mean", "precip_sum", "dew_mean")
+           if not np.allclose(pd.to_numeric(a[c], errors="coerce").to_numpy(dtype=float),
+                              pd.to_numeric(b[c], errors="coerce").to_numpy(dtype=float),
+                              rtol=0, atol=1e-9, equal_nan=True)]
+    if bad:
+        print(f"[migrate] verify: colunas divergentes: {bad}")
+        return False
+    print(f"[migrate] verify OK: {len(a)} município-dias iguais nos dois modos")
+    return True
+
+if __name__ == "__main__":
+    import argparse, sys
+    ap = argparse.ArgumentParser(description="Migra raw_weather para weather_buckets (um dia por vez).")
+    ap.add_argument("--start", required=True, type=date.fromisoformat, help="AAAA-MM-DD (inclusivo)")
+    ap.add_argument("--end", required=True, type=date.fromisoformat, help="AAAA-MM-DD (inclusivo)")
+    ap.add_argument("--verify", action="store_true", help="compara o gold diário dos dois modos no fim")
+    args = ap.parse_args()
+    s = load_settings()
+    with mongo_db(s.mongo_uri) as db:
+        total = migrate(db, args.start, args.end)
+        print(f"[migrate] {total} horas migradas para {buckets.COLLECTION}")
+        if args.verify and not verify(db, args.start, args.end):
+            sys.exit(1)
@@ -6,9 +6,11 @@ set -euo pipefail
 # - ETL INPE (fires)
 # - ETL Weather (Open-Meteo)
 # - REF Municipios (CSV bruto ou padronizado)
-# - COORDS Municipios (CSV com lat/lon)  <-- NOVO
+# - COORDS Municipios (CSV com lat/lon)
 # - GOLD (Parquet: partitioned + single)
 #
+# As etapas rodam num único processo via `python -m etl.pipeline`.
+#
 # Usage:
 #   ./scripts/run_update.sh
 #   ./scripts/run_update.sh --days 7 --coords-csv data/ref/coords_municipios.csv --overwrite
@@ -33,30 +35,11 @@ mkdir -p logs
 STAMP="$(date +'%Y%m%d_%H%M%S')"
 LOG="logs/update_${STAMP}.log"
 
-# -------- defaults --------
-DAYS="${DAYS:-7}"
-COORDS_CSV_DEFAULT="data/ref/coords_municipios.csv"
-COORDS_CSV=""
-OVERWRITE=false
-SKIP_FIRES=false
-SKIP_WEATHER=false
-SKIP_REF=false
-SKIP_COORDS=false
-SKIP_GOLD=false
-
-# -------- parse args --------
-while [[ $# -gt 0 ]]; do
-  case "$1" in
-    --days)           DAYS="${2:-7}"; shift 2 ;;
-    --coords-csv)     COORDS_CSV="${2:-}"; shift 2 ;;
-    --overwrite)      OVERWRITE=true; shift ;;
-    --skip-fires)     SKIP_FIRES=true; shift ;;
-    --skip-weather)   SKIP_WEATHER=true; shift ;;
-    --skip-ref)       SKIP_REF=true; shift ;;
-    --skip-coords)    SKIP_COORDS=true; shift ;;
-    --skip-gold)      SKIP_GOLD=true; shift ;;
-    -h|--help)
-      cat <<EOF
+# -------- help --------
+# Flags são repassadas ao orquestrador (etl/pipeline.py); --help lista todas.
+for arg in "$@"; do
+  if [[ "$arg" == "-h" || "$arg" == "--help" ]]; then
+    cat <<EOF
 Usage: $0 [options]
 
 Options:
@@ -75,12 +58,8 @@ Exemplos:
   $0 --days 10 --coords-csv data/ref/coords_municipios.csv
   $0 --coords-csv data/ref/coords.csv --overwrite
 EOF
-      exit 0
-      ;;
-    *)
-      echo "[warn] argumento desconhecido: $1" | tee -a "$LOG"
-      shift ;;
-  esac
+    exit 0
+  fi
 done
 
 # -------- venv --------
@@ -92,9 +71,14 @@ fi
 source .venv/bin/activate
 
 # -------- deps --------
+# só reinstala quando requirements.txt muda (hash gravado dentro do venv)
 if [ -f "requirements.txt" ]; then
-  echo "[setup] Installing requirements..." | tee -a "$LOG"
-  pip install -r requirements.txt >>"$LOG" 2>&1
+  REQ_HASH="$(sha256sum requirements.txt | cut -d' ' -f1)"
+  if [ "$(cat .venv/.requirements.sha256 2>/dev/null || true)" != "$REQ_HASH" ]; then
+    echo "[setup] Installing requirements..." | tee -a "$LOG"
+    pip install -r requirements.txt >>"$LOG" 2>&1
+    echo "$REQ_HASH" > .venv/.requirements.sha256
+  fi
 fi
 
 # -------- env --------
@@ -107,64 +91,7 @@ else
   echo "[info] configs/.env não encontrado — usando defaults do código." | tee -a "$LOG"
 fi
 
-# -------- INPE --------
-if ! $SKIP_FIRES; then
-  echo "[run] INPE fires (days=${DAYS})..." | tee -a "$LOG"
-  python3 -m etl.inpe.fetch_fires --days "${DAYS}" 2>&1 | tee -a "$LOG"
-else
-  echo "[skip] INPE fires" | tee -a "$LOG"
-fi
-
-# -------- WEATHER --------
-if ! $SKIP_WEATHER; then
-  echo "[run] Weather (Open-Meteo)..." | tee -a "$LOG"
-  python3 -m etl.weather.fetch_weather 2>&1 | tee -a "$LOG"
-else
-  echo "[skip] Weather" | tee -a "$LOG"
-fi
-
-# -------- REF MUNICIPIOS (nome/uf/população) --------
-if ! $SKIP_REF; then
-  if [ -f "data/ref/municipios_raw.csv" ]; then
-    echo "[run] Ref municipios (data/ref/municipios_raw.csv)..." | tee -a "$LOG"
-    python3 -m etl.ibge.load_ref_municipios --csv data/ref/municipios_raw.csv 2>&1 | tee -a "$LOG"
-  elif [ -f "data/ref/municipios.csv" ]; then
-    echo "[run] Ref municipios (data/ref/municipios.csv)..." | tee -a "$LOG"
-    python3 -m etl.ibge.load_ref_municipios --csv data/ref/municipios.csv 2>&1 | tee -a "$LOG"
-  else
-    echo "[info] Sem CSV de municipios (nome/uf/populacao). Pulando." | tee -a "$LOG"
-  fi
-else
-  echo "[skip] REF municipios" | tee -a "$LOG"
-fi
-
-# -------- COORDENADAS MUNICIPIOS (lat/lon via CSV) --------
-if ! $SKIP_COORDS; then
-  # prioridade: flag --coords-csv; senão, arquivo default se existir
-  if [ -z "${COORDS_CSV}" ] && [ -f "${COORDS_CSV_DEFAULT}" ]; then
-    COORDS_CSV="${COORDS_CSV_DEFAULT}"
-  fi
-
-  if [ -n "${COORDS_CSV}" ] && [ -f "${COORDS_CSV}" ]; then
-    echo "[run] Coords municipios (${COORDS_CSV}) overwrite=${OVERWRITE} ..." | tee -a "$LOG"
-    if $OVERWRITE; then
-      python3 -m etl.ibge.load_coords_csv --csv "${COORDS_CSV}" --overwrite 2>&1 | tee -a "$LOG"
-    else
-      python3 -m etl.ibge.load_coords_csv --csv "${COORDS_CSV}" 2>&1 | tee -a "$LOG"
-    fi
-  else
-    echo "[info] Sem CSV de coordenadas (lat/lon). Pulando." | tee -a "$LOG"
-  fi
-else
-  echo "[skip] COORDS municipios" | tee -a "$LOG"
-fi
-
-# -------- GOLD --------
-if ! $SKIP_GOLD; then
-  echo "[run] Export Gold (Parquet)..." | tee -a "$LOG"
-  python3 -m etl.gold.export_parquet 2>&1 | tee -a "$LOG"
-else
-  echo "[skip] GOLD" | tee -a "$LOG"
-fi
-
-echo "[done] Pipeline concluída. Log: $LOG"
+# -------- pipeline (processo único) --------
+# INPE, clima, ref, coords e gold rodam no mesmo interpretador; o próprio
+# orquestrador grava saída e tempos por etapa em $LOG.
+python3 -m etl.pipeline --log "$LOG" "$@"